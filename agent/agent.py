@@ -41,16 +41,18 @@ logger = logging.getLogger(__name__)
 class LocalOpsAgent:
     """Agent avec support AI local et fallback robuste"""
     
-    def __init__(self, use_ai: bool = True):
+    def __init__(self, use_ai: bool = True, memory=None):
         """
         Initialise l'agent
         
         Args:
             use_ai: Active l'IA si disponible (défaut: True)
+            memory: AgentMemory optionnelle où journaliser les interactions
         """
         self.tools = {}
         self.intent_classifier = IntentClassifier()
-        self.memory = None
+        self.memory = memory
+        self.session_id = memory.create_session() if memory else None
         self.use_ai = use_ai and AI_AVAILABLE
         
         # Initialise l'AI summarizer si demandé et disponible
@@ -72,6 +74,8 @@ class LocalOpsAgent:
     def setup_tools(self):
         """Initialise les outils"""
         if SystemMetrics:
+            # Échantillonnage CPU en arrière-plan : les requêtes lisent la fenêtre
+            SystemMetrics.start_sampling()
             self.register_tool("system_metrics", SystemMetrics.get_all_metrics)
         self.register_tool("help", self.get_help)
     
@@ -98,6 +102,17 @@ class LocalOpsAgent:
             response = self.route_to_tool(intent, user_input)
             processing_time = (datetime.now() - start_time).total_seconds()
             
+            # Journalisation (mise en file, n'attend pas le disque)
+            if self.memory:
+                self.memory.save_interaction(
+                    user_input=user_input,
+                    intent=intent,
+                    response=response,
+                    ai_used=bool(response.get("ai_generated", False)),
+                    processing_time=processing_time,
+                    session_id=self.session_id
+                )
+            
             return {
                 "status": "success",
                 "input": user_input,
@@ -165,18 +180,31 @@ class LocalOpsAgent:
     
     def handle_unknown_intent(self, text: str, intent_result: dict) -> dict:
         """Gère les intentions inconnues avec AI si disponible"""
-        # Essaie de comprendre avec AI
+        # Une question proche a déjà reçu une réponse : on la réutilise
+        recalled = self._recall_answer(text, source="interaction")
+        if recalled:
+            return recalled
+        
+        # Essaie de répondre avec AI (réponse indexée pour le rappel sémantique)
         if self.use_ai and self.ai_summarizer:
             try:
-                response = "Je ne suis pas sûr de comprendre. Pourriez-vous reformuler?"
-                return {
-                    "tool": "ai_fallback",
-                    "summary": response,
-                    "ai_generated": True,
-                    "interpretation": f"L'utilisateur demande: '{text}'"
-                }
+                answer = self.ai_summarizer.answer_question(text)
+                if answer:
+                    return {
+                        "tool": "ai_answer",
+                        "summary": answer,
+                        "ai_generated": True
+                    }
             except Exception as e:
-                logger.debug(f"Fallback AI échoué: {e}")
+                logger.debug(f"Réponse AI échouée: {e}")
+            
+            response = "Je ne suis pas sûr de comprendre. Pourriez-vous reformuler?"
+            return {
+                "tool": "ai_fallback",
+                "summary": response,
+                "ai_generated": True,
+                "interpretation": f"L'utilisateur demande: '{text}'"
+            }
         
         # Fallback basique
         return {
@@ -191,9 +219,14 @@ class LocalOpsAgent:
         
         # Analyse AI de l'erreur
         error_analysis = None
-        if self.use_ai and self.ai_summarizer:
+        recalled = self._recall_answer(error_msg, source="error")
+        if recalled:
+            error_analysis = recalled["summary"]
+        elif self.use_ai and self.ai_summarizer:
             try:
                 error_analysis = self.ai_summarizer.analyze_problem(error_msg)
+                if self.memory and error_analysis:
+                    self.memory.save_explanation("error", error_msg, error_analysis)
             except:
                 pass
         
@@ -246,16 +279,41 @@ Mode : IA locale activée
         try:
             cpu = metrics.get('cpu', {})
             memory = metrics.get('memory', {}).get('virtual', {})
+            top_cpu = metrics.get('processes', {}).get('cpu', [])
+            top_line = ", ".join(f"{p['name']} ({p['cpu_percent']}%)" for p in top_cpu[:3]) or 'N/A'
             
             return f"""
 Rapport Système (Basique)
 CPU: {cpu.get('percent', 'N/A')}%
 Memoire: {memory.get('percent', 'N/A')}%
 Disques: {len(metrics.get('disk', {}).get('partitions', []))} partitions
+Processus (CPU): {top_line}
 """
         except Exception as e:
             return f"Erreur dans le résumé: {str(e)}"
     
+    def _recall_answer(self, text: str, source: str) -> dict:
+        """Réponse passée assez proche pour éviter une nouvelle inférence"""
+        if not self.memory:
+            return None
+        
+        matches = self.memory.recall_similar(text, k=3, source=source)
+        matches = [m for m in matches if m.get("answer")]
+        if not matches:
+            return None
+        
+        best = matches[0]
+        return {
+            "tool": "memory_recall",
+            "summary": best["answer"],
+            "ai_generated": False,
+            "recalled_from": {
+                "text": best["text"],
+                "source": best["source"],
+                "score": best["score"]
+            }
+        }
+    
     def _fallback_help(self) -> str:
         """Aide de secours"""
         return """
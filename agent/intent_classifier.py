@@ -1,7 +1,7 @@
 class IntentClassifier:
     def __init__(self):
         self.keyword_map = {
-            "system": ["cpu", "ram", "mémoire", "disque", "système", "performance"],
+            "system": ["cpu", "ram", "mémoire", "disque", "système", "performance", "metrique", "métrique"],
             "file": ["fichier", "créer", "supprimer", "lire", "écrire", "dossier"],
             "network": ["ping", "connectivité", "réseau", "internet", "ip"],
             "help": ["aide", "help", "que peux-tu", "fonctions", "capacités"]
@@ -3,10 +3,16 @@ from typing import Dict, List, Optional
 import time
 import json
 
+try:
+    from tools.alert_bus import Alert, get_alert_bus
+except ImportError:
+    # Racine du projet absente du chemin : alertes locales seulement
+    Alert = get_alert_bus = None
+
 class AnomalyDetector:
     """Détecteur d'anomalies basé sur des règles pour conteneurs Docker"""
     
-    def __init__(self, thresholds: Optional[Dict] = None):
+    def __init__(self, thresholds: Optional[Dict] = None, bus=None):
         # Seuils par défaut
         self.thresholds = thresholds or {
             'cpu_warning': 70.0,
@@ -20,6 +26,8 @@ class AnomalyDetector:
         }
         self.alerts = []
         self.alert_history = []
+        # Bus d'alertes commun (conteneurs, fichiers, hôte)
+        self.bus = bus if bus is not None else (get_alert_bus() if get_alert_bus else None)
         
     def analyze_metrics(self, metrics: Dict) -> List[Dict]:
         """Analyse les métriques et détecte les anomalies"""
@@ -160,6 +168,13 @@ class AnomalyDetector:
         if len(self.alert_history) > 100:
             self.alert_history = self.alert_history[-100:]
         
+        if self.bus is not None:
+            self.bus.publish(Alert(
+                "container", anomaly['level'], f"{container_name} - {anomaly['message']}",
+                kind=anomaly['type'],
+                data={'container': container_name, 'anomaly': anomaly, 'alert_id': alert['id']}
+            ))
+        
         return alert
     
     def get_active_alerts(self, unacknowledged_only: bool = True) -> List[Dict]:
@@ -2,8 +2,14 @@
 import time
 from threading import Thread
 from .anomaly import AnomalyDetector
+from .ai_explainer import AIExplainer
 from .metrics import ContainerMetrics
 
+try:
+    from tools.alert_bus import install_default_subscribers
+except ImportError:
+    install_default_subscribers = None
+
 class ContainerMonitor:
     def __init__(self, docker_client, check_interval: int = 30):
         self.client = docker_client
@@ -19,6 +25,9 @@ class ContainerMonitor:
             return " Monitoring already running"
         
         self.monitoring = True
+        if install_default_subscribers and self.anomaly_detector.bus is not None:
+            # Logs, persistance et explication des alertes de conteneur
+            install_default_subscribers(self.anomaly_detector.bus, explainer=AIExplainer())
         self.thread = Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
         return f"✅ Started container monitoring (interval: {self.check_interval}s)"
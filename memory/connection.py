@@ -0,0 +1,144 @@
+"""
+Gestionnaire de connexions SQLite partagées
+Une connexion d'écriture unique + un petit pool de connexions de lecture
+"""
+
+import sqlite3
+import threading
+import queue
+import itertools
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pragmas appliqués à chaque connexion d'un fichier sur disque
+DEFAULT_PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",    # effectif dès la création (sinon après VACUUM)
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # 256 MB
+    "cache_size": -16000,            # ~16 MB (valeur négative = KiB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000             # ms
+}
+
+_memory_ids = itertools.count(1)
+
+
+class ConnectionManager:
+    """Connexions SQLite persistantes : un écrivain, plusieurs lecteurs"""
+
+    def __init__(self,
+                 db_path: str,
+                 pool_size: int = 4,
+                 pragmas: Optional[Dict] = None,
+                 cached_statements: int = 256):
+        """
+        Args:
+            db_path: Chemin du fichier SQLite (ou ":memory:")
+            pool_size: Nombre maximal de connexions de lecture
+            pragmas: Pragmas à appliquer (remplace DEFAULT_PRAGMAS)
+            cached_statements: Taille du cache de requêtes préparées par connexion
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self.in_memory = db_path == ":memory:"
+
+        if self.in_memory:
+            # Base en mémoire : elle vit tant que la connexion d'écriture est ouverte
+            self._target = f"file:agent_memory_{next(_memory_ids)}?mode=memory&cache=shared"
+            self.pragmas.pop("journal_mode", None)
+            self.pragmas.pop("auto_vacuum", None)
+            self.pragmas.pop("mmap_size", None)
+        else:
+            db_dir = os.path.dirname(db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir, exist_ok=True)
+            self._target = db_path
+
+        self._write_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+        self.writer = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion configurée"""
+        conn = sqlite3.connect(
+            self._target,
+            uri=self.in_memory,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Transaction d'écriture (commit à la sortie, rollback sur erreur)"""
+        with self._write_lock:
+            try:
+                yield self.writer
+                self.writer.commit()
+            except Exception:
+                self.writer.rollback()
+                raise
+
+    @contextmanager
+    def read(self):
+        """Connexion de lecture empruntée au pool"""
+        if self.in_memory or self.pool_size <= 0:
+            # Cache partagé en mémoire : les lecteurs séparés se heurtent aux
+            # verrous de table, on lit donc via la connexion d'écriture
+            with self._write_lock:
+                yield self.writer
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Réutilise un lecteur libre ou en crée un dans la limite du pool"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if self._readers_created < self.pool_size:
+                self._readers_created += 1
+                return self._connect()
+
+        return self._readers.get()
+
+    def close(self):
+        """Ferme toutes les connexions"""
+        if self._closed:
+            return
+        self._closed = True
+
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+        with self._write_lock:
+            self.writer.close()
+        logger.debug(f"Connexions fermées: {self.db_path}")
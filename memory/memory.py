@@ -1,23 +1,48 @@
-import sqlite3
+"""
+Mémoire simple prompt/réponse
+Partage le moteur de stockage d'AgentMemory (collection "memory")
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from memory.storage import StorageBackend, open_backend
+except ImportError:
+    from storage import StorageBackend, open_backend
+
+COLLECTION = "memory"
+
 
 class Memory:
-    def __init__(self, db_path="memory/agent_memory.db"):
-        self.conn = sqlite3.connect(db_path)
-        self.create_table()
-
-    def create_table(self):
-        self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prompt TEXT,
-            response TEXT
-        )
-        """)
+    def __init__(self, db_path="memory/agent_memory.db", storage: Optional[StorageBackend] = None):
+        """
+        Args:
+            db_path: Chemin du fichier SQLite (ignoré si storage est fourni)
+            storage: Backend de stockage à utiliser (défaut: moteur SQLite partagé)
+        """
+        self.storage = storage or open_backend(db_path)
 
     def save(self, prompt, response):
-        self.conn.execute("INSERT INTO memory (prompt, response) VALUES (?, ?)", (prompt, response))
-        self.conn.commit()
+        self.storage.append(COLLECTION, {"prompt": prompt, "response": response})
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Tuple[int, str, str]]:
+        """
+        Parcourt les échanges par lots, sans tout charger en mémoire
+
+        Yields:
+            (id, prompt, response) comme l'ancienne table memory. Attention :
+            id est seulement le rang de l'échange dans ce parcours (1, 2, ...),
+            pas un identifiant persistant. Il change dès que des échanges plus
+            anciens sont supprimés (rétention, rotation du journal) : ne pas le
+            conserver pour retrouver un échange plus tard.
+        """
+        records = self.storage.iter(COLLECTION, batch_size)
+        for index, record in enumerate(records, 1):
+            yield index, record.get("prompt"), record.get("response")
+
+    def fetch_all(self) -> List[Tuple[int, str, str]]:
+        """Tous les échanges (id ordinal, voir iter_all)"""
+        return list(self.iter_all())
 
-    def fetch_all(self):
-        cursor = self.conn.execute("SELECT * FROM memory")
-        return cursor.fetchall()
+    def close(self):
+        self.storage.close()
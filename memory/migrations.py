@@ -0,0 +1,286 @@
+"""
+Migrations du schéma de la mémoire SQLite
+La version courante est stockée dans PRAGMA user_version
+"""
+
+import sqlite3
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _iso_to_epoch(value):
+    """Convertit un horodatage ISO (heure locale) en secondes epoch"""
+    if value is None:
+        return None
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _migrate_v1(conn: sqlite3.Connection):
+    """Schéma initial (horodatages TEXT ISO)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            user_input TEXT NOT NULL,
+            intent TEXT,
+            confidence REAL,
+            response_summary TEXT,
+            ai_used INTEGER DEFAULT 0,
+            processing_time REAL,
+            session_id TEXT
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            total_interactions INTEGER DEFAULT 0
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS metrics_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            cpu_percent REAL,
+            memory_percent REAL,
+            disk_usage TEXT
+        )
+    ''')
+
+
+def _migrate_v2(conn: sqlite3.Connection):
+    """Horodatages epoch INTEGER, index et compteur de session incrémental"""
+    conn.create_function("iso_to_epoch", 1, _iso_to_epoch, deterministic=True)
+
+    conn.execute("ALTER TABLE interactions RENAME TO interactions_v1")
+    conn.execute('''
+        CREATE TABLE interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            user_input TEXT NOT NULL,
+            intent TEXT,
+            confidence REAL,
+            response_summary TEXT,
+            ai_used INTEGER DEFAULT 0,
+            processing_time REAL,
+            session_id TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO interactions
+        (id, timestamp, user_input, intent, confidence, response_summary,
+         ai_used, processing_time, session_id)
+        SELECT id, COALESCE(iso_to_epoch(timestamp), 0), user_input, intent, confidence,
+               response_summary, ai_used, processing_time, session_id
+        FROM interactions_v1
+    ''')
+    conn.execute("DROP TABLE interactions_v1")
+
+    conn.execute("ALTER TABLE sessions RENAME TO sessions_v1")
+    conn.execute('''
+        CREATE TABLE sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER,
+            total_interactions INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO sessions (id, session_id, start_time, end_time, total_interactions)
+        SELECT s.id, s.session_id, COALESCE(iso_to_epoch(s.start_time), 0),
+               iso_to_epoch(s.end_time),
+               (SELECT COUNT(*) FROM interactions i WHERE i.session_id = s.session_id)
+        FROM sessions_v1 s
+    ''')
+    conn.execute("DROP TABLE sessions_v1")
+
+    conn.execute("ALTER TABLE metrics_history RENAME TO metrics_history_v1")
+    conn.execute('''
+        CREATE TABLE metrics_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            cpu_percent REAL,
+            memory_percent REAL,
+            disk_usage TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO metrics_history (id, timestamp, cpu_percent, memory_percent, disk_usage)
+        SELECT id, COALESCE(iso_to_epoch(timestamp), 0), cpu_percent, memory_percent, disk_usage
+        FROM metrics_history_v1
+    ''')
+    conn.execute("DROP TABLE metrics_history_v1")
+
+    conn.execute("CREATE INDEX idx_interactions_timestamp ON interactions (timestamp)")
+    conn.execute("CREATE INDEX idx_interactions_session ON interactions (session_id, timestamp)")
+    conn.execute("CREATE INDEX idx_interactions_intent ON interactions (intent, timestamp)")
+    conn.execute("CREATE INDEX idx_metrics_timestamp ON metrics_history (timestamp)")
+
+    # Le compteur de session suit les insertions (remplace le COUNT(*) de close_session)
+    conn.execute('''
+        CREATE TRIGGER trg_interactions_session_count
+        AFTER INSERT ON interactions
+        WHEN NEW.session_id IS NOT NULL
+        BEGIN
+            UPDATE sessions SET total_interactions = total_interactions + 1
+            WHERE session_id = NEW.session_id;
+        END
+    ''')
+
+
+def _migrate_v3(conn: sqlite3.Connection):
+    """Tables d'agrégats horaires/journaliers alimentées par la rétention"""
+    for period in ("hourly", "daily"):
+        conn.execute(f'''
+            CREATE TABLE interactions_{period} (
+                bucket INTEGER NOT NULL,
+                intent TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                ai_count INTEGER NOT NULL DEFAULT 0,
+                total_time REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, intent)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f'''
+            CREATE TABLE metrics_{period} (
+                bucket INTEGER PRIMARY KEY,
+                samples INTEGER NOT NULL DEFAULT 0,
+                cpu_sum REAL NOT NULL DEFAULT 0,
+                cpu_max REAL,
+                memory_sum REAL NOT NULL DEFAULT 0,
+                memory_max REAL
+            )
+        ''')
+
+
+def _migrate_v4(conn: sqlite3.Connection):
+    """interactions_hourly maintenue à chaque insertion (statistiques pré-agrégées)"""
+    # Reprise des lignes brutes existantes (celles déjà agrégées ont été supprimées)
+    conn.execute('''
+        INSERT INTO interactions_hourly (bucket, intent, count, ai_count, total_time)
+        SELECT timestamp - timestamp % 3600, COALESCE(intent, ''), COUNT(*),
+               COALESCE(SUM(ai_used), 0), COALESCE(SUM(processing_time), 0)
+        FROM interactions
+        WHERE true
+        GROUP BY 1, 2
+        ON CONFLICT (bucket, intent) DO UPDATE SET
+            count = count + excluded.count,
+            ai_count = ai_count + excluded.ai_count,
+            total_time = total_time + excluded.total_time
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER trg_interactions_hourly
+        AFTER INSERT ON interactions
+        BEGIN
+            INSERT INTO interactions_hourly (bucket, intent, count, ai_count, total_time)
+            VALUES (NEW.timestamp - NEW.timestamp % 3600, COALESCE(NEW.intent, ''), 1,
+                    COALESCE(NEW.ai_used, 0), COALESCE(NEW.processing_time, 0))
+            ON CONFLICT (bucket, intent) DO UPDATE SET
+                count = count + 1,
+                ai_count = ai_count + excluded.ai_count,
+                total_time = total_time + excluded.total_time;
+        END
+    ''')
+
+
+def _migrate_v5(conn: sqlite3.Connection):
+    """Vecteurs du rappel sémantique (un modèle d'embedding par ligne)"""
+    conn.execute('''
+        CREATE TABLE embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            ref_id INTEGER,
+            model TEXT NOT NULL,
+            text TEXT NOT NULL,
+            answer TEXT,
+            vector BLOB NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX idx_embeddings_model ON embeddings (model, id)")
+
+
+def _migrate_v6(conn: sqlite3.Connection):
+    """Collections d'enregistrements JSON (stockage commun), reprise de la table memory"""
+    conn.execute('''
+        CREATE TABLE records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            collection TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            data TEXT NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX idx_records_collection ON records (collection, id)")
+
+    # Ancienne table de memory/memory.py (prompt, response)
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory'"
+    ).fetchone()
+    if legacy:
+        # L'ancienne table n'avait pas de date : timestamp 0 = date inconnue
+        # (l'ordre d'origine est conservé par l'id des enregistrements)
+        conn.execute('''
+            INSERT INTO records (collection, timestamp, data)
+            SELECT 'memory', 0,
+                   json_object('prompt', prompt, 'response', response)
+            FROM memory ORDER BY id
+        ''')
+        conn.execute("DROP TABLE memory")
+
+
+# Migrations ordonnées : l'index + 1 est la version atteinte
+MIGRATIONS = [
+    _migrate_v1,
+    _migrate_v2,
+    _migrate_v3,
+    _migrate_v4,
+    _migrate_v5,
+    _migrate_v6,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Version courante du schéma"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Applique les migrations manquantes, chacune dans sa propre transaction
+
+    Returns:
+        Version du schéma après migration
+    """
+    version = get_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Schéma v{version} plus récent que celui supporté (v{SCHEMA_VERSION})"
+        )
+
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[target - 1](conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Schéma mémoire migré en v{target}")
+
+    return SCHEMA_VERSION
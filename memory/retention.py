@@ -0,0 +1,265 @@
+"""
+Politique de rétention de la mémoire SQLite
+Agrège les anciennes lignes en tables horaires/journalières, purge par lots
+et libère l'espace avec l'incremental vacuum
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class RetentionPolicy:
+    """Rollup + purge par petits lots + incremental vacuum"""
+
+    # Bases dont la conversion en auto_vacuum incrémental a déjà été tentée,
+    # partagé entre instances : apply_retention crée une politique par passe
+    _converted = set()
+    _converted_lock = threading.Lock()
+
+    def __init__(self,
+                 raw_days: int = 7,
+                 metrics_raw_days: int = 2,
+                 hourly_days: int = 90,
+                 daily_days: int = 730,
+                 embeddings_days: int = 180,
+                 alert_days: int = 30,
+                 alert_collections: Iterable[str] = ("alerts", "alert_bus"),
+                 batch_size: int = 1000,
+                 vacuum_pages: int = 2000,
+                 pause: float = 0.01):
+        """
+        Args:
+            raw_days: Âge maximal des interactions brutes
+            metrics_raw_days: Âge maximal des snapshots de métriques bruts
+            hourly_days: Âge au-delà duquel les agrégats horaires passent en journaliers
+            daily_days: Âge maximal des agrégats journaliers
+            embeddings_days: Âge maximal des entrées du rappel sémantique
+            alert_days: Âge maximal des alertes persistées
+            alert_collections: Collections de la table records purgées après alert_days
+            batch_size: Nombre de lignes traitées par transaction
+            vacuum_pages: Pages libérées par passe d'incremental vacuum
+            pause: Pause entre deux lots pour laisser passer les écritures
+        """
+        self.raw_days = raw_days
+        self.metrics_raw_days = metrics_raw_days
+        self.hourly_days = hourly_days
+        self.daily_days = daily_days
+        self.embeddings_days = embeddings_days
+        self.alert_days = alert_days
+        self.alert_collections = tuple(alert_collections)
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+
+    def run(self, db, now: float = None) -> Dict[str, int]:
+        """
+        Applique la politique sur un ConnectionManager
+
+        Returns:
+            Nombre de lignes agrégées/supprimées par table
+        """
+        now = int(now if now is not None else time.time())
+        stats = {}
+
+        # On n'agrège que des heures complètes
+        raw_cutoff = self._floor(now - self.raw_days * DAY, HOUR)
+        metrics_cutoff = self._floor(now - self.metrics_raw_days * DAY, HOUR)
+        hourly_cutoff = self._floor(now - self.hourly_days * DAY, DAY)
+        daily_cutoff = self._floor(now - self.daily_days * DAY, DAY)
+        embeddings_cutoff = now - self.embeddings_days * DAY
+        alert_cutoff = now - self.alert_days * DAY
+
+        stats["interactions"] = self._drain(db, self._purge_interactions, raw_cutoff)
+        stats["metrics_history"] = self._drain(db, self._rollup_metrics, metrics_cutoff)
+        stats["interactions_hourly"] = self._drain(db, self._rollup_interactions_hourly, hourly_cutoff)
+        stats["metrics_hourly"] = self._drain(db, self._rollup_metrics_hourly, hourly_cutoff)
+        stats["interactions_daily"] = self._drain(db, self._purge_daily("interactions_daily"), daily_cutoff)
+        stats["metrics_daily"] = self._drain(db, self._purge_daily("metrics_daily"), daily_cutoff)
+        stats["embeddings"] = self._drain(db, self._purge_embeddings, embeddings_cutoff)
+        for collection in self.alert_collections:
+            stats[f"records.{collection}"] = self._drain(db, self._purge_records(collection),
+                                                         alert_cutoff)
+        stats["vacuumed_pages"] = self.vacuum(db)
+
+        logger.info(f"Rétention appliquée: {stats}")
+        return stats
+
+    def vacuum(self, db) -> int:
+        """Rend au système les pages libres (par tranches de vacuum_pages)"""
+        if getattr(db, "in_memory", False):
+            # Base en mémoire : rien à rendre au système de fichiers
+            return 0
+
+        with db.write() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                with self._converted_lock:
+                    if db.db_path in self._converted:
+                        # Conversion déjà tentée sans effet : pas de VACUUM complet à chaque passe
+                        return 0
+                    # Base créée sans auto_vacuum : un VACUUM complet, une seule fois
+                    self._converted.add(db.db_path)
+                conn.commit()
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    logger.warning("auto_vacuum incrémental non activé, vacuum désactivé")
+                return 0
+
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages:
+                # execute() ne fait qu'un pas (une page) : executescript va jusqu'au bout
+                conn.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+            return min(free_pages, self.vacuum_pages)
+
+    @staticmethod
+    def _floor(timestamp: int, period: int) -> int:
+        return timestamp - timestamp % period
+
+    def _drain(self, db, step, cutoff: int) -> int:
+        """Répète une étape par lots jusqu'à épuisement"""
+        total = 0
+        while True:
+            with db.write() as conn:
+                done = step(conn, cutoff)
+            total += done
+            if done < self.batch_size:
+                return total
+            if self.pause:
+                time.sleep(self.pause)
+
+    def _batch_bound(self, conn, table: str, column: str, cutoff: int):
+        """Plus grande clé du prochain lot de lignes antérieures au seuil"""
+        row = conn.execute(f'''
+            SELECT MAX(rowid), COUNT(*) FROM (
+                SELECT rowid FROM {table} WHERE {column} < ? ORDER BY rowid LIMIT ?
+            )
+        ''', (cutoff, self.batch_size)).fetchone()
+        return row[0], row[1]
+
+    def _purge_interactions(self, conn, cutoff: int) -> int:
+        """Supprime les interactions brutes expirées"""
+        # interactions_hourly est déjà alimentée par trigger à l'insertion
+        bound, count = self._batch_bound(conn, "interactions", "timestamp", cutoff)
+        if not count:
+            return 0
+
+        conn.execute("DELETE FROM interactions WHERE rowid <= ? AND timestamp < ?", (bound, cutoff))
+        return count
+
+    def _purge_embeddings(self, conn, cutoff: int) -> int:
+        """Supprime les entrées expirées du rappel sémantique"""
+        bound, count = self._batch_bound(conn, "embeddings", "timestamp", cutoff)
+        if not count:
+            return 0
+
+        conn.execute("DELETE FROM embeddings WHERE rowid <= ? AND timestamp < ?", (bound, cutoff))
+        return count
+
+    def _rollup_metrics(self, conn, cutoff: int) -> int:
+        """Snapshots bruts -> metrics_hourly, puis suppression"""
+        bound, count = self._batch_bound(conn, "metrics_history", "timestamp", cutoff)
+        if not count:
+            return 0
+
+        conn.execute('''
+            INSERT INTO metrics_hourly (bucket, samples, cpu_sum, cpu_max, memory_sum, memory_max)
+            SELECT timestamp - timestamp % 3600, COUNT(*),
+                   COALESCE(SUM(cpu_percent), 0), MAX(cpu_percent),
+                   COALESCE(SUM(memory_percent), 0), MAX(memory_percent)
+            FROM metrics_history
+            WHERE rowid <= ? AND timestamp < ?
+            GROUP BY 1
+            ON CONFLICT (bucket) DO UPDATE SET
+                samples = samples + excluded.samples,
+                cpu_sum = cpu_sum + excluded.cpu_sum,
+                cpu_max = MAX(COALESCE(cpu_max, excluded.cpu_max), COALESCE(excluded.cpu_max, cpu_max)),
+                memory_sum = memory_sum + excluded.memory_sum,
+                memory_max = MAX(COALESCE(memory_max, excluded.memory_max), COALESCE(excluded.memory_max, memory_max))
+        ''', (bound, cutoff))
+        conn.execute("DELETE FROM metrics_history WHERE rowid <= ? AND timestamp < ?", (bound, cutoff))
+        return count
+
+    def _rollup_interactions_hourly(self, conn, cutoff: int) -> int:
+        """Agrégats horaires anciens -> interactions_daily"""
+        rows = conn.execute('''
+            SELECT bucket, intent FROM interactions_hourly
+            WHERE bucket < ? ORDER BY bucket LIMIT ?
+        ''', (cutoff, self.batch_size)).fetchall()
+        if not rows:
+            return 0
+
+        last_bucket = rows[-1][0]
+        conn.execute('''
+            INSERT INTO interactions_daily (bucket, intent, count, ai_count, total_time)
+            SELECT bucket - bucket % 86400, intent, SUM(count), SUM(ai_count), SUM(total_time)
+            FROM interactions_hourly
+            WHERE bucket <= ? AND bucket < ?
+            GROUP BY 1, 2
+            ON CONFLICT (bucket, intent) DO UPDATE SET
+                count = count + excluded.count,
+                ai_count = ai_count + excluded.ai_count,
+                total_time = total_time + excluded.total_time
+        ''', (last_bucket, cutoff))
+        cursor = conn.execute('''
+            DELETE FROM interactions_hourly WHERE bucket <= ? AND bucket < ?
+        ''', (last_bucket, cutoff))
+        return cursor.rowcount
+
+    def _rollup_metrics_hourly(self, conn, cutoff: int) -> int:
+        """Agrégats horaires anciens -> metrics_daily"""
+        bound, count = self._batch_bound(conn, "metrics_hourly", "bucket", cutoff)
+        if not count:
+            return 0
+
+        conn.execute('''
+            INSERT INTO metrics_daily (bucket, samples, cpu_sum, cpu_max, memory_sum, memory_max)
+            SELECT bucket - bucket % 86400, SUM(samples), SUM(cpu_sum), MAX(cpu_max),
+                   SUM(memory_sum), MAX(memory_max)
+            FROM metrics_hourly
+            WHERE bucket <= ? AND bucket < ?
+            GROUP BY 1
+            ON CONFLICT (bucket) DO UPDATE SET
+                samples = samples + excluded.samples,
+                cpu_sum = cpu_sum + excluded.cpu_sum,
+                cpu_max = MAX(COALESCE(cpu_max, excluded.cpu_max), COALESCE(excluded.cpu_max, cpu_max)),
+                memory_sum = memory_sum + excluded.memory_sum,
+                memory_max = MAX(COALESCE(memory_max, excluded.memory_max), COALESCE(excluded.memory_max, memory_max))
+        ''', (bound, cutoff))
+        conn.execute("DELETE FROM metrics_hourly WHERE bucket <= ? AND bucket < ?", (bound, cutoff))
+        return count
+
+    def _purge_daily(self, table: str):
+        """Étape de suppression des agrégats journaliers expirés"""
+        def step(conn, cutoff: int) -> int:
+            cursor = conn.execute(f'''
+                DELETE FROM {table} WHERE bucket IN (
+                    SELECT DISTINCT bucket FROM {table} WHERE bucket < ? ORDER BY bucket LIMIT ?
+                )
+            ''', (cutoff, self.batch_size))
+            return cursor.rowcount
+        return step
+
+    def _purge_records(self, collection: str):
+        """Étape de suppression des enregistrements expirés d'une collection"""
+        def step(conn, cutoff: int) -> int:
+            # Parcours par (collection, id) : index idx_records_collection
+            row = conn.execute('''
+                SELECT MAX(id), COUNT(*) FROM (
+                    SELECT id FROM records WHERE collection = ? AND timestamp < ?
+                    ORDER BY id LIMIT ?
+                )
+            ''', (collection, cutoff, self.batch_size)).fetchone()
+            if not row[1]:
+                return 0
+            conn.execute('''
+                DELETE FROM records WHERE collection = ? AND id <= ? AND timestamp < ?
+            ''', (collection, row[0], cutoff))
+            return row[1]
+        return step
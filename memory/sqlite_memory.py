@@ -3,148 +3,183 @@ Mémoire persistante avec SQLite
 Jour 13 - Semaine 2
 """
 
-import sqlite3
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
 import os
 
+try:
+    from memory.retention import RetentionPolicy
+    from memory.storage import SQLiteBackend, open_backend
+except ImportError:
+    from retention import RetentionPolicy
+    from storage import SQLiteBackend, open_backend
+
+# Rappel sémantique optionnel (nécessite NumPy)
+try:
+    try:
+        from memory.vector_index import SemanticRecall
+    except ImportError:
+        from vector_index import SemanticRecall
+    RECALL_AVAILABLE = True
+except ImportError:
+    SemanticRecall = None
+    RECALL_AVAILABLE = False
+
+try:
+    from tools.system_tools import get_metrics_collector
+except ImportError:
+    get_metrics_collector = None
+
 logger = logging.getLogger(__name__)
 
+# Réponses jamais réutilisées par le rappel : non-réponses et données datées.
+# Les réponses de l'IA aux questions libres (ai_answer) sont indexées.
+NON_RECALLABLE_TOOLS = frozenset({
+    'none', 'error', 'memory_recall', 'ai_fallback',
+    'system_metrics', 'help'
+})
+
 
 class AgentMemory:
     """Gestionnaire de mémoire SQLite pour l'agent"""
     
-    def __init__(self, db_path: str = "memory/agent_memory.db"):
+    def __init__(self,
+                 db_path: str = "memory/agent_memory.db",
+                 pool_size: int = 4,
+                 async_writes: bool = True,
+                 semantic_recall: bool = False,
+                 embedder=None,
+                 storage: Optional[SQLiteBackend] = None):
         """
         Initialise la base de données
         
         Args:
             db_path: Chemin vers le fichier SQLite
+            pool_size: Nombre de connexions de lecture partagées
+            async_writes: Écrit interactions et métriques via une file
+                asynchrone (l'appelant n'attend jamais le disque)
+            semantic_recall: Indexe les interactions pour la recherche par similarité
+            embedder: Modèle d'embedding du rappel (défaut: Ollama puis hachage)
+            storage: Backend SQLite à partager (défaut: moteur commun de db_path,
+                les options pool_size/async_writes ne s'appliquent qu'à sa création)
         """
         self.db_path = db_path
-        self._init_database()
+        if storage is None:
+            storage = open_backend(db_path, pool_size=pool_size, async_writes=async_writes)
+        elif not isinstance(storage, SQLiteBackend):
+            raise TypeError("AgentMemory nécessite un backend SQL (SQLiteBackend)")
+        
+        self.storage = storage
+        self.db = storage.db
+        self.writes = storage.writes
+        logger.debug(f"Schéma mémoire v{storage.schema_version}")
+        
+        self.recall = None
+        if semantic_recall:
+            if RECALL_AVAILABLE:
+                self.recall = SemanticRecall(self.db, embedder=embedder)
+            else:
+                logger.warning("Rappel sémantique indisponible (NumPy manquant)")
         logger.info(f"Memoire initialisée: {db_path}")
     
-    def _init_database(self):
-        """Initialise les tables de la base de données"""
-        try:
-            # Crée le dossier si nécessaire
-            db_dir = os.path.dirname(self.db_path)
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir, exist_ok=True)
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Table des interactions
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS interactions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        user_input TEXT NOT NULL,
-                        intent TEXT,
-                        confidence REAL,
-                        response_summary TEXT,
-                        ai_used INTEGER DEFAULT 0,
-                        processing_time REAL,
-                        session_id TEXT
-                    )
-                ''')
-                
-                # Table des sessions
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS sessions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT UNIQUE NOT NULL,
-                        start_time TEXT NOT NULL,
-                        end_time TEXT,
-                        total_interactions INTEGER DEFAULT 0
-                    )
-                ''')
-                
-                # Table des métriques (historique)
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS metrics_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        cpu_percent REAL,
-                        memory_percent REAL,
-                        disk_usage TEXT
-                    )
-                ''')
-                
-                conn.commit()
-                
-        except Exception as e:
-            logger.error(f"Erreur d'initialisation de la base: {e}")
-            raise
-    
     def save_interaction(self, 
                         user_input: str,
                         intent: Optional[Dict] = None,
                         response: Optional[Dict] = None,
                         ai_used: bool = False,
                         processing_time: float = 0.0,
-                        session_id: Optional[str] = None) -> int:
+                        session_id: Optional[str] = None) -> Optional[int]:
         """
         Sauvegarde une interaction
         
         Returns:
-            ID de l'interaction sauvegardée
+            ID de l'interaction sauvegardée (None si l'écriture est mise
+            en file, -1 en cas d'erreur)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                timestamp = datetime.now().isoformat()
-                
-                # Prépare les données
-                intent_str = json.dumps(intent) if intent else None
-                intent_type = intent.get('intent') if intent else None
-                confidence = intent.get('confidence') if intent else None
-                
-                response_summary = response.get('summary', '') if response else ''
-                
-                cursor.execute('''
-                    INSERT INTO interactions 
-                    (timestamp, user_input, intent, confidence, response_summary, 
-                     ai_used, processing_time, session_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    timestamp,
-                    user_input,
-                    intent_type,
-                    confidence,
-                    response_summary[:500],
-                    1 if ai_used else 0,
-                    processing_time,
-                    session_id
-                ))
-                
-                interaction_id = cursor.lastrowid
-                conn.commit()
-                
-                logger.debug(f"Interaction sauvegardée: {interaction_id}")
-                return interaction_id
+            timestamp = int(time.time())
+            
+            # Prépare les données
+            intent_type = intent.get('intent') if intent else None
+            confidence = intent.get('confidence') if intent else None
+            
+            response_summary = response.get('summary', '') if response else ''
+            
+            interaction_id = self._write('''
+                INSERT INTO interactions 
+                (timestamp, user_input, intent, confidence, response_summary, 
+                 ai_used, processing_time, session_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                timestamp,
+                user_input,
+                intent_type,
+                confidence,
+                response_summary[:500],
+                1 if ai_used else 0,
+                processing_time,
+                session_id
+            ))
+            
+            # Seules les réponses stables sont réutilisables : ni les non-réponses
+            # (intention inconnue, erreur, reformulation) ni les données datées
+            tool = response.get('tool') if response else None
+            if self.recall and response_summary and tool and tool not in NON_RECALLABLE_TOOLS:
+                self.recall.add("interaction", user_input, response_summary, interaction_id)
+            
+            logger.debug(f"Interaction sauvegardée: {interaction_id}")
+            return interaction_id
                 
         except Exception as e:
             logger.error(f"Erreur de sauvegarde: {e}")
             return -1
     
+    def _write(self, sql: str, params: tuple) -> Optional[int]:
+        """Écrit via la file asynchrone si active, sinon directement"""
+        return self.storage.execute(sql, params)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend que les écritures en file soient validées"""
+        return self.storage.flush(timeout)
+    
+    def save_explanation(self, source: str, problem: str, explanation: str):
+        """Indexe une explication (alerte, erreur) pour la réutiliser plus tard"""
+        if self.recall:
+            self.recall.add(source, problem, explanation)
+    
+    def recall_similar(self,
+                       query: str,
+                       k: int = 5,
+                       min_score: Optional[float] = None,
+                       source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Entrées passées les plus proches de la requête (similarité cosinus)
+        
+        Args:
+            min_score: Similarité minimale (défaut: seuil propre à l'embedder)
+        """
+        if not self.recall:
+            return []
+        try:
+            return self.recall.search(query, k=k, min_score=min_score, source=source)
+        except Exception as e:
+            logger.error(f"Erreur rappel sémantique: {e}")
+            return []
+    
     def create_session(self) -> str:
         """Crée une nouvelle session"""
         session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.write() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO sessions (session_id, start_time)
                     VALUES (?, ?)
-                ''', (session_id, datetime.now().isoformat()))
-                conn.commit()
+                ''', (session_id, int(time.time())))
                 
             logger.info(f"Session créée: {session_id}")
             return session_id
@@ -155,31 +190,54 @@ class AgentMemory:
     
     def get_recent_interactions(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Récupère les interactions récentes"""
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db.read() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
                     SELECT * FROM interactions 
-                    ORDER BY timestamp DESC 
+                    ORDER BY timestamp DESC, id DESC 
                     LIMIT ?
                 ''', (limit,))
                 
                 rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return [self._row_to_dict(row) for row in rows]
                 
         except Exception as e:
             logger.error(f"Erreur récupération interactions: {e}")
             return []
     
-    def save_metrics_snapshot(self, metrics: Dict[str, Any]):
-        """Sauvegarde un snapshot des métriques"""
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        """Convertit une ligne en dict (horodatage epoch rendu en ISO)"""
+        data = dict(row)
+        if data.get('timestamp') is not None:
+            data['timestamp'] = datetime.fromtimestamp(data['timestamp']).isoformat()
+        return data
+    
+    def save_metrics_snapshot(self, metrics: Optional[Dict[str, Any]] = None):
+        """
+        Sauvegarde un snapshot des métriques
+        
+        Args:
+            metrics: Métriques déjà collectées; par défaut, lues depuis le
+                tampon du collecteur de tools.system_tools
+        """
+        if metrics is None and get_metrics_collector is None:
+            logger.warning("Collecteur de métriques non disponible")
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                timestamp = datetime.now().isoformat()
+            timestamp = int(time.time())
+            if metrics is None:
+                # Dernier échantillon du collecteur : aucune interrogation du noyau ici
+                collector = get_metrics_collector()
+                sample = collector.latest()
+                cpu_percent = sample.get('cpu_percent')
+                memory_percent = sample.get('memory_percent')
+                disk_info = [f"{collector.disk_path}:{sample.get('disk_percent')}%"]
+            else:
                 cpu_percent = metrics.get('cpu', {}).get('percent')
                 memory_percent = metrics.get('memory', {}).get('virtual', {}).get('percent')
                 
@@ -188,63 +246,75 @@ class AgentMemory:
                 disk_info = []
                 for part in disk_partitions:
                     disk_info.append(f"{part.get('mountpoint')}:{part.get('percent')}%")
-                
-                cursor.execute('''
-                    INSERT INTO metrics_history 
-                    (timestamp, cpu_percent, memory_percent, disk_usage)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    timestamp,
-                    cpu_percent,
-                    memory_percent,
-                    json.dumps(disk_info) if disk_info else None
-                ))
-                
-                conn.commit()
-                logger.debug("Snapshot métriques sauvegardé")
+            
+            self._write('''
+                INSERT INTO metrics_history 
+                (timestamp, cpu_percent, memory_percent, disk_usage)
+                VALUES (?, ?, ?, ?)
+            ''', (
+                timestamp,
+                cpu_percent,
+                memory_percent,
+                json.dumps(disk_info) if disk_info else None
+            ))
+            
+            logger.debug("Snapshot métriques sauvegardé")
                 
         except Exception as e:
             logger.error(f"Erreur sauvegarde métriques: {e}")
     
     def get_stats(self, hours: int = 24) -> Dict[str, Any]:
         """Récupère les statistiques"""
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.cursor()
                 
                 # Calculer la date de début
-                from datetime import datetime, timedelta
-                start_time = (datetime.now() - timedelta(hours=hours)).isoformat()
+                start_time = int(time.time() - timedelta(hours=hours).total_seconds())
+                first_bucket = start_time - start_time % 3600
+                if first_bucket < start_time:
+                    first_bucket += 3600
                 
-                # Statistiques d'interactions
+                # Agrégats horaires/journaliers tenus à jour à l'insertion; seule
+                # l'heure incomplète en début de fenêtre est lue depuis les lignes brutes
+                # (au-delà de la rétention des lignes brutes, elle n'est plus comptée)
                 cursor.execute('''
-                    SELECT 
-                        COUNT(*) as total,
-                        SUM(CASE WHEN ai_used = 1 THEN 1 ELSE 0 END) as ai_count,
-                        AVG(processing_time) as avg_time
-                    FROM interactions 
-                    WHERE timestamp >= ?
-                ''', (start_time,))
+                    SELECT intent, SUM(count), SUM(ai_count), SUM(total_time)
+                    FROM (
+                        SELECT COALESCE(intent, '') AS intent, COUNT(*) AS count,
+                               SUM(ai_used) AS ai_count,
+                               COALESCE(SUM(processing_time), 0) AS total_time
+                        FROM interactions
+                        WHERE timestamp >= ? AND timestamp < ?
+                        GROUP BY 1
+                        UNION ALL
+                        SELECT intent, count, ai_count, total_time
+                        FROM interactions_hourly WHERE bucket >= ?
+                        UNION ALL
+                        SELECT intent, count, ai_count, total_time
+                        FROM interactions_daily WHERE bucket >= ?
+                    )
+                    GROUP BY intent
+                ''', (start_time, first_bucket, first_bucket, start_time))
                 
-                stats = cursor.fetchone()
+                by_intent = cursor.fetchall()
+                total = sum(row[1] for row in by_intent)
+                ai_count = sum(row[2] or 0 for row in by_intent)
+                total_time = sum(row[3] or 0 for row in by_intent)
                 
                 # Intentions les plus fréquentes
-                cursor.execute('''
-                    SELECT intent, COUNT(*) as count
-                    FROM interactions
-                    WHERE timestamp >= ? AND intent IS NOT NULL
-                    GROUP BY intent
-                    ORDER BY count DESC
-                    LIMIT 5
-                ''', (start_time,))
-                
-                top_intents = cursor.fetchall()
+                top_intents = sorted(
+                    (row for row in by_intent if row[0]),
+                    key=lambda row: row[1],
+                    reverse=True
+                )[:5]
                 
                 return {
                     'period_hours': hours,
-                    'total_interactions': stats[0] or 0,
-                    'ai_interactions': stats[1] or 0,
-                    'avg_processing_time': round(stats[2] or 0, 2),
+                    'total_interactions': total,
+                    'ai_interactions': ai_count,
+                    'avg_processing_time': round(total_time / total, 2) if total else 0,
                     'top_intents': [{'intent': i[0], 'count': i[1]} for i in top_intents]
                 }
                 
@@ -254,22 +324,38 @@ class AgentMemory:
     
     def close_session(self, session_id: str):
         """Ferme une session"""
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.write() as conn:
                 cursor = conn.cursor()
+                # total_interactions est tenu à jour par trigger à chaque insertion
                 cursor.execute('''
                     UPDATE sessions 
-                    SET end_time = ?, total_interactions = (
-                        SELECT COUNT(*) FROM interactions WHERE session_id = ?
-                    )
+                    SET end_time = ?
                     WHERE session_id = ?
-                ''', (datetime.now().isoformat(), session_id, session_id))
-                conn.commit()
+                ''', (int(time.time()), session_id))
                 
             logger.info(f"Session fermée: {session_id}")
                 
         except Exception as e:
             logger.error(f"Erreur fermeture session: {e}")
+    
+    def apply_retention(self, policy: Optional[RetentionPolicy] = None) -> Dict[str, int]:
+        """Agrège et purge l'historique ancien, puis libère l'espace disque"""
+        self.flush()
+        try:
+            stats = (policy or RetentionPolicy()).run(self.db)
+            if self.recall and stats.get("embeddings"):
+                # Les vecteurs purgés occuperaient encore des places du top-k
+                self.recall.reload()
+            return stats
+        except Exception as e:
+            logger.error(f"Erreur rétention: {e}")
+            return {}
+    
+    def close(self):
+        """Libère le moteur de stockage (fermé quand plus personne ne l'utilise)"""
+        self.storage.close()
 
 
 def test_memory_storage():
@@ -319,6 +405,8 @@ def test_memory_storage():
         memory.close_session(session_id)
         print(f"OK - Session fermée")
         
+        memory.close()
+        
         print("\nTous les tests mémoire passés!")
         
     except Exception as e:
@@ -0,0 +1,367 @@
+"""
+Stockage d'enregistrements commun à toutes les mémoires
+Interface unique avec backends SQLite (moteur partagé), journal JSON-lines
+et en mémoire
+"""
+
+import atexit
+import json
+import os
+import time
+import threading
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from memory.connection import ConnectionManager
+    from memory.migrations import migrate
+    from memory.write_queue import WriteQueue
+except ImportError:
+    from connection import ConnectionManager
+    from migrations import migrate
+    from write_queue import WriteQueue
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """Interface : collections d'enregistrements JSON en ajout seul"""
+
+    @abstractmethod
+    def append(self, collection: str, record: Dict[str, Any]) -> Optional[int]:
+        """Ajoute un enregistrement (ID, ou None si l'écriture est différée)"""
+
+    def append_many(self, collection: str, records: Iterable[Dict[str, Any]]):
+        """Ajoute plusieurs enregistrements"""
+        for record in records:
+            self.append(collection, record)
+
+    @abstractmethod
+    def iter(self, collection: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Parcourt une collection par lots, du plus ancien au plus récent"""
+
+    @abstractmethod
+    def tail(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Les N derniers enregistrements, du plus ancien au plus récent"""
+
+    @abstractmethod
+    def count(self, collection: str) -> int:
+        """Nombre d'enregistrements de la collection"""
+
+    def flush(self):
+        """Attend que les écritures différées soient persistées"""
+
+    def close(self):
+        """Libère les ressources du backend"""
+
+
+class InMemoryBackend(StorageBackend):
+    """Backend volatil (tests, exécution sans disque)"""
+
+    def __init__(self, max_records: Optional[int] = None):
+        """
+        Args:
+            max_records: Taille maximale de chaque collection (None = illimitée)
+        """
+        self.max_records = max_records
+        self.collections = {}
+        self.next_id = 1
+        self._lock = threading.Lock()
+
+    def append(self, collection: str, record: Dict[str, Any]) -> int:
+        with self._lock:
+            records = self.collections.setdefault(collection, deque(maxlen=self.max_records))
+            record_id = self.next_id
+            self.next_id += 1
+            records.append((record_id, dict(record)))
+            return record_id
+
+    def iter(self, collection: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            records = list(self.collections.get(collection, ()))
+        for _, record in records:
+            yield dict(record)
+
+    def tail(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self.collections.get(collection, ()))
+        return [dict(record) for _, record in records[-limit:]] if limit > 0 else []
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return len(self.collections.get(collection, ()))
+
+
+class JournalBackend(StorageBackend):
+    """
+    Journal JSON-lines en ajout seul : un fichier par collection, écritures
+    bufferisées et rotation par taille (collection.jsonl, .1, .2, ...)
+    """
+
+    def __init__(self,
+                 directory: str,
+                 max_bytes: int = 5 * 1024 * 1024,
+                 backups: int = 3,
+                 buffer_size: int = 64,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            directory: Dossier des journaux
+            max_bytes: Taille déclenchant la rotation d'un journal
+            backups: Nombre d'anciens journaux conservés
+            buffer_size: Lignes accumulées avant écriture
+            flush_interval: Délai maximal (s) avant écriture du tampon, tenu
+                par un thread même quand plus rien n'est ajouté
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffers = {}
+        self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.flush)
+
+        self._flusher = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop,
+                                             name="journal-flush", daemon=True)
+            self._flusher.start()
+
+    def _path(self, collection: str, index: int = 0) -> str:
+        path = os.path.join(self.directory, f"{collection}.jsonl")
+        return f"{path}.{index}" if index else path
+
+    def append(self, collection: str, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            buffer = self.buffers.setdefault(collection, [])
+            buffer.append(line)
+            if (len(buffer) >= self.buffer_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_loop(self):
+        """Écrit le tampon d'un journal devenu silencieux"""
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                if (any(self.buffers.values())
+                        and time.monotonic() - self.last_flush >= self.flush_interval):
+                    try:
+                        self._flush_locked()
+                    except OSError as e:
+                        logger.error(f"Écriture du journal impossible: {e}")
+
+    def _flush_locked(self):
+        for collection, lines in self.buffers.items():
+            if not lines:
+                continue
+            path = self._path(collection)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            lines.clear()
+            if size >= self.max_bytes:
+                self._rotate(collection)
+        self.last_flush = time.monotonic()
+
+    def _rotate(self, collection: str):
+        """collection.jsonl -> .1 -> .2 ... (le plus ancien est supprimé)"""
+        if not self.backups:
+            os.remove(self._path(collection))
+            return
+        for index in range(self.backups, 0, -1):
+            source = self._path(collection, index - 1)
+            if os.path.exists(source):
+                os.replace(source, self._path(collection, index))
+
+    def _files(self, collection: str) -> List[str]:
+        """Journaux existants, du plus ancien au plus récent"""
+        paths = [self._path(collection, i) for i in range(self.backups, -1, -1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    @staticmethod
+    def _decode(lines) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Ligne tronquée (arrêt pendant une écriture)
+                continue
+
+    def iter(self, collection: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        self.flush()
+        for path in self._files(collection):
+            with open(path, "r", encoding="utf-8") as f:
+                yield from self._decode(f)
+
+    @staticmethod
+    def _tail_lines(path: str, limit: int, block_size: int = 8192) -> List[bytes]:
+        """Dernières lignes d'un fichier, lu par blocs depuis la fin"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= limit:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+
+        lines = data.splitlines()
+        if position > 0:
+            lines = lines[1:]  # première ligne possiblement incomplète
+        return lines[-limit:]
+
+    def tail(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        if limit <= 0:
+            return []
+        self.flush()
+        records = []
+        for path in reversed(self._files(collection)):
+            needed = limit - len(records)
+            wanted = needed
+            while True:
+                lines = self._tail_lines(path, wanted)
+                decoded = list(self._decode(lines))
+                # Relit un peu plus loin si des lignes tronquées ont été ignorées
+                if len(decoded) >= needed or len(lines) < wanted:
+                    break
+                wanted += needed - len(decoded)
+            records = decoded[-needed:] + records
+            if len(records) >= limit:
+                break
+        return records
+
+    def count(self, collection: str) -> int:
+        self.flush()
+        total = 0
+        for path in self._files(collection):
+            with open(path, "rb") as f:
+                total += sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+        return total
+
+    def close(self):
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+        self.flush()
+        atexit.unregister(self.flush)
+
+
+class SQLiteBackend(StorageBackend):
+    """Backend SQLite : connexions WAL partagées, migrations et file d'écriture"""
+
+    def __init__(self, db_path: str, pool_size: int = 4, async_writes: bool = True):
+        """
+        Args:
+            db_path: Chemin du fichier SQLite (ou ":memory:")
+            pool_size: Nombre de connexions de lecture
+            async_writes: Active la file d'écriture asynchrone
+        """
+        self.db_path = db_path
+        self.db = ConnectionManager(db_path, pool_size=pool_size)
+        with self.db.write() as conn:
+            self.schema_version = migrate(conn)
+        self.writes = WriteQueue(self.db) if async_writes else None
+        self._refs = 1
+
+    def execute(self, sql: str, params: tuple = ()) -> Optional[int]:
+        """Écrit via la file asynchrone si active, sinon directement"""
+        if self.writes:
+            self.writes.put(sql, params)
+            return None
+
+        with self.db.write() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    def append(self, collection: str, record: Dict[str, Any]) -> Optional[int]:
+        return self.execute('''
+            INSERT INTO records (collection, timestamp, data) VALUES (?, ?, ?)
+        ''', (collection, int(time.time()), json.dumps(record, ensure_ascii=False)))
+
+    def iter(self, collection: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        # Pagination par clé : aucune connexion n'est retenue entre deux lots
+        self.flush()
+        last_id = 0
+        while True:
+            with self.db.read() as conn:
+                rows = conn.execute('''
+                    SELECT id, data FROM records
+                    WHERE collection = ? AND id > ?
+                    ORDER BY id LIMIT ?
+                ''', (collection, last_id, batch_size)).fetchall()
+
+            for row in rows:
+                yield json.loads(row[1])
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def tail(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        self.flush()
+        with self.db.read() as conn:
+            rows = conn.execute('''
+                SELECT data FROM records WHERE collection = ?
+                ORDER BY id DESC LIMIT ?
+            ''', (collection, limit)).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def count(self, collection: str) -> int:
+        self.flush()
+        with self.db.read() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM records WHERE collection = ?", (collection,)
+            ).fetchone()[0]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if self.writes:
+            return self.writes.flush(timeout)
+        return True
+
+    def close(self):
+        """Ferme le moteur quand plus aucun utilisateur ne le référence"""
+        with _shared_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            key = os.path.abspath(self.db_path)
+            if _shared.get(key) is self:
+                del _shared[key]
+
+        if self.writes:
+            self.writes.close()
+        self.db.close()
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def open_backend(db_path: str, **kwargs) -> SQLiteBackend:
+    """
+    Moteur SQLite partagé par chemin : toutes les mémoires d'un même fichier
+    utilisent le même écrivain et la même file d'écriture
+    """
+    if db_path == ":memory:":
+        return SQLiteBackend(db_path, **kwargs)
+
+    key = os.path.abspath(db_path)
+    with _shared_lock:
+        backend = _shared.get(key)
+        if backend is not None:
+            backend._refs += 1
+            return backend
+
+        backend = SQLiteBackend(db_path, **kwargs)
+        _shared[key] = backend
+        return backend
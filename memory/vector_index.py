@@ -0,0 +1,252 @@
+"""
+Rappel sémantique des interactions et explications passées
+Embeddings locaux (Ollama ou hachage) + index vectoriel NumPy persisté en SQLite
+"""
+
+import re
+import time
+import queue
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """Embedding local sans modèle : hachage signé des mots et bigrammes"""
+
+    # Similarité à partir de laquelle deux textes sont jugés équivalents : les mots
+    # sont hachés sans sens, une phrase qui ne diffère que par le verbe
+    # ("redémarre" / "arrête le conteneur web") atteint déjà ~0.7
+    min_score = 0.85
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = re.findall(r"\w+", text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if value & (1 << 63) else -1.0
+
+        return vector
+
+
+class OllamaEmbedder:
+    """Embeddings via un modèle Ollama local (ex: nomic-embed-text)"""
+
+    min_score = 0.9
+
+    def __init__(self, model_name: str = "nomic-embed-text"):
+        import ollama
+        self._client = ollama
+        self.model_name = model_name
+        self.name = f"ollama-{model_name}"
+
+    def embed(self, text: str) -> np.ndarray:
+        response = self._client.embeddings(model=self.model_name, prompt=text)
+        return np.asarray(response["embedding"], dtype=np.float32)
+
+
+def default_embedder():
+    """Ollama si le modèle d'embedding répond, sinon le hachage local"""
+    try:
+        embedder = OllamaEmbedder()
+        embedder.embed("test")
+        return embedder
+    except Exception as e:
+        logger.info(f"Embeddings Ollama indisponibles, hachage local utilisé: {e}")
+        return HashingEmbedder()
+
+
+class VectorIndex:
+    """Index en mémoire de vecteurs normalisés, recherche top-k par produit scalaire"""
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add(self, ids: List[int], vectors: np.ndarray):
+        """Insertion incrémentale (capacité doublée au besoin)"""
+        vectors = self._normalize(np.atleast_2d(vectors).astype(np.float32))
+        count = len(ids)
+
+        with self._lock:
+            needed = self.size + count
+            if needed > len(self.vectors):
+                capacity = max(needed, 2 * len(self.vectors))
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:self.size] = self.vectors[:self.size]
+                grown_ids = np.zeros(capacity, dtype=np.int64)
+                grown_ids[:self.size] = self.ids[:self.size]
+                self.vectors, self.ids = grown, grown_ids
+
+            self.vectors[self.size:needed] = vectors
+            self.ids[self.size:needed] = ids
+            self.size = needed
+
+    def search(self, vector: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+        """Les k plus proches voisins (similarité cosinus)"""
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+
+        with self._lock:
+            if not self.size:
+                return []
+            scores = self.vectors[:self.size] @ query
+            ids = self.ids[:self.size].copy()
+
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(ids[i]), float(scores[i])) for i in best]
+
+
+class SemanticRecall:
+    """Rappel sémantique persistant (table embeddings) avec insertion en arrière-plan"""
+
+    def __init__(self, db, embedder=None, max_pending: int = 10000):
+        """
+        Args:
+            db: ConnectionManager de la mémoire
+            embedder: Calcul des embeddings (défaut: Ollama puis hachage)
+            max_pending: Taille maximale de la file d'insertion
+        """
+        self.db = db
+        self.embedder = embedder or default_embedder()
+        self.index = None
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._lock = threading.Lock()  # insertion SQLite + index, ou rechargement
+        self._load()
+
+        self.thread = threading.Thread(target=self._run, name="semantic-recall", daemon=True)
+        self.thread.start()
+
+    def _load(self):
+        """Recharge les vecteurs du modèle courant depuis SQLite"""
+        with self._lock:
+            with self.db.read() as conn:
+                rows = conn.execute('''
+                    SELECT id, vector FROM embeddings WHERE model = ? ORDER BY id
+                ''', (self.embedder.name,)).fetchall()
+
+            index = None
+            if rows:
+                matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                index = VectorIndex(matrix.shape[1], capacity=len(rows) * 2)
+                index.add([row[0] for row in rows], matrix)
+            self.index = index
+        logger.debug(f"Index sémantique chargé: {len(rows)} vecteurs")
+
+    def reload(self):
+        """Reconstruit l'index après une purge (les vecteurs supprimés en sortent)"""
+        self._load()
+
+    def add(self, source: str, text: str, answer: str = "", ref_id: Optional[int] = None) -> bool:
+        """Met un texte en file d'indexation (ne bloque pas)"""
+        if not text:
+            return False
+        try:
+            self.pending.put_nowait((int(time.time()), source, ref_id, text, answer))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"File d'indexation sémantique pleine ({self.dropped} entrées ignorées)")
+            return False
+
+    def _run(self):
+        """Calcule les embeddings et les persiste par lots"""
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < 64:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._index_batch(batch)
+            except Exception as e:
+                logger.error(f"Erreur d'indexation sémantique: {e}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def _index_batch(self, batch: list):
+        vectors = np.stack([self.embedder.embed(item[3]) for item in batch])
+
+        ids = []
+        with self._lock:
+            with self.db.write() as conn:
+                for (timestamp, source, ref_id, text, answer), vector in zip(batch, vectors):
+                    cursor = conn.execute('''
+                        INSERT INTO embeddings (timestamp, source, ref_id, model, text, answer, vector)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (timestamp, source, ref_id, self.embedder.name, text, answer,
+                          vector.astype(np.float32).tobytes()))
+                    ids.append(cursor.lastrowid)
+
+            if self.index is None:
+                self.index = VectorIndex(vectors.shape[1])
+            self.index.add(ids, vectors)
+
+    def wait(self):
+        """Attend la fin de l'indexation en cours"""
+        self.pending.join()
+
+    def search(self,
+               query: str,
+               k: int = 5,
+               min_score: Optional[float] = None,
+               source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Les entrées passées les plus proches de la requête
+
+        Args:
+            min_score: Similarité minimale (défaut: seuil propre à l'embedder)
+        """
+        if self.index is None or not query:
+            return []
+        if min_score is None:
+            min_score = getattr(self.embedder, "min_score", 0.0)
+
+        # Sur-échantillonne quand on filtre par source
+        hits = self.index.search(self.embedder.embed(query), k * 4 if source else k)
+        hits = [(entry_id, score) for entry_id, score in hits if score >= min_score]
+        if not hits:
+            return []
+
+        scores = dict(hits)
+        placeholders = ",".join("?" * len(hits))
+        with self.db.read() as conn:
+            rows = conn.execute(f'''
+                SELECT id, timestamp, source, ref_id, text, answer
+                FROM embeddings WHERE id IN ({placeholders})
+            ''', list(scores)).fetchall()
+
+        results = [dict(row, score=round(scores[row["id"]], 4)) for row in rows
+                   if source is None or row["source"] == source]
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:k]
@@ -0,0 +1,188 @@
+"""
+File d'écriture asynchrone pour la mémoire SQLite
+Les insertions sont regroupées en une transaction par lot sur un thread unique
+"""
+
+import atexit
+import queue
+import threading
+import time
+import logging
+from itertools import groupby
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _Barrier:
+    """Marqueur de flush : signalé une fois les écritures précédentes validées"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Write-behind : un seul thread écrivain, transactions par lot"""
+
+    def __init__(self,
+                 db,
+                 batch_size: int = 500,
+                 flush_interval: float = 0.5,
+                 max_size: int = 10000,
+                 put_timeout: float = 1.0):
+        """
+        Args:
+            db: ConnectionManager utilisé pour les écritures
+            batch_size: Nombre maximal d'instructions par transaction
+            flush_interval: Délai maximal avant validation d'un lot (secondes)
+            max_size: Capacité de la file (au-delà, les producteurs attendent)
+            put_timeout: Attente maximale d'un producteur quand la file est pleine
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_size)
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, sql: str, params: Sequence[Any] = ()) -> bool:
+        """
+        Met une instruction en file
+
+        Returns:
+            False si la file est restée pleine au-delà de put_timeout
+        """
+        if self._closed:
+            logger.warning("File d'écriture fermée, instruction ignorée")
+            return False
+
+        try:
+            self.queue.put((sql, tuple(params)), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            logger.warning("File d'écriture pleine, instruction abandonnée")
+            return False
+
+        with self._lock:
+            self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend la validation de toutes les écritures déjà en file"""
+        if self._closed or not self.thread.is_alive():
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        barrier = _Barrier()
+        try:
+            # File pleine : même attente bornée que les producteurs
+            put_timeout = self.put_timeout if timeout is None else min(timeout, self.put_timeout)
+            self.queue.put(barrier, timeout=put_timeout)
+        except queue.Full:
+            logger.warning("File d'écriture pleine, flush abandonné")
+            return False
+
+        # Attente par tranches : si close() a arrêté l'écrivain avant qu'il ne
+        # lise la barrière, elle ne sera jamais signalée
+        while not barrier.done.wait(0.1):
+            if not self.thread.is_alive():
+                return barrier.done.is_set()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Vide la file puis arrête le thread écrivain"""
+        if self._closed:
+            return
+        self._closed = True
+
+        self.queue.put(_STOP)
+        self.thread.join(timeout=timeout)
+        if self.thread.is_alive():
+            logger.error("Le thread écrivain ne s'est pas arrêté à temps")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Compteurs de la file"""
+        with self._lock:
+            return dict(self.stats, pending=self.queue.qsize())
+
+    def _run(self):
+        """Boucle du thread écrivain"""
+        while True:
+            item = self.queue.get()
+            batch, markers = [], []
+            stop = self._collect(item, batch, markers)
+
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and not markers and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                stop = self._collect(item, batch, markers)
+
+            # Vide sans attendre ce qui reste avant un arrêt
+            while stop:
+                try:
+                    self._collect(self.queue.get_nowait(), batch, markers)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for barrier in markers:
+                barrier.done.set()
+
+            if stop:
+                return
+
+    def _collect(self, item, batch: list, markers: list) -> bool:
+        """Range un élément de la file; True s'il s'agit de l'arrêt"""
+        if item is _STOP:
+            return True
+        if isinstance(item, _Barrier):
+            markers.append(item)
+        else:
+            batch.append(item)
+        return False
+
+    def _write_batch(self, batch: list):
+        """Écrit un lot dans une seule transaction"""
+        try:
+            with self.db.write() as conn:
+                # Instructions identiques consécutives regroupées en executemany
+                for sql, group in groupby(batch, key=lambda op: op[0]):
+                    conn.executemany(sql, [params for _, params in group])
+            self._count(written=len(batch), batches=1)
+            return
+        except Exception as e:
+            logger.error(f"Erreur d'écriture du lot ({len(batch)} instructions): {e}")
+
+        # Le lot a échoué : on isole les instructions fautives une par une
+        for sql, params in batch:
+            try:
+                with self.db.write() as conn:
+                    conn.execute(sql, params)
+                self._count(written=1)
+            except Exception as e:
+                logger.error(f"Instruction abandonnée: {e}")
+                self._count(failed=1)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
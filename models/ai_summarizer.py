@@ -4,7 +4,7 @@ Résumé intelligent des métriques système via AI
 """
 
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
 
@@ -162,6 +162,20 @@ Format:
         
         result = self.llm.generate(prompt, temperature=0.3)
         return result['response'] if result['success'] else "Analyse impossible"
+    
+    def answer_question(self, question: str) -> Optional[str]:
+        """Répond à une question d'administration système (None si l'IA est indisponible)"""
+        if not self.llm.is_available():
+            return None
+        
+        prompt = f"""Réponds à cette question d'administration système de façon concise et technique :
+
+"{question}"
+"""
+        
+        result = self.llm.generate(prompt, system_prompt="Tu es un expert en systèmes informatiques.",
+                                   temperature=0.3)
+        return result['response'] if result['success'] else None
 
 
 def test_ai_summarizer():
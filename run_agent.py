@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 from agent.agent import LocalOpsAgent
+from memory.sqlite_memory import AgentMemory
 
 def main():
-    agent = LocalOpsAgent()
-    
+    # Historique persistant ; le rappel sémantique réutilise les réponses passées
+    memory = AgentMemory(semantic_recall=True)
+    agent = LocalOpsAgent(memory=memory)
+    try:
+        chat(agent)
+    finally:
+        if agent.session_id:
+            memory.close_session(agent.session_id)
+        memory.close()
+
+def chat(agent):
+    """Boucle interactive"""
     print("=== LocalOpsAI Agent ===")
     print("Commandes: 'metrics', 'exit'")
     print("-" * 30)
@@ -2,55 +2,51 @@
 """
 Script de nettoyage pour Windows
 """
-import os
-import shutil
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime
 from pathlib import Path
 
-def cleanup_windows(days=7):
+# Racine du projet pour les imports (script lancé depuis scripts/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tools.cleanup_walker import CleanupWalker
+
+def cleanup_windows(days=7, dry_run=False, max_delete_mb=None):
     """Nettoyage des fichiers temporaires sur Windows"""
-    print("🧹 Starting Windows Cleanup...")
+    print("🧹 Starting Windows Cleanup..." + (" (dry run)" if dry_run else ""))
     print("=" * 40)
     
     base_dir = Path.cwd()
-    deleted_count = 0
-    deleted_size = 0
     
-    # Patterns de fichiers à supprimer
+    # Patterns de fichiers à supprimer (un seul parcours pour tous)
     patterns = ['.log', '.tmp', '.temp', '.cache', '.swp', '~', '.bak']
     
-    for pattern in patterns:
-        for file_path in base_dir.rglob(f'*{pattern}'):
-            if file_path.is_file():
-                try:
-                    # Vérifier l'âge du fichier
-                    mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    age = datetime.now() - mod_time
-                    
-                    if age.days > days:
-                        file_size = file_path.stat().st_size
-                        file_path.unlink()
-                        deleted_count += 1
-                        deleted_size += file_size
-                        print(f"  Deleted: {file_path.name} ({file_size/1024:.0f}KB)")
-                except Exception as e:
-                    print(f"  Error: {file_path.name} - {e}")
-    
-    # Nettoyer __pycache__
-    for pycache in base_dir.rglob('__pycache__'):
-        try:
-            shutil.rmtree(pycache)
-            print(f"  Removed: {pycache}")
-        except:
-            pass
+    walker = CleanupWalker(
+        suffixes=patterns,
+        max_age_days=days,
+        dry_run=dry_run,
+        max_bytes=max_delete_mb * 1024 * 1024 if max_delete_mb else None
+    )
+    report = walker.run(str(base_dir))
+    
+    for path in report["paths"]:
+        print(f"  {'Would delete' if dry_run else 'Deleted'}: {Path(path).relative_to(base_dir)}")
+    if report["capped"]:
+        print("  Deletion cap reached, some files were kept")
+    
+    deleted_count = report["deleted_files"]
+    deleted_size = report["deleted_bytes"]
     
     # Résumé
     print("\n" + "=" * 40)
     print(f"✅ CLEANUP COMPLETE")
     print(f"Files deleted: {deleted_count}")
+    print(f"Folders removed: {report['deleted_dirs']}")
     print(f"Space freed: {deleted_size/1024/1024:.2f} MB")
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
+    if dry_run:
+        return
+    
     # Sauvegarder le log
     log_file = Path("logs") / "cleanup_windows.csv"
     log_file.parent.mkdir(exist_ok=True)
@@ -59,4 +55,5 @@ def cleanup_windows(days=7):
         f.write(f"{datetime.now().strftime('%Y-%m-%d')},{datetime.now().timestamp():.0f},{deleted_count},{deleted_size}\n")
 
 if __name__ == "__main__":
-    cleanup_windows(7)
\ No newline at end of file
+    # python cleanup_windows.py [--dry-run]
+    cleanup_windows(7, dry_run="--dry-run" in sys.argv)
\ No newline at end of file
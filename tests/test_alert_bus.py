@@ -0,0 +1,101 @@
+"""
+Tests du bus d'alertes (tools/alert_bus.py)
+"""
+
+import os
+import time
+import tempfile
+import threading
+
+import pytest
+
+from tools.alert_bus import Alert, AlertBus, install_default_subscribers
+from tools.alert_sinks import RateLimiter
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition jamais remplie")
+        time.sleep(0.01)
+
+
+def test_publish_reaches_matching_subscribers():
+    bus = AlertBus()
+    everything, critical_files = [], []
+    bus.subscribe(everything.append, name="all")
+    bus.subscribe(critical_files.append, name="critical", levels=("CRITICAL",), sources=("file",))
+
+    bus.publish(Alert("file", "WARNING", "large file"))
+    bus.publish(Alert("host", "CRITICAL", "disk full"))
+    bus.publish(Alert("file", "CRITICAL", "secret found", kind="secret"))
+    _wait_for(lambda: len(everything) == 3 and len(critical_files) == 1)
+    bus.close()
+
+    assert [a.id for a in everything] == [1, 2, 3]
+    assert critical_files[0].message == "secret found"
+    assert [a.message for a in bus.query(level="CRITICAL")] == ["secret found", "disk full"]
+    assert [a.kind for a in bus.query(source="file", limit=1)] == ["secret"]
+
+
+def test_unknown_level_is_rejected():
+    with pytest.raises(ValueError):
+        Alert("file", "DEBUG", "nope")
+
+
+def test_slow_subscriber_drops_without_blocking_others():
+    bus = AlertBus()
+    release = threading.Event()
+    fast = []
+    slow = bus.subscribe(lambda alert: release.wait(5), name="slow", queue_size=2)
+    bus.subscribe(fast.append, name="fast")
+
+    started = time.monotonic()
+    for i in range(10):
+        bus.publish(Alert("host", "INFO", f"tick {i}"))
+    # Le producteur n'attend jamais l'abonné lent
+    assert time.monotonic() - started < 1.0
+    _wait_for(lambda: len(fast) == 10)
+    assert slow.dropped >= 7
+
+    release.set()
+    bus.close()
+    assert slow.get_stats()["delivered"] + slow.dropped == 10
+
+
+def test_rate_limited_subscriber_and_failing_callback():
+    bus = AlertBus()
+    received = []
+    limited = bus.subscribe(received.append, name="limited", rate_limiter=RateLimiter(rate=0.0, burst=3))
+    broken = bus.subscribe(lambda alert: 1 / 0, name="broken")
+
+    for i in range(20):
+        bus.publish(Alert("container", "WARNING", f"cpu {i}"))
+    _wait_for(lambda: broken.errors == 20)
+    bus.close()
+
+    assert len(received) == 3
+    assert bus.get_stats()["published"] == 20
+    assert limited.suppressed == 17
+
+
+def test_default_subscribers_installed_once_and_persist():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "alerts.db")
+        bus = AlertBus()
+        install_default_subscribers(bus, db_path=db_path)
+        install_default_subscribers(bus, db_path=db_path)
+        assert sorted(s.name for s in bus.subscriptions) == ["log", "store"]
+
+        for i in range(50):
+            bus.publish(Alert("file", "WARNING", f"storm {i}"))
+        store = next(s for s in bus.subscriptions if s.name == "store")
+        _wait_for(lambda: store.delivered + store.suppressed == 50)
+
+        # Rafale limitée par l'abonné : quelques lignes, pas une par alerte
+        records = store.callback.query(limit=100)
+        assert 0 < len(records) <= 25
+        assert records[0]["message"] == "storm 0"
+        bus.close()
+        store.callback.close()
@@ -0,0 +1,102 @@
+"""
+Tests du limiteur de débit et du dispatcher d'alertes (tools/alert_sinks.py)
+"""
+
+import threading
+
+from tools.alert_sinks import AlertDispatcher, AlertSink, RateLimiter
+
+
+class _ListSink(AlertSink):
+    name = "list"
+
+    def __init__(self):
+        self.alerts = []
+        self.flushes = 0
+
+    def write(self, alerts):
+        self.alerts.extend(alerts)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class _BlockingSink(_ListSink):
+    """Retient le thread du dispatcher jusqu'à release"""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, alerts):
+        self.entered.set()
+        self.release.wait(5)
+        super().write(alerts)
+
+
+class _FailingSink(AlertSink):
+    name = "failing"
+
+    def write(self, alerts):
+        raise OSError("disk full")
+
+
+def _alert(i):
+    return {"timestamp": "2026-01-01T00:00:00", "message": f"alert {i}"}
+
+
+def test_rate_limiter_burst_then_refill():
+    limiter = RateLimiter(rate=2.0, burst=3)
+    assert [limiter.allow() for _ in range(5)] == [True, True, True, False, False]
+    assert limiter.take_suppressed() == 2
+    assert limiter.take_suppressed() == 0
+
+    # Une seconde plus tard : rate jetons de plus, jamais plus que burst
+    limiter.updated -= 1.0
+    assert [limiter.allow() for _ in range(3)] == [True, True, False]
+    limiter.updated -= 60.0
+    assert sum(limiter.allow() for _ in range(10)) == 3
+
+
+def test_dispatcher_summarizes_suppressed_alerts():
+    sink = _ListSink()
+    dispatcher = AlertDispatcher([sink], RateLimiter(rate=0.0, burst=10), flush_interval=0.05)
+
+    accepted = [dispatcher.publish(_alert(i)) for i in range(50)]
+    dispatcher.stop()
+
+    assert accepted.count(True) == 10
+    assert [a["message"] for a in sink.alerts[:10]] == [f"alert {i}" for i in range(10)]
+    # Une seule ligne pour les 40 alertes refusées
+    notices = [a for a in sink.alerts if a.get("type") == "alerts_suppressed"]
+    assert len(notices) == 1 and notices[0]["count"] == 40
+    assert dispatcher.get_stats()["suppressed"] == 40
+    assert sink.flushes >= 1
+
+
+def test_full_queue_drops_without_blocking():
+    sink = _BlockingSink()
+    dispatcher = AlertDispatcher([sink], queue_size=2, flush_interval=0.05)
+
+    assert dispatcher.publish(_alert(0))
+    assert sink.entered.wait(5)
+    # Le thread est bloqué dans le sink : la file se remplit puis refuse
+    results = [dispatcher.publish(_alert(i)) for i in range(1, 5)]
+    assert results == [True, True, False, False]
+    assert dispatcher.get_stats()["dropped"] == 2
+
+    sink.release.set()
+    dispatcher.stop()
+    assert [a["message"] for a in sink.alerts] == ["alert 0", "alert 1", "alert 2"]
+
+
+def test_failing_sink_does_not_block_others():
+    sink = _ListSink()
+    dispatcher = AlertDispatcher([_FailingSink(), sink], flush_interval=0.05)
+    for i in range(3):
+        dispatcher.publish(_alert(i))
+    dispatcher.close()
+
+    assert len(sink.alerts) == 3
+    assert dispatcher.get_stats()["errors"] >= 1
@@ -0,0 +1,96 @@
+"""
+Tests de l'archivage des sauvegardes en flux (tools/backup_archiver.py)
+"""
+
+import os
+import time
+import zipfile
+import tempfile
+from unittest import mock
+
+import pytest
+
+from tools.backup_archiver import create_archive, iter_files, rotate_backups
+
+
+def _write(root, rel, data):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_archive_contents_and_stats():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {
+            "agent/agent.py": b"print('hello')\n" * 200,
+            "agent/sub/data.json": b'{"a": 1}',
+            "README.md": b"# LocalOpsAI\n",
+        }
+        for rel, data in files.items():
+            _write(tmp, rel, data)
+        _write(tmp, "agent/__pycache__/agent.cpython-311.pyc", b"skip")
+        _write(tmp, "agent/.git/HEAD", b"skip")
+
+        zip_path = os.path.join(tmp, "backups", "b.zip")
+        stats = create_archive(zip_path, ["agent", "README.md", "missing"], base=tmp)
+
+        assert stats["files"] == 3 and stats["errors"] == 0
+        assert stats["bytes_in"] == sum(len(d) for d in files.values())
+        assert stats["bytes_out"] == os.path.getsize(zip_path)
+        assert not os.path.exists(zip_path + ".tmp")
+        with zipfile.ZipFile(zip_path) as zipf:
+            assert zipf.testzip() is None
+            names = sorted(n.replace(os.sep, "/") for n in zipf.namelist())
+            assert names == sorted(files)
+            for rel, data in files.items():
+                assert zipf.read(rel) == data
+
+
+def test_compression_level_and_stored_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "src/text.log", b"same line\n" * 5000)
+        _write(tmp, "src/model.gguf", os.urandom(4096))
+
+        deflated = create_archive(os.path.join(tmp, "d.zip"), ["src"], base=tmp, compression_level=9)
+        stored = create_archive(os.path.join(tmp, "s.zip"), ["src"], base=tmp, compression_level=0)
+        assert deflated["bytes_out"] < stored["bytes_out"]
+
+        with zipfile.ZipFile(os.path.join(tmp, "d.zip")) as zipf:
+            types = {info.filename.replace(os.sep, "/"): info.compress_type for info in zipf.infolist()}
+        assert types["src/text.log"] == zipfile.ZIP_DEFLATED
+        # Format déjà compressé : stocké tel quel
+        assert types["src/model.gguf"] == zipfile.ZIP_STORED
+
+
+def test_failed_archive_leaves_no_partial_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "src/a.txt", b"a")
+        zip_path = os.path.join(tmp, "out.zip")
+
+        with mock.patch("tools.backup_archiver.iter_files", side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                create_archive(zip_path, ["src"], base=tmp)
+        assert not os.path.exists(zip_path)
+        assert not os.path.exists(zip_path + ".tmp")
+
+
+def test_iter_files_is_sorted_and_skips_excluded_dirs():
+    with tempfile.TemporaryDirectory() as tmp:
+        for rel in ("src/b.txt", "src/a/z.txt", "src/a.txt", "src/__pycache__/x.pyc"):
+            _write(tmp, rel, b"x")
+        names = [arcname.replace(os.sep, "/") for _, arcname, _ in iter_files(["src"], base=tmp)]
+        assert names == ["src/a.txt", "src/b.txt", "src/a/z.txt"]
+
+
+def test_rotate_keeps_newest():
+    with tempfile.TemporaryDirectory() as tmp:
+        now = time.time()
+        for i in range(4):
+            path = _write(tmp, f"backup_{i}.zip", b"z")
+            os.utime(path, (now - 100 + i, now - 100 + i))
+
+        removed = rotate_backups(tmp, keep=2)
+        assert sorted(p.name for p in removed) == ["backup_0.zip", "backup_1.zip"]
+        assert sorted(os.listdir(tmp)) == ["backup_2.zip", "backup_3.zip"]
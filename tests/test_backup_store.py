@@ -0,0 +1,119 @@
+"""
+Tests des sauvegardes incrémentales (tools/backup_store.py)
+"""
+
+import os
+import zlib
+import tempfile
+
+from tools.backup_store import BackupStore
+
+
+def _write(root, rel, data):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_backup_restore_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src")
+        files = {
+            "src/a.txt": b"hello",
+            "src/sub/big.bin": os.urandom(10_000),
+            "src/empty": b"",
+        }
+        for rel, data in files.items():
+            _write(tmp, rel, data)
+        _write(tmp, "src/__pycache__/m.pyc", b"skip")
+
+        store = BackupStore(os.path.join(tmp, "store"), chunk_size=4096)
+        stats = store.backup(["src"], base=tmp)
+        assert stats["files"] == 3 and stats["changed"] == 3
+
+        target = os.path.join(tmp, "out")
+        assert store.restore("latest", target) == 3
+        for rel, data in files.items():
+            assert _read(os.path.join(target, *rel.split("/"))) == data
+        assert not os.path.exists(os.path.join(target, "src", "__pycache__"))
+        # mtime restauré à l'identique
+        assert (os.stat(os.path.join(target, "src", "a.txt")).st_mtime_ns
+                == os.stat(os.path.join(src, "a.txt")).st_mtime_ns)
+
+
+def test_incremental_backup_rereads_only_changed_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "src/same.bin", os.urandom(8192))
+        changed = _write(tmp, "src/changed.txt", b"v1")
+        store = BackupStore(os.path.join(tmp, "store"), chunk_size=4096)
+        first = store.backup(["src"], base=tmp)
+
+        _write(tmp, "src/changed.txt", b"version 2")
+        os.utime(changed, ns=(1, 1))
+        second = store.backup(["src"], base=tmp)
+        assert second["changed"] == 1
+        assert second["bytes_read"] == len(b"version 2")
+
+        # L'instantané précédent reste restaurable
+        target = os.path.join(tmp, "old")
+        store.restore(first["snapshot"], target, only="src/changed")
+        assert _read(os.path.join(target, "src", "changed.txt")) == b"v1"
+
+
+def test_same_second_snapshots_do_not_collide_and_latest_is_newest():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "src/f.txt", b"one")
+        store = BackupStore(os.path.join(tmp, "store"))
+        names = []
+        for data in (b"one", b"two", b"three"):
+            _write(tmp, "src/f.txt", data)
+            os.utime(path, ns=(len(data), len(data)))
+            names.append(store.backup(["src"], base=tmp)["snapshot"])
+        # Nom explicite qui trierait en premier
+        _write(tmp, "src/f.txt", b"four")
+        names.append(store.backup(["src"], base=tmp, name="aaa")["snapshot"])
+
+        assert len(set(names)) == 4
+        assert store.list_snapshots() == names
+        target = os.path.join(tmp, "out")
+        store.restore("latest", target)
+        assert _read(os.path.join(target, "src", "f.txt")) == b"four"
+
+
+def test_corrupted_chunk_is_detected():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "src/f.txt", b"payload")
+        store = BackupStore(os.path.join(tmp, "store"))
+        store.backup(["src"], base=tmp)
+
+        digest = store.load_manifest("latest")["files"]["src/f.txt"]["chunks"][0]
+        with open(store._chunk_path(digest), "wb") as f:
+            f.write(zlib.compress(b"tampered"))
+        try:
+            store.restore("latest", os.path.join(tmp, "out"))
+        except ValueError:
+            return
+        raise AssertionError("un bloc altéré doit être refusé")
+
+
+def test_prune_removes_orphan_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "src/f.txt", b"first version")
+        store = BackupStore(os.path.join(tmp, "store"))
+        store.backup(["src"], base=tmp)
+        _write(tmp, "src/f.txt", b"second version")
+        os.utime(path, ns=(2, 2))
+        store.backup(["src"], base=tmp)
+
+        assert store.prune(keep=1) == 1
+        assert len(store.list_snapshots()) == 1
+        target = os.path.join(tmp, "out")
+        store.restore("latest", target)
+        assert _read(os.path.join(target, "src", "f.txt")) == b"second version"
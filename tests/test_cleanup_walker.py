@@ -0,0 +1,76 @@
+"""
+Tests du nettoyage en un parcours (tools/cleanup_walker.py)
+"""
+
+import os
+import time
+import tempfile
+
+from tools.cleanup_walker import CleanupWalker
+
+DAY = 86400
+
+
+def _write(root, rel, size=10, age_days=0):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age_days:
+        stamp = time.time() - age_days * DAY
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+def _tree(root):
+    """Candidats : 3 vieux fichiers, 1 dossier jetable ; le reste doit rester"""
+    return {
+        "old_log": _write(root, "a/old.log", size=300, age_days=10),
+        "old_tmp": _write(root, "b/deep/old.tmp", size=200, age_days=30),
+        "old_cache": _write(root, "old.cache", size=100, age_days=9),
+        "pycache": os.path.dirname(_write(root, "c/__pycache__/m.pyc", size=50)),
+        "recent_log": _write(root, "a/recent.log", age_days=2),
+        "boundary_log": _write(root, "a/boundary.log", age_days=7.5),
+        "source": _write(root, "a/code.py", age_days=100),
+        "git_log": _write(root, ".git/logs/HEAD.log", age_days=100),
+    }
+
+
+def test_dry_run_reports_without_deleting():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _tree(tmp)
+        report = CleanupWalker(dry_run=True, workers=2).run(tmp)
+
+        assert report["dry_run"]
+        assert report["deleted_files"] == 3 and report["deleted_dirs"] == 1
+        assert report["deleted_bytes"] == 300 + 200 + 100 + 50
+        assert set(report["paths"]) == {paths[k] for k in ("old_log", "old_tmp", "old_cache", "pycache")}
+        assert all(os.path.exists(p) for p in paths.values())
+
+
+def test_run_deletes_only_candidates():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _tree(tmp)
+        report = CleanupWalker(workers=1).run(tmp)
+
+        assert report["errors"] == 0 and not report["capped"]
+        for key in ("old_log", "old_tmp", "old_cache", "pycache"):
+            assert not os.path.exists(paths[key]), key
+        # Récents, à moins de max_age_days + 1 jours, hors suffixes et dossiers exclus
+        for key in ("recent_log", "boundary_log", "source", "git_log"):
+            assert os.path.exists(paths[key]), key
+
+
+def test_caps_keep_largest_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _tree(tmp)
+
+        report = CleanupWalker(max_files=2).run(tmp)
+        assert report["capped"]
+        assert report["paths"] == [paths["old_log"], paths["old_tmp"]]
+        assert os.path.exists(paths["old_cache"]) and os.path.exists(paths["pycache"])
+
+        report = CleanupWalker(max_bytes=120, dry_run=True).run(tmp)
+        assert report["capped"]
+        assert report["deleted_bytes"] <= 120
+        assert report["paths"] == [paths["old_cache"]]
@@ -0,0 +1,109 @@
+"""
+Tests de l'analyse de l'occupation disque (tools/disk_analyzer.py)
+"""
+
+import os
+import shutil
+import tempfile
+
+from tools.disk_analyzer import DiskAnalyzer, disk_usage_of
+
+
+def _write(root, rel, size):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+    return path
+
+
+def _used(path):
+    return disk_usage_of(os.stat(path, follow_symlinks=False))
+
+
+def _analyzer(root):
+    # Petit budget : le travail est redistribué entre les threads
+    analyzer = DiskAnalyzer(root, workers=2, budget=1)
+    analyzer.scan()
+    return analyzer
+
+
+def _fresh_total(root):
+    return _analyzer(root).total()
+
+
+def test_scan_sizes_and_top_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [_write(tmp, "logs/app.log", 200_000),
+                 _write(tmp, "logs/old/app.1.log", 50_000),
+                 _write(tmp, "data/db.bin", 400_000),
+                 _write(tmp, "readme.txt", 100)]
+        analyzer = _analyzer(tmp)
+
+        assert analyzer.total() == sum(_used(p) for p in paths)
+        assert analyzer.top_files(1) == [(os.path.join("data", "db.bin"), _used(paths[2]))]
+        directories = dict(analyzer.top_directories(5))
+        assert directories["logs"] == _used(paths[0]) + _used(paths[1])
+        assert directories["data"] == _used(paths[2])
+
+
+def test_hardlinks_counted_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        original = _write(tmp, "a/blob.bin", 300_000)
+        link = os.path.join(tmp, "b", "blob.bin")
+        os.makedirs(os.path.dirname(link))
+        os.link(original, link)
+        analyzer = _analyzer(tmp)
+
+        assert analyzer.total() == _used(original)
+        assert sorted(analyzer.files.values()) == [0, _used(original)]
+
+        # Le lien compté disparaît : sa taille passe à l'autre lien
+        counted = next(p for p, used in analyzer.files.items() if used)
+        os.remove(counted)
+        analyzer.apply_event("deleted", counted)
+        remaining = link if counted == original else original
+        assert analyzer.files == {remaining: _used(remaining)}
+        assert analyzer.total() == _fresh_total(tmp)
+
+
+def test_incremental_updates_match_a_full_scan():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "keep/a.bin", 10_000)
+        grown = _write(tmp, "keep/b.bin", 1_000)
+        moved = _write(tmp, "src/m.bin", 70_000)
+        analyzer = _analyzer(tmp)
+
+        created = _write(tmp, "new/c.bin", 40_000)
+        analyzer.apply_event("created", created)
+        _write(tmp, "keep/b.bin", 90_000)
+        analyzer.apply_event("modified", grown)
+        dest = os.path.join(tmp, "keep", "m.bin")
+        os.rename(moved, dest)
+        analyzer.apply_event("moved", moved, dest)
+        assert analyzer.total() == _fresh_total(tmp)
+
+        # Sous-arbres entiers : arrivée puis suppression
+        _write(tmp, "tree/x/y.bin", 30_000)
+        _write(tmp, "tree/z.bin", 20_000)
+        analyzer.apply_directory_added(os.path.join(tmp, "tree"))
+        assert analyzer.total() == _fresh_total(tmp)
+
+        shutil.rmtree(os.path.join(tmp, "keep"))
+        analyzer.apply_directory_removed(os.path.join(tmp, "keep"))
+        assert analyzer.total() == _fresh_total(tmp)
+        assert not any(path.startswith(os.path.join(tmp, "keep")) for path in analyzer.files)
+
+
+def test_container_directories_are_not_listed():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(tmp, "var/lib/docker/layer.bin", 500_000)
+        _write(tmp, "var/lib/small.txt", 10)
+        _write(tmp, "home/user.txt", 5_000)
+        analyzer = _analyzer(tmp)
+
+        names = [name for name, _ in analyzer.top_directories(3)]
+        # var et var/lib ne font que contenir var/lib/docker
+        assert names[0] == os.path.join("var", "lib", "docker")
+        assert "var" not in names and os.path.join("var", "lib") not in names
+        assert "under " + analyzer.root in analyzer.describe()
@@ -0,0 +1,101 @@
+"""
+Tests de la fusion des événements en rafale (tools/file_monitor.py, FileChangeHandler)
+"""
+
+import os
+
+from tools.file_monitor import FileChangeHandler
+from tools.watch_rules import WatchRules
+
+ROOT = os.path.abspath(os.sep + "srv")
+
+
+class _Monitor:
+    """Moniteur minimal : configuration et règles, sans observateur"""
+
+    def __init__(self, **config):
+        self.config = dict({"debounce_seconds": 60, "debounce_max_seconds": 60}, **config)
+        self.rules = WatchRules(exclude=["*.tmp"])
+        self.rules.set_roots([ROOT])
+
+
+def _path(rel):
+    return os.path.join(ROOT, *rel.split("/"))
+
+
+def _flushed(handler):
+    """Événements confiés aux workers après un vidage forcé"""
+    handler.flush_events(force=True)
+    tasks = []
+    while not handler.tasks.empty():
+        tasks.append(handler.tasks.get_nowait())
+    return tasks
+
+
+def test_burst_on_one_path_becomes_one_event():
+    handler = FileChangeHandler(_Monitor())
+    path = _path("app.log")
+    for _ in range(50):
+        handler.queue_event("modified", path)
+
+    assert _flushed(handler) == [("modified", path, None, 50)]
+    assert handler.coalesced == 49
+
+
+def test_merge_rules():
+    cases = [
+        (["created", "modified"], "created"),
+        (["modified", "deleted"], "deleted"),
+        (["deleted", "created"], "modified"),   # sauvegarde atomique d'éditeur
+        (["deleted", "modified"], "modified"),
+        (["modified", "created"], "modified"),
+    ]
+    for events, expected in cases:
+        handler = FileChangeHandler(_Monitor())
+        path = _path("conf.yml")
+        for event in events:
+            handler.queue_event(event, path)
+        assert _flushed(handler) == [(expected, path, None, len(events))], events
+
+
+def test_created_then_deleted_cancels_out():
+    handler = FileChangeHandler(_Monitor())
+    path = _path("scratch.txt")
+    handler.queue_event("created", path)
+    handler.queue_event("modified", path)
+    handler.queue_event("deleted", path)
+
+    assert _flushed(handler) == []
+    assert not handler.last_events
+
+
+def test_temporary_file_renamed_into_place_is_created():
+    handler = FileChangeHandler(_Monitor())
+    tmp, final = _path("conf.yml.tmp"), _path("conf.yml")
+    handler.queue_event("created", tmp)
+    handler.queue_event("moved", tmp, final)
+
+    assert _flushed(handler) == [("created", final, None, 1)]
+
+
+def test_move_keeps_origin_and_then_delete_removes_original():
+    handler = FileChangeHandler(_Monitor())
+    src, mid, dest = _path("a.txt"), _path("b.txt"), _path("c.txt")
+    handler.queue_event("modified", src)
+    handler.queue_event("moved", src, mid)
+    handler.queue_event("moved", mid, dest)
+    assert _flushed(handler) == [("moved", src, dest, 3)]
+
+    handler.queue_event("moved", src, dest)
+    handler.queue_event("deleted", dest)
+    assert _flushed(handler) == [("deleted", src, None, 2)]
+
+
+def test_pending_table_overflow_drops_new_paths():
+    handler = FileChangeHandler(_Monitor(max_pending_events=2))
+    for name in ("a", "b", "c"):
+        handler.queue_event("modified", _path(name))
+    handler.queue_event("modified", _path("a"))
+
+    assert handler.overflow == 1
+    assert sorted(task[1] for task in _flushed(handler)) == [_path("a"), _path("b")]
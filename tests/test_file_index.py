@@ -0,0 +1,114 @@
+"""
+Tests des instantanés d'arborescence et de l'index des fichiers
+(tools/dir_snapshot.py, tools/file_index.py)
+"""
+
+import os
+import tempfile
+
+from tools.dir_snapshot import Snapshot, diff, scan_tree
+from tools.file_index import FileIndex
+
+
+def _write(root, rel, data=b"x"):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_diff_created_modified_deleted():
+    old = Snapshot.from_entries({"a": (1, 10), "b": (2, 20), "c": (3, 30)})
+    new = Snapshot.from_entries({"b": (2, 21), "c": (3, 30), "d": (4, 40)})
+
+    changes = diff(old, new)
+    assert changes.created == ["d"]
+    assert changes.modified == ["b"]
+    assert changes.deleted == ["a"]
+    assert not diff(new, new)
+
+
+def test_snapshot_save_load_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        for rel in ("a.txt", "sub/b.txt", "sub/deep/c.txt", "ignored/d.txt"):
+            _write(tmp, rel, rel.encode())
+        snapshot = scan_tree([tmp], ignore=lambda path, is_dir=False: path.endswith("ignored"),
+                             workers=2, budget=1)
+        assert len(snapshot) == 3
+
+        path = os.path.join(tmp, "index.snap")
+        Snapshot(snapshot.paths, snapshot.sizes, snapshot.mtimes, {"roots": [tmp]}).save(path)
+        loaded = Snapshot.load(path)
+        assert loaded.meta == {"roots": [tmp]}
+        assert loaded.to_entries() == snapshot.to_entries()
+
+
+def test_index_scan_reports_missed_changes_and_larger_than():
+    with tempfile.TemporaryDirectory() as tmp:
+        small = _write(tmp, "small.txt", b"1" * 10)
+        big = _write(tmp, "big.bin", b"1" * 5000)
+        index = FileIndex()
+        index.scan([tmp])
+        assert index.larger_than(100) == [(big, 5000)]
+
+        # Changements pendant l'arrêt du moniteur
+        os.remove(small)
+        new = _write(tmp, "new.txt", b"22")
+        _write(tmp, "big.bin", b"1" * 6000)
+
+        changes = index.scan([tmp])
+        assert changes.created == [new]
+        assert changes.deleted == [small]
+        assert changes.modified == [big]
+        assert index.larger_than(100) == [(big, 6000)]
+
+
+def test_index_events_keep_size_order():
+    index = FileIndex()
+    index.set("/r/a", 300, 1)
+    index.set("/r/b", 100, 1)
+    index.set("/r/c", 200, 1)
+    index.set("/r/b", 400, 2)
+    index.move("/r/c", "/r/d")
+    index.remove("/r/a")
+
+    assert index.larger_than(0) == [("/r/b", 400), ("/r/d", 200)]
+    index.move_tree("/r", "/s")
+    index.remove_tree("/s")
+    assert len(index) == 0
+
+
+def test_index_persisted_and_reloaded():
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, "data")
+        _write(data, "f.txt", b"abc")
+        index_path = os.path.join(tmp, "index.snap")
+
+        index = FileIndex(index_path)
+        index.scan([data])
+        index.save()
+
+        reloaded = FileIndex(index_path)
+        assert reloaded.load()
+        assert reloaded.get(os.path.join(data, "f.txt"))[0] == 3
+        assert not reloaded.needs_rescan([data], max_age=3600)
+        assert reloaded.needs_rescan([tmp], max_age=3600)
+
+
+def test_changed_roots_are_not_reported_as_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        first = os.path.join(tmp, "first")
+        second = os.path.join(tmp, "second")
+        _write(first, "a.txt")
+        _write(second, "b.txt")
+
+        index = FileIndex()
+        index.scan([first])
+        # Racine ajoutée : ses fichiers ne sont pas "créés"
+        assert not index.scan([first, second])
+        # Racine retirée : ses fichiers ne sont pas "supprimés"
+        assert not index.scan([second])
+
+        _write(second, "c.txt")
+        assert index.scan([second]).created == [os.path.join(second, "c.txt")]
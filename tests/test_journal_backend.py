@@ -0,0 +1,71 @@
+"""
+Tests du journal JSON-lines (memory/storage.py, JournalBackend)
+"""
+
+import os
+import time
+import tempfile
+
+from memory.storage import JournalBackend
+
+
+def test_tail_returns_last_records_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalBackend(tmp, buffer_size=7)
+        for i in range(100):
+            journal.append("events", {"n": i})
+
+        assert [r["n"] for r in journal.tail("events", 5)] == [95, 96, 97, 98, 99]
+        assert journal.tail("events", 0) == []
+        assert len(journal.tail("events", 1000)) == 100
+        assert journal.count("events") == 100
+        journal.close()
+
+
+def test_tail_skips_truncated_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalBackend(tmp)
+        for i in range(10):
+            journal.append("events", {"n": i})
+        journal.flush()
+        # Arrêt pendant une écriture : dernière ligne incomplète
+        with open(os.path.join(tmp, "events.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"n": 10')
+
+        assert [r["n"] for r in journal.tail("events", 3)] == [7, 8, 9]
+        journal.close()
+
+
+def test_rotation_keeps_backups_and_reads_across_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalBackend(tmp, max_bytes=200, backups=2, buffer_size=1)
+        for i in range(60):
+            journal.append("events", {"n": i, "pad": "x" * 20})
+
+        files = sorted(os.listdir(tmp))
+        # Au plus le journal courant et `backups` anciens journaux
+        assert {"events.jsonl.1", "events.jsonl.2"} <= set(files)
+        assert set(files) <= {"events.jsonl", "events.jsonl.1", "events.jsonl.2"}
+        for name in files:
+            assert os.path.getsize(os.path.join(tmp, name)) < 200 + 64
+
+        # Les plus anciens sont perdus, l'ordre est conservé entre fichiers
+        numbers = [r["n"] for r in journal.iter("events")]
+        assert numbers == sorted(numbers) and numbers[-1] == 59
+        tail = [r["n"] for r in journal.tail("events", 6)]
+        assert tail == numbers[-6:]
+        journal.close()
+
+
+def test_quiet_journal_is_flushed_by_timer():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalBackend(tmp, buffer_size=1000, flush_interval=0.1)
+        journal.append("events", {"n": 1})
+
+        path = os.path.join(tmp, "events.jsonl")
+        deadline = time.monotonic() + 2
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert os.path.exists(path)
+        journal.close()
+        assert not journal._flusher.is_alive()
@@ -0,0 +1,87 @@
+"""
+Tests des statistiques lues depuis les agrégats (memory/sqlite_memory.py, get_stats)
+"""
+
+import time
+
+from memory.retention import DAY, HOUR
+from memory.sqlite_memory import AgentMemory
+
+
+def _memory():
+    return AgentMemory(":memory:", async_writes=False)
+
+
+def _insert_raw(memory, timestamp, intent="help", ai_used=0, processing_time=1.0):
+    with memory.db.write() as conn:
+        conn.execute("INSERT INTO interactions (timestamp, user_input, intent, ai_used, "
+                     "processing_time) VALUES (?, 'q', ?, ?, ?)",
+                     (timestamp, intent, ai_used, processing_time))
+
+
+def test_recent_interactions_counted_once():
+    memory = _memory()
+    for _ in range(3):
+        memory.save_interaction("q", {"intent": "help", "confidence": 1.0},
+                                {"summary": "s", "tool": "help"}, ai_used=True, processing_time=0.5)
+    memory.save_interaction("q", {"intent": "metrics", "confidence": 1.0},
+                            {"summary": "s", "tool": "system_metrics"}, processing_time=1.5)
+
+    # Lignes brutes et agrégat horaire (trigger) ne sont pas additionnés
+    stats = memory.get_stats(hours=24)
+    assert stats["total_interactions"] == 4
+    assert stats["ai_interactions"] == 3
+    assert stats["avg_processing_time"] == 0.75
+    assert stats["top_intents"] == [{"intent": "help", "count": 3}, {"intent": "metrics", "count": 1}]
+    memory.close()
+
+
+def test_hourly_buckets_survive_raw_purge():
+    memory = _memory()
+    now = int(time.time())
+    recent = now - 5 * HOUR
+    _insert_raw(memory, recent)
+    _insert_raw(memory, recent + 1)
+    with memory.db.write() as conn:
+        # Lignes brutes déjà purgées : seul l'agrégat horaire reste
+        conn.execute("DELETE FROM interactions")
+        conn.execute("INSERT INTO interactions_hourly (bucket, intent, count, ai_count, total_time) "
+                     "VALUES (?, 'help', 5, 0, 5.0)", (now - now % HOUR - 48 * HOUR,))
+
+    assert memory.get_stats(hours=24)["total_interactions"] == 2
+    assert memory.get_stats(hours=72)["total_interactions"] == 7
+    memory.close()
+
+
+def test_partial_leading_hour_read_from_raw_rows():
+    memory = _memory()
+    now = int(time.time())
+    start = now - 24 * HOUR
+    first_bucket = start - start % HOUR + HOUR
+    # Une ligne avant la fenêtre et une dans l'heure incomplète du début,
+    # toutes deux dans le même agrégat horaire
+    _insert_raw(memory, first_bucket - HOUR, intent="old")
+    if first_bucket - start > 60:
+        _insert_raw(memory, first_bucket - 30, intent="edge")
+        expected = [{"intent": "edge", "count": 1}]
+    else:
+        expected = []
+
+    assert memory.get_stats(hours=24)["top_intents"] == expected
+    memory.close()
+
+
+def test_daily_buckets_counted_inside_window():
+    memory = _memory()
+    now = int(time.time())
+    today = now - now % DAY
+    with memory.db.write() as conn:
+        for days, count in ((3, 4), (20, 9)):
+            conn.execute("INSERT INTO interactions_daily (bucket, intent, count, ai_count, total_time) "
+                         "VALUES (?, 'docker', ?, 1, ?)", (today - days * DAY, count, float(count)))
+
+    stats = memory.get_stats(hours=10 * 24)
+    assert stats["total_interactions"] == 4
+    assert stats["ai_interactions"] == 1
+    assert memory.get_stats(hours=30 * 24)["total_interactions"] == 13
+    memory.close()
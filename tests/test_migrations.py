@@ -0,0 +1,117 @@
+"""
+Tests des migrations du schéma mémoire (memory/migrations.py)
+"""
+
+import os
+import json
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from memory.migrations import SCHEMA_VERSION, get_version, migrate
+
+
+def _legacy_db(path):
+    """Base telle que l'écrivaient AgentMemory et Memory avant les migrations"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            user_input TEXT NOT NULL,
+            intent TEXT,
+            confidence REAL,
+            response_summary TEXT,
+            ai_used INTEGER DEFAULT 0,
+            processing_time REAL,
+            session_id TEXT
+        );
+        CREATE TABLE sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            total_interactions INTEGER DEFAULT 0
+        );
+        CREATE TABLE metrics_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            cpu_percent REAL,
+            memory_percent REAL,
+            disk_usage TEXT
+        );
+        CREATE TABLE memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prompt TEXT,
+            response TEXT
+        );
+    ''')
+    conn.executemany('''
+        INSERT INTO interactions (timestamp, user_input, intent, ai_used, processing_time, session_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        ("2024-03-01T10:15:00", "metriques", "system_metrics", 1, 0.5, "s1"),
+        ("2024-03-01T10:45:00", "aide", "help", 0, 0.1, "s1"),
+        ("pas une date", "??", None, 0, 0.0, "s1"),
+    ])
+    conn.execute("INSERT INTO sessions (session_id, start_time, total_interactions) "
+                 "VALUES ('s1', '2024-03-01T10:00:00', 0)")
+    conn.execute("INSERT INTO metrics_history (timestamp, cpu_percent, memory_percent) "
+                 "VALUES ('2024-03-01T10:00:00', 12.5, 40.0)")
+    conn.executemany("INSERT INTO memory (prompt, response) VALUES (?, ?)",
+                     [("bonjour", "salut"), ("ça va", "oui")])
+    conn.commit()
+    return conn
+
+
+def test_legacy_db_migrates_to_current_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = _legacy_db(os.path.join(tmp, "legacy.db"))
+        assert get_version(conn) == 0
+
+        assert migrate(conn) == SCHEMA_VERSION == 6
+        assert get_version(conn) == SCHEMA_VERSION
+
+        # v2 : horodatages epoch, valeur illisible ramenée à 0
+        rows = conn.execute("SELECT timestamp FROM interactions ORDER BY id").fetchall()
+        expected = int(datetime.fromisoformat("2024-03-01T10:15:00").timestamp())
+        assert rows[0][0] == expected
+        assert rows[2][0] == 0
+
+        # v2 : compteur de session recalculé, puis tenu par le trigger
+        assert conn.execute("SELECT total_interactions FROM sessions").fetchone()[0] == 3
+        conn.execute("INSERT INTO interactions (timestamp, user_input, session_id) "
+                     "VALUES (?, 'etat', 's1')", (expected,))
+        assert conn.execute("SELECT total_interactions FROM sessions").fetchone()[0] == 4
+
+        # v4 : agrégats horaires repris depuis les lignes existantes
+        bucket = expected - expected % 3600
+        count = conn.execute("SELECT SUM(count) FROM interactions_hourly WHERE bucket = ?",
+                             (bucket,)).fetchone()[0]
+        assert count == 3  # deux lignes migrées + l'insertion ci-dessus
+
+        # v6 : table memory reprise dans records, sans date inventée
+        records = conn.execute("SELECT timestamp, data FROM records "
+                               "WHERE collection = 'memory' ORDER BY id").fetchall()
+        assert [json.loads(r[1])["prompt"] for r in records] == ["bonjour", "ça va"]
+        assert all(r[0] == 0 for r in records)
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'memory'").fetchone() is None
+        conn.close()
+
+
+def test_migrate_is_idempotent():
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn) == SCHEMA_VERSION
+    assert migrate(conn) == SCHEMA_VERSION
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"interactions", "sessions", "metrics_history", "embeddings", "records"} <= tables
+
+
+def test_newer_schema_is_refused():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    try:
+        migrate(conn)
+    except RuntimeError:
+        return
+    raise AssertionError("un schéma plus récent doit être refusé")
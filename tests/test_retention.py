@@ -0,0 +1,159 @@
+"""
+Tests de la politique de rétention (memory/retention.py)
+"""
+
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from memory.connection import ConnectionManager
+from memory.migrations import migrate
+from memory.retention import DAY, HOUR, RetentionPolicy
+
+NOW = 1_700_000_000 - 1_700_000_000 % DAY + 12 * HOUR
+
+
+def _open_db():
+    db = ConnectionManager(":memory:")
+    migrate(db.writer)
+    return db
+
+
+def _scalar(db, sql, params=()):
+    with db.read() as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+
+def _policy():
+    # Petits lots : le découpage en plusieurs transactions est exercé
+    return RetentionPolicy(raw_days=7, metrics_raw_days=2, hourly_days=90,
+                           daily_days=730, batch_size=2, pause=0)
+
+
+def test_purge_keeps_hourly_aggregates():
+    db = _open_db()
+    old = NOW - 10 * DAY
+    with db.write() as conn:
+        for i in range(5):
+            conn.execute("INSERT INTO interactions (timestamp, user_input, intent, ai_used, "
+                         "processing_time) VALUES (?, 'q', 'help', 1, 0.5)", (old + i,))
+        conn.execute("INSERT INTO interactions (timestamp, user_input, intent) "
+                     "VALUES (?, 'q', 'help')", (NOW - HOUR,))
+
+    stats = _policy().run(db, now=NOW)
+
+    assert stats["interactions"] == 5
+    assert _scalar(db, "SELECT COUNT(*) FROM interactions") == 1
+    # Les lignes purgées restent comptées dans l'agrégat horaire (trigger)
+    bucket = old - old % HOUR
+    assert _scalar(db, "SELECT count FROM interactions_hourly WHERE bucket = ?", (bucket,)) == 5
+    assert _scalar(db, "SELECT ai_count FROM interactions_hourly WHERE bucket = ?", (bucket,)) == 5
+
+
+def test_metrics_rollup_to_hourly():
+    db = _open_db()
+    old = NOW - 3 * DAY
+    bucket = old - old % HOUR
+    with db.write() as conn:
+        for i, cpu in enumerate((10.0, 30.0, 20.0)):
+            conn.execute("INSERT INTO metrics_history (timestamp, cpu_percent, memory_percent) "
+                         "VALUES (?, ?, 50.0)", (bucket + i * 60, cpu))
+        conn.execute("INSERT INTO metrics_history (timestamp, cpu_percent, memory_percent) "
+                     "VALUES (?, 5.0, 50.0)", (NOW,))
+
+    stats = _policy().run(db, now=NOW)
+
+    assert stats["metrics_history"] == 3
+    assert _scalar(db, "SELECT COUNT(*) FROM metrics_history") == 1
+    with db.read() as conn:
+        row = conn.execute("SELECT samples, cpu_sum, cpu_max, memory_max FROM metrics_hourly "
+                           "WHERE bucket = ?", (bucket,)).fetchone()
+    assert tuple(row) == (3, 60.0, 30.0, 50.0)
+
+
+def test_hourly_rollup_to_daily_and_daily_purge():
+    db = _open_db()
+    day = (NOW - 100 * DAY) - (NOW - 100 * DAY) % DAY
+    expired = (NOW - 800 * DAY) - (NOW - 800 * DAY) % DAY
+    with db.write() as conn:
+        for hour in range(3):
+            conn.execute("INSERT INTO interactions_hourly (bucket, intent, count, ai_count, total_time) "
+                         "VALUES (?, 'help', 2, 1, 1.0)", (day + hour * HOUR,))
+            conn.execute("INSERT INTO metrics_hourly (bucket, samples, cpu_sum, cpu_max, "
+                         "memory_sum, memory_max) VALUES (?, 10, 100.0, ?, 500.0, 60.0)",
+                         (day + hour * HOUR, 40.0 + hour))
+        conn.execute("INSERT INTO interactions_daily (bucket, intent, count) VALUES (?, 'help', 1)",
+                     (expired,))
+        conn.execute("INSERT INTO metrics_daily (bucket, samples) VALUES (?, 1)", (expired,))
+
+    _policy().run(db, now=NOW)
+
+    assert _scalar(db, "SELECT COUNT(*) FROM interactions_hourly") == 0
+    assert _scalar(db, "SELECT count FROM interactions_daily WHERE bucket = ?", (day,)) == 6
+    with db.read() as conn:
+        row = conn.execute("SELECT samples, cpu_sum, cpu_max FROM metrics_daily WHERE bucket = ?",
+                           (day,)).fetchone()
+    assert tuple(row) == (30, 300.0, 42.0)
+    # Agrégats journaliers au-delà de daily_days supprimés
+    assert _scalar(db, "SELECT COUNT(*) FROM interactions_daily WHERE bucket = ?", (expired,)) == 0
+    assert _scalar(db, "SELECT COUNT(*) FROM metrics_daily WHERE bucket = ?", (expired,)) == 0
+
+
+def test_vacuum_skips_in_memory_database():
+    db = _open_db()
+    policy = _policy()
+    assert policy.vacuum(db) == 0
+    assert policy.vacuum(db) == 0
+
+
+class _UnconvertibleDb:
+    """Base fichier dont le passage en auto_vacuum incrémental reste sans effet"""
+
+    def __init__(self, path):
+        self.db_path = path
+        self.in_memory = False
+        self.conn = sqlite3.connect(path)
+        self.statements = []
+        self.conn.set_trace_callback(self.statements.append)
+
+    @contextmanager
+    def write(self):
+        yield self
+
+    def execute(self, sql, params=()):
+        if sql == "PRAGMA auto_vacuum = INCREMENTAL":
+            sql = "PRAGMA auto_vacuum = NONE"
+        return self.conn.execute(sql, params)
+
+    def commit(self):
+        self.conn.commit()
+
+
+def test_failed_conversion_is_not_retried_by_new_policies():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _UnconvertibleDb(os.path.join(tmp, "legacy.db"))
+        # apply_retention crée une politique par passe
+        for _ in range(3):
+            assert _policy().vacuum(db) == 0
+        assert db.statements.count("VACUUM") == 1
+        db.conn.close()
+
+
+def test_expired_alert_records_purged_other_collections_kept():
+    db = _open_db()
+    with db.write() as conn:
+        for collection in ("alerts", "alert_bus", "memory"):
+            for i in range(5):
+                conn.execute("INSERT INTO records (collection, timestamp, data) VALUES (?, ?, '{}')",
+                             (collection, NOW - 40 * DAY + i))
+            conn.execute("INSERT INTO records (collection, timestamp, data) VALUES (?, ?, '{}')",
+                         (collection, NOW - DAY))
+
+    stats = _policy().run(db, now=NOW)
+
+    assert stats["records.alerts"] == 5
+    assert stats["records.alert_bus"] == 5
+    assert _scalar(db, "SELECT COUNT(*) FROM records WHERE collection = 'alerts'") == 1
+    assert _scalar(db, "SELECT COUNT(*) FROM records WHERE collection = 'alert_bus'") == 1
+    assert _scalar(db, "SELECT COUNT(*) FROM records WHERE collection = 'memory'") == 6
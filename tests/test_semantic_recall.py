@@ -0,0 +1,100 @@
+"""
+Tests du rappel sémantique : réponses de l'agent et explications d'alertes
+(memory/vector_index.py, agent/agent.py, tools/alert_bus.py)
+"""
+
+from agent.agent import LocalOpsAgent
+from memory.retention import DAY, RetentionPolicy
+from memory.sqlite_memory import AgentMemory
+from memory.vector_index import HashingEmbedder
+from tools.alert_bus import Alert, ExplainerSubscriber
+
+
+class _Summarizer:
+    """Summarizer local : compte les inférences demandées"""
+
+    def __init__(self):
+        self.questions = []
+
+    def answer_question(self, question):
+        self.questions.append(question)
+        return "systemctl reload nginx recharge la configuration sans couper les connexions"
+
+
+class _Explainer:
+    def __init__(self):
+        self.calls = 0
+
+    def explain_anomaly(self, anomaly, container_info):
+        self.calls += 1
+        return f"{anomaly['type']} sur {container_info['name']} : augmenter la limite mémoire"
+
+
+def _memory():
+    return AgentMemory(":memory:", async_writes=False, semantic_recall=True,
+                       embedder=HashingEmbedder())
+
+
+def test_similar_question_reuses_previous_answer():
+    memory = _memory()
+    agent = LocalOpsAgent(use_ai=False, memory=memory)
+    summarizer = _Summarizer()
+    agent.use_ai, agent.ai_summarizer = True, summarizer
+
+    first = agent.process("comment redemarrer le service nginx proprement")
+    assert first["response"]["tool"] == "ai_answer"
+    memory.recall.wait()
+
+    second = agent.process("comment redemarrer le service nginx proprement ?")
+    response = second["response"]
+    assert response["tool"] == "memory_recall"
+    assert response["summary"] == first["response"]["summary"]
+    assert response["recalled_from"]["source"] == "interaction"
+    assert len(summarizer.questions) == 1
+    memory.close()
+
+
+def test_non_answers_are_not_recalled():
+    memory = _memory()
+    agent = LocalOpsAgent(use_ai=False, memory=memory)
+
+    assert agent.process("quelle est la meteo demain")["response"]["tool"] == "none"
+    memory.recall.wait()
+    assert agent.process("quelle est la meteo demain")["response"]["tool"] == "none"
+    memory.close()
+
+
+def test_explainer_persists_and_reuses_explanations():
+    memory = _memory()
+    explainer = _Explainer()
+    seen = []
+    subscriber = ExplainerSubscriber(explainer, on_explanation=lambda alert, text: seen.append(text),
+                                     memory=memory)
+
+    def alert(message):
+        return Alert("container", "CRITICAL", message, kind="memory_spike",
+                     data={"anomaly": {"type": "memory_spike"}, "container": "web"})
+
+    subscriber(alert("Container web memory usage at 97%"))
+    memory.recall.wait()
+    subscriber(alert("Container web memory usage at 97%"))
+
+    assert explainer.calls == 1 and subscriber.recalled == 1
+    assert seen[0] == seen[1]
+    assert memory.recall_similar("memory_spike: Container web memory usage at 97%",
+                                 source="alert")
+    memory.close()
+
+
+def test_retention_purges_embeddings_and_reloads_index():
+    memory = _memory()
+    memory.save_explanation("error", "disk full on /var", "nettoyer /var/log")
+    memory.recall.wait()
+    with memory.db.write() as conn:
+        conn.execute("UPDATE embeddings SET timestamp = timestamp - ?", (400 * DAY,))
+
+    stats = memory.apply_retention(RetentionPolicy(embeddings_days=180, pause=0))
+    assert stats["embeddings"] == 1
+    assert memory.recall.index is None
+    assert memory.recall_similar("disk full on /var") == []
+    memory.close()
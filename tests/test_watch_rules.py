@@ -0,0 +1,80 @@
+"""
+Tests des règles include/exclude du FileMonitor (tools/watch_rules.py)
+"""
+
+import os
+import tempfile
+
+from tools.watch_rules import WatchRules
+
+ROOT = os.path.abspath(os.sep + "srv")
+
+
+def _rules(exclude, include=None):
+    rules = WatchRules(include=include, exclude=exclude)
+    rules.set_roots([ROOT])
+    return rules
+
+
+def _path(rel):
+    return os.path.join(ROOT, *rel.split("/"))
+
+
+def test_negation_reincludes_and_last_rule_wins():
+    rules = _rules(["*.log", "!keep.log", "logs/debug/*.log"])
+    assert rules.is_ignored(_path("app.log"))
+    assert not rules.is_ignored(_path("keep.log"))
+    assert not rules.is_ignored(_path("sub/keep.log"))
+    # Règle ancrée placée après la négation : elle l'emporte
+    assert rules.is_ignored(_path("logs/debug/keep.log"))
+    assert not rules.is_ignored(_path("app.txt"))
+
+
+def test_dir_only_rule_ignores_directory_not_file():
+    rules = _rules(["build/"])
+    assert rules.is_ignored(_path("build"), is_dir=True)
+    assert rules.is_ignored(_path("build/out.bin"))
+    assert rules.is_ignored(_path("src/build/out.bin"))
+    # Un fichier nommé "build" n'est pas un dossier
+    assert not rules.is_ignored(_path("build"))
+    assert not rules.is_ignored(_path("src/build"))
+
+
+def test_file_in_ignored_directory_cannot_be_reincluded():
+    rules = _rules(["cache/", "!cache/important.txt"])
+    assert rules.is_ignored(_path("cache/important.txt"))
+
+
+def test_anchored_and_double_star_patterns():
+    rules = _rules(["/tmp", "docs/**/*.pdf"])
+    assert rules.is_ignored(_path("tmp"), is_dir=True)
+    assert not rules.is_ignored(_path("src/tmp"), is_dir=True)
+    assert rules.is_ignored(_path("docs/a.pdf"))
+    assert rules.is_ignored(_path("docs/x/y/a.pdf"))
+    assert not rules.is_ignored(_path("other/a.pdf"))
+
+
+def test_default_excludes_and_include_filter():
+    rules = WatchRules(include=["*.py"])
+    rules.set_roots([ROOT])
+    assert rules.is_ignored(_path(".git"), is_dir=True)
+    assert rules.is_ignored(_path("pkg/__pycache__/m.cpython-311.pyc"))
+    assert not rules.is_ignored(_path("pkg/module.py"))
+    assert rules.is_ignored(_path("pkg/readme.md"))
+
+
+def test_plan_watches_skips_ignored_subtrees():
+    with tempfile.TemporaryDirectory() as tmp:
+        for rel in ("src/pkg", "node_modules/lib", "docs"):
+            os.makedirs(os.path.join(tmp, rel))
+        rules = WatchRules()
+        rules.set_roots([tmp])
+
+        plan = dict(rules.plan_watches(tmp))
+        # Racine non récursive (elle contient un dossier ignoré), le reste récursif
+        assert plan[os.path.abspath(tmp)] is False
+        assert plan[os.path.join(tmp, "src")] is True
+        assert plan[os.path.join(tmp, "docs")] is True
+        assert os.path.join(tmp, "node_modules") not in plan
+
+        assert rules.plan_watches(tmp, max_watches=1) == [(os.path.abspath(tmp), True)]
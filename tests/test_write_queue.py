@@ -0,0 +1,109 @@
+"""
+Tests de la file d'écriture asynchrone (memory/write_queue.py)
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+from memory.connection import ConnectionManager
+from memory.write_queue import WriteQueue
+
+
+def _open_db():
+    db = ConnectionManager(":memory:")
+    with db.write() as conn:
+        conn.execute("CREATE TABLE t (value INTEGER)")
+    return db
+
+
+def _count(db):
+    with db.read() as conn:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+class _SlowDB:
+    """Écritures lentes : la file se remplit pendant que l'écrivain travaille"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    @contextmanager
+    def write(self):
+        time.sleep(self.delay)
+
+        class _Conn:
+            def executemany(self, sql, params):
+                pass
+
+            def execute(self, sql, params):
+                pass
+
+        yield _Conn()
+
+
+def test_flush_waits_for_queued_writes():
+    db = _open_db()
+    writes = WriteQueue(db, flush_interval=5.0)
+    for i in range(250):
+        assert writes.put("INSERT INTO t (value) VALUES (?)", (i,))
+
+    assert writes.flush(timeout=5)
+    assert _count(db) == 250
+    assert writes.get_stats()["written"] == 250
+    writes.close()
+
+
+def test_close_drains_queue_then_rejects():
+    db = _open_db()
+    writes = WriteQueue(db, flush_interval=5.0)
+    for i in range(10):
+        writes.put("INSERT INTO t (value) VALUES (?)", (i,))
+
+    writes.close()
+    assert not writes.thread.is_alive()
+    assert _count(db) == 10
+
+    # Après close : rien n'est accepté, flush ne bloque pas
+    assert not writes.put("INSERT INTO t (value) VALUES (?)", (99,))
+    assert writes.flush() is True
+    assert _count(db) == 10
+
+
+def test_failed_statement_does_not_lose_batch():
+    db = _open_db()
+    writes = WriteQueue(db, flush_interval=5.0)
+    writes.put("INSERT INTO t (value) VALUES (?)", (1,))
+    writes.put("INSERT INTO missing (value) VALUES (?)", (2,))
+    writes.put("INSERT INTO t (value) VALUES (?)", (3,))
+
+    assert writes.flush(timeout=5)
+    stats = writes.get_stats()
+    assert _count(db) == 2
+    assert stats["written"] == 2 and stats["failed"] == 1
+    writes.close()
+
+
+def test_flush_on_full_queue_is_bounded():
+    writes = WriteQueue(_SlowDB(0.5), max_size=2, put_timeout=0.2)
+    for _ in range(3):
+        writes.put("INSERT", ())
+
+    started = time.monotonic()
+    assert writes.flush(timeout=0.3) is False
+    assert time.monotonic() - started < 1.0
+    writes.close()
+
+
+def test_flush_racing_close_returns():
+    for _ in range(50):
+        writes = WriteQueue(_open_db(), flush_interval=0.01)
+        writes.put("INSERT INTO t (value) VALUES (?)", (1,))
+        closer = threading.Thread(target=writes.close)
+        closer.start()
+
+        flusher = threading.Thread(target=writes.flush)
+        flusher.start()
+        flusher.join(5)
+        closer.join(5)
+        assert not flusher.is_alive(), "flush() bloqué après close()"
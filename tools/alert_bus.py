@@ -0,0 +1,306 @@
+"""
+Bus d'alertes en mémoire (publication / abonnement) commun à tous les moniteurs
+Conteneurs, fichiers et hôte publient des alertes typées ; chaque abonné a sa
+file et son thread, un abonné lent ne ralentit ni les autres ni les producteurs
+"""
+import time
+import queue
+import logging
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+
+from memory.storage import open_backend
+from tools.alert_sinks import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("INFO", "WARNING", "CRITICAL")
+
+
+class Alert:
+    """Alerte typée : source (container, file, host), niveau, type et message"""
+
+    __slots__ = ("id", "source", "level", "kind", "message", "data", "timestamp")
+
+    def __init__(self, source, level, message, kind="", data=None, timestamp=None):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown alert level: {level}")
+        self.id = None  # attribué par le bus
+        self.source = source
+        self.level = level
+        self.kind = kind
+        self.message = message
+        self.data = data or {}
+        self.timestamp = timestamp or time.time()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source": self.source,
+            "level": self.level,
+            "kind": self.kind,
+            "message": self.message,
+            "data": self.data,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+    def __repr__(self):
+        return f"Alert({self.source}/{self.kind} {self.level}: {self.message})"
+
+
+class Subscription:
+    """Abonné : callback appelé depuis son propre thread, file bornée"""
+
+    def __init__(self, callback, name, levels=None, sources=None, queue_size=1000,
+                 rate_limiter=None):
+        self.callback = callback
+        self.name = name
+        self.levels = set(levels) if levels else None
+        self.sources = set(sources) if sources else None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.rate_limiter = rate_limiter
+        self.delivered = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name=f"alert-{name}", daemon=True)
+        self._thread.start()
+
+    def accepts(self, alert):
+        return ((self.levels is None or alert.level in self.levels)
+                and (self.sources is None or alert.source in self.sources))
+
+    def offer(self, alert):
+        """Dépôt sans attente : file pleine = alerte perdue pour cet abonné"""
+        if self.rate_limiter and not self.rate_limiter.allow():
+            # Au-delà du débit de l'abonné (disque, logs), l'alerte est seulement comptée
+            self.suppressed += 1
+            if self.suppressed == 1 or self.suppressed % 1000 == 0:
+                logger.warning(f"Alert subscriber {self.name}: {self.suppressed} alerts "
+                               f"suppressed by rate limit")
+            return
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            if alert is None:
+                return
+            try:
+                self.callback(alert)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Alert subscriber {self.name} failed: {e}")
+
+    def stop(self, timeout=5.0):
+        self.queue.put(None)
+        self._thread.join(timeout)
+
+    def get_stats(self):
+        return {
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+            "errors": self.errors,
+            "pending": self.queue.qsize()
+        }
+
+
+class AlertBus:
+    """Point unique de publication et de consultation des alertes"""
+
+    def __init__(self, history_size=1000):
+        self.history = deque(maxlen=history_size)
+        self.subscriptions = []
+        self.published = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, name=None, levels=None, sources=None, queue_size=1000,
+                  rate_limiter=None):
+        """
+        Abonne un callback(alert)
+
+        Args:
+            levels: Niveaux reçus (None = tous)
+            sources: Sources reçues (None = toutes)
+            queue_size: Alertes en attente pour cet abonné avant d'en perdre
+            rate_limiter: Débit maximal de cet abonné (RateLimiter, None = pas de limite)
+        """
+        name = name or getattr(callback, "__name__", type(callback).__name__)
+        subscription = Subscription(callback, name, levels, sources, queue_size, rate_limiter)
+        with self._lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+        subscription.stop()
+
+    def publish(self, alert):
+        """Diffuse une alerte sans jamais bloquer le producteur"""
+        with self._lock:
+            alert.id = next(self._ids)
+            self.published += 1
+            self.history.append(alert)
+            subscriptions = self.subscriptions
+        for subscription in subscriptions:
+            if subscription.accepts(alert):
+                subscription.offer(alert)
+        return alert
+
+    def query(self, source=None, level=None, kind=None, since=None, limit=100):
+        """Alertes récentes, de la plus récente à la plus ancienne"""
+        with self._lock:
+            alerts = list(self.history)
+        result = []
+        for alert in reversed(alerts):
+            if since is not None and alert.timestamp < since:
+                break
+            if ((source is None or alert.source == source)
+                    and (level is None or alert.level == level)
+                    and (kind is None or alert.kind == kind)):
+                result.append(alert)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def close(self):
+        with self._lock:
+            subscriptions, self.subscriptions = self.subscriptions, []
+        for subscription in subscriptions:
+            subscription.stop()
+
+    def get_stats(self):
+        return {
+            "published": self.published,
+            "subscribers": {s.name: s.get_stats() for s in self.subscriptions}
+        }
+
+
+# --- Abonnés fournis ---
+
+def log_alert(alert):
+    """Affichage dans les logs (sans émojis)"""
+    log = logger.warning if alert.level != "INFO" else logger.info
+    log(f"[{alert.source}] {alert.level} {alert.kind}: {alert.message}")
+
+
+class AlertStore:
+    """Persistance dans la collection SQLite "alert_bus" (écritures asynchrones)"""
+
+    COLLECTION = "alert_bus"
+
+    def __init__(self, db_path="memory/agent_memory.db"):
+        self.backend = open_backend(db_path)
+
+    def __call__(self, alert):
+        self.backend.append(self.COLLECTION, alert.to_dict())
+
+    def query(self, source=None, level=None, limit=100):
+        """Alertes persistées les plus récentes"""
+        records = self.backend.tail(self.COLLECTION, limit * 10 if source or level else limit)
+        records = [r for r in records
+                   if (source is None or r.get("source") == source)
+                   and (level is None or r.get("level") == level)]
+        return records[-limit:]
+
+    def close(self):
+        self.backend.close()
+
+
+class ExplainerSubscriber:
+    """
+    Explication des alertes de conteneur par l'AIExplainer (appel LLM lent)
+
+    Avec une AgentMemory à rappel sémantique, les explications sont
+    enregistrées et celle d'une alerte assez proche est réutilisée telle quelle.
+    """
+
+    SOURCE = "alert"
+
+    def __init__(self, explainer, on_explanation=None, memory=None):
+        self.explainer = explainer
+        self.memory = memory
+        self.on_explanation = on_explanation or (lambda alert, text: logger.info(text))
+        self.recalled = 0
+
+    def __call__(self, alert):
+        anomaly = alert.data.get("anomaly")
+        if anomaly is None:
+            return
+        problem = f"{alert.kind}: {alert.message}" if alert.kind else alert.message
+
+        if self.memory is not None:
+            matches = self.memory.recall_similar(problem, k=1, source=self.SOURCE)
+            if matches and matches[0].get("answer"):
+                self.recalled += 1
+                self.on_explanation(alert, matches[0]["answer"])
+                return
+
+        text = self.explainer.explain_anomaly(anomaly, {"name": alert.data.get("container")})
+        if self.memory is not None and text:
+            self.memory.save_explanation(self.SOURCE, problem, text)
+        self.on_explanation(alert, text)
+
+
+def _open_recall_memory(db_path):
+    """AgentMemory avec rappel sémantique pour les explications (None si indisponible)"""
+    try:
+        from memory.sqlite_memory import AgentMemory
+        memory = AgentMemory(db_path, semantic_recall=True)
+    except Exception as e:
+        logger.error(f"Explanation recall unavailable: {e}")
+        return None
+    return memory if memory.recall else None
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_alert_bus():
+    """Bus partagé par tout le processus"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = AlertBus()
+        return _bus
+
+
+def install_default_subscribers(bus=None, db_path="memory/agent_memory.db", explainer=None,
+                                memory=None):
+    """
+    Abonnés standard : logs, persistance SQLite et, si un explainer est
+    fourni, explication des alertes de conteneur. Sans effet pour un abonné
+    déjà en place (appelé au démarrage de chaque moniteur).
+
+    Args:
+        memory: AgentMemory où enregistrer et rappeler les explications
+            (défaut: mémoire à rappel sémantique ouverte sur db_path)
+    """
+    bus = bus or get_alert_bus()
+    with _bus_lock:
+        names = {s.name for s in bus.subscriptions}
+        # Log et persistance écrivent sur disque : débit limité pour tous les producteurs
+        if "log" not in names:
+            bus.subscribe(log_alert, name="log", rate_limiter=RateLimiter(rate=1.0, burst=20))
+        if "store" not in names:
+            try:
+                bus.subscribe(AlertStore(db_path), name="store",
+                              rate_limiter=RateLimiter(rate=1.0, burst=20))
+            except Exception as e:
+                logger.error(f"Alert store unavailable: {e}")
+        if explainer is not None and "explainer" not in names:
+            if memory is None:
+                memory = _open_recall_memory(db_path)
+            bus.subscribe(ExplainerSubscriber(explainer, memory=memory), name="explainer",
+                          levels=("WARNING", "CRITICAL"), sources=("container",))
+    return bus
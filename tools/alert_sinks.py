@@ -0,0 +1,341 @@
+"""
+Destinations des alertes (fichier, SQLite, webhook local) derrière une file
+Les écritures sont regroupées par lots et vidées périodiquement par un thread,
+un limiteur de débit commun empêche une rafale d'alertes de saturer les disques
+"""
+import json
+import time
+import queue
+import logging
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+
+from memory.storage import open_backend
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class RateLimiter:
+    """Seau à jetons : `rate` alertes par seconde, rafales jusqu'à `burst`"""
+
+    def __init__(self, rate=1.0, burst=20):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+    def take_suppressed(self):
+        """Nombre d'alertes refusées depuis le dernier appel"""
+        with self._lock:
+            count, self.suppressed = self.suppressed, 0
+            return count
+
+
+class AlertSink(ABC):
+    """Destination d'alertes : reçoit des lots depuis le thread du dispatcher"""
+
+    name = "sink"
+
+    @abstractmethod
+    def write(self, alerts):
+        """Écrit un lot d'alertes (dicts)"""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class FileSink(AlertSink):
+    """Une ligne par alerte, fichier gardé ouvert avec tampon"""
+
+    name = "file"
+
+    def __init__(self, path="logs/file_alerts.log", buffer_size=64 * 1024):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=self.buffer_size)
+        return self._file
+
+    def write(self, alerts):
+        f = self._open()
+        f.writelines(f"{alert['timestamp']} - {alert['message']}\n" for alert in alerts)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SQLiteSink(AlertSink):
+    """Collection "alerts" de la base SQLite partagée (écritures asynchrones)"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path="memory/agent_memory.db", collection="alerts"):
+        self.backend = open_backend(db_path)
+        self.collection = collection
+
+    def write(self, alerts):
+        self.backend.append_many(self.collection, alerts)
+
+    def flush(self):
+        self.backend.flush()
+
+    def close(self):
+        self.backend.close()
+
+
+class WebhookSink(AlertSink):
+    """
+    POST JSON d'un lot d'alertes vers un service local (notifier, bot...)
+    Les envois passent par la file et le thread du sink : un service lent ne
+    retarde pas les autres destinations
+    """
+
+    name = "webhook"
+
+    def __init__(self, url="http://127.0.0.1:8765/alerts", timeout=2.0, queue_size=100):
+        """
+        Args:
+            queue_size: Lots en attente d'envoi au maximum (au-delà ils sont perdus)
+        """
+        self.url = url
+        self.timeout = timeout
+        self.failures = 0
+        self.dropped = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, alerts):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+                self._thread.start()
+        try:
+            self.queue.put_nowait(list(alerts))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            alerts = self.queue.get()
+            if alerts is _STOP:
+                return
+            self._post(alerts)
+
+    def close(self, timeout=5.0):
+        """Envoie les lots en attente (au plus `timeout` s) puis arrête le thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            thread.join(timeout)
+
+    def _post(self, alerts):
+        body = json.dumps({"alerts": alerts}).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError as e:
+            # Service absent ou lent : le lot est perdu pour ce sink seulement
+            self.failures += 1
+            logger.debug(f"Webhook {self.url} unavailable: {e}")
+
+
+SINK_TYPES = {
+    "file": lambda config: FileSink(config.get("alert_log_file", "logs/file_alerts.log")),
+    "sqlite": lambda config: SQLiteSink(config.get("alert_db_path", "memory/agent_memory.db")),
+    "webhook": lambda config: WebhookSink(config.get("alert_webhook_url",
+                                                     "http://127.0.0.1:8765/alerts")),
+}
+
+
+def build_sinks(config):
+    """Sinks listés dans config["alert_sinks"] (défaut: fichier seul)"""
+    sinks = []
+    for name in config.get("alert_sinks") or ["file"]:
+        factory = SINK_TYPES.get(name)
+        if factory is None:
+            logger.warning(f"Unknown alert sink: {name}")
+            continue
+        try:
+            sinks.append(factory(config))
+        except Exception as e:
+            logger.error(f"Could not create alert sink {name}: {e}")
+    return sinks
+
+
+class AlertDispatcher:
+    """File d'alertes vidée par un thread vers tous les sinks"""
+
+    def __init__(self, sinks, rate_limiter=None, queue_size=1000,
+                 batch_size=100, flush_interval=1.0):
+        """
+        Args:
+            sinks: Destinations (AlertSink)
+            rate_limiter: Limiteur commun (None = pas de limite)
+            queue_size: Alertes en attente au maximum (au-delà elles sont perdues)
+            batch_size: Alertes écrites par lot
+            flush_interval: Délai maximal (s) avant que les tampons soient vidés
+        """
+        self.sinks = sinks
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.published = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.errors = 0
+
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        limiter = RateLimiter(rate=config.get("alert_rate_per_minute", 60) / 60,
+                              burst=config.get("alert_burst", 20))
+        return cls(build_sinks(config), limiter,
+                   flush_interval=config.get("alert_flush_seconds", 1.0))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher",
+                                                daemon=True)
+                self._thread.start()
+
+    def publish(self, alert):
+        """
+        Met une alerte en file sans jamais bloquer
+
+        Returns:
+            False si elle est refusée par le limiteur ou si la file est pleine
+        """
+        if self.rate_limiter and not self.rate_limiter.allow():
+            return False
+        self.start()
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.published += 1
+        return True
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = _STOP in batch
+            batch = [alert for alert in batch if alert is not _STOP]
+            batch.extend(self._suppressed_notice())
+            if batch:
+                self._write(batch)
+
+            if stopping or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+            if stopping:
+                return
+
+    def _suppressed_notice(self):
+        """Résumé des alertes écartées par le limiteur (une ligne au lieu de milliers)"""
+        count = self.rate_limiter.take_suppressed() if self.rate_limiter else 0
+        if not count:
+            return []
+        self.suppressed += count
+        return [{
+            "timestamp": datetime.now().isoformat(),
+            "type": "alerts_suppressed",
+            "message": f"{count} alerts suppressed by rate limit",
+            "count": count
+        }]
+
+    def _write(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Alert sink {sink.name} failed: {e}")
+
+    def _flush(self):
+        for sink in self.sinks:
+            try:
+                sink.flush()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Alert sink {sink.name} flush failed: {e}")
+
+    def stop(self, timeout=5.0):
+        """Écrit et vide les alertes en attente (le thread repart au prochain publish)"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join(timeout)
+
+    def close(self):
+        """Arrêt définitif : ferme aussi les sinks"""
+        self.stop()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"Alert sink {sink.name} close failed: {e}")
+
+    def get_stats(self):
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+            "pending": self.queue.qsize(),
+            "errors": self.errors
+        }
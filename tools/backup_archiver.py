@@ -0,0 +1,125 @@
+"""
+Archivage des sauvegardes en flux : chaque fichier est lu une seule fois et
+écrit directement dans le ZIP (pas de copie temporaire de l'arborescence)
+"""
+import os
+import time
+import zipfile
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Formats déjà compressés : stockés tels quels (recompresser coûte du CPU pour rien)
+STORED_EXTENSIONS = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4",
+    ".gguf", ".safetensors", ".pt", ".pth", ".onnx", ".whl",
+}
+
+# Dossiers jamais sauvegardés
+SKIP_DIRS = {"__pycache__", ".git"}
+
+
+def iter_files(sources, base="."):
+    """
+    Fichiers des sources (dossiers ou fichiers) par os.scandir
+
+    Yields:
+        (chemin, nom dans l'archive, stat)
+    """
+    base = os.path.abspath(base)
+    for source in sources:
+        source = os.path.abspath(os.path.join(base, source))
+        if os.path.isfile(source):
+            yield source, os.path.relpath(source, base), os.stat(source)
+            continue
+        stack = [source] if os.path.isdir(source) else []
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                logger.warning(f"Cannot read {directory}: {e}")
+                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, os.path.relpath(entry.path, base), entry.stat()
+                except OSError:
+                    continue
+            stack.extend(reversed(subdirs))
+
+
+def create_archive(zip_path, sources, base=".", compression_level=6):
+    """
+    Écrit les sources dans un ZIP en une passe
+
+    Args:
+        zip_path: Archive à créer (écrite sous .tmp puis renommée)
+        sources: Dossiers et fichiers, relatifs à base (absents ignorés)
+        compression_level: 0 (stocké) à 9 (maximal), 6 = défaut de zlib
+
+    Returns:
+        Statistiques : fichiers, octets lus et écrits, durée, débit
+    """
+    zip_path = Path(zip_path)
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = zip_path.with_name(zip_path.name + ".tmp")
+    started = time.perf_counter()
+    files = 0
+    bytes_in = 0
+    errors = 0
+
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED,
+                             compresslevel=compression_level,
+                             strict_timestamps=False) as zipf:
+            for path, arcname, st in iter_files(sources, base):
+                stored = (compression_level == 0
+                          or os.path.splitext(path)[1].lower() in STORED_EXTENSIONS)
+                try:
+                    zipf.write(path, arcname,
+                               compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+                    files += 1
+                    bytes_in += st.st_size
+                except OSError as e:
+                    errors += 1
+                    logger.warning(f"Cannot archive {path}: {e}")
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        # Pas d'archive partielle qui serait prise pour une sauvegarde valide
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+    seconds = time.perf_counter() - started
+    bytes_out = zip_path.stat().st_size
+    return {
+        "archive": str(zip_path),
+        "files": files,
+        "errors": errors,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "ratio": round(bytes_out / bytes_in, 3) if bytes_in else 0,
+        "seconds": round(seconds, 2),
+        "mb_per_s": round(bytes_in / (1024 * 1024) / seconds, 1) if seconds else 0
+    }
+
+
+def rotate_backups(backup_dir="backups", keep=5, pattern="*.zip"):
+    """Supprime les sauvegardes au-delà des `keep` plus récentes"""
+    backups = sorted(Path(backup_dir).glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
+    removed = []
+    for old_backup in backups[keep:]:
+        try:
+            old_backup.unlink()
+            removed.append(old_backup)
+        except OSError as e:
+            logger.warning(f"Cannot remove {old_backup}: {e}")
+    return removed
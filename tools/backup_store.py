@@ -0,0 +1,240 @@
+"""
+Sauvegardes incrémentales et dédupliquées
+Chaque instantané est un manifeste (chemin, taille, mtime, empreinte, blocs) ;
+le contenu est découpé en blocs rangés par empreinte, partagés entre instantanés.
+Un fichier dont la taille et le mtime n'ont pas changé n'est pas relu.
+
+Usage: python tools/backup_store.py list
+       python tools/backup_store.py restore <instantané|latest> <dossier>
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import hashlib
+import secrets
+import logging
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from tools.backup_archiver import iter_files
+except ImportError:
+    from backup_archiver import iter_files
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def chunk_digest(data):
+    """Empreinte d'un bloc (BLAKE2b : nom du bloc dans le magasin)"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class BackupStore:
+    """Magasin de blocs adressés par contenu + manifestes d'instantanés"""
+
+    def __init__(self, root="backups/store", compression_level=6, chunk_size=CHUNK_SIZE):
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.snapshots_dir = self.root / "snapshots"
+        self.compression_level = compression_level
+        self.chunk_size = chunk_size
+        self._created = {}  # nom -> (mtime_ns du manifeste, date de création)
+
+    # --- Blocs ---
+
+    def _chunk_path(self, digest):
+        return self.chunks_dir / digest[:2] / digest
+
+    def _put_chunk(self, data):
+        """Range un bloc s'il est nouveau ; rend (empreinte, octets écrits)"""
+        digest = chunk_digest(data)
+        path = self._chunk_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = zlib.compress(data, self.compression_level)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return digest, len(payload)
+
+    def _get_chunk(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if chunk_digest(data) != digest:
+            raise ValueError(f"Corrupted chunk: {digest}")
+        return data
+
+    # --- Instantanés ---
+
+    def list_snapshots(self):
+        """Noms des instantanés, du plus ancien au plus récent (date du manifeste)"""
+        if not self.snapshots_dir.exists():
+            return []
+        snapshots = []
+        for path in self.snapshots_dir.glob("*.json"):
+            snapshots.append((self._created_at(path), path.stem))
+        return [name for _, name in sorted(snapshots)]
+
+    def _created_at(self, path):
+        """Date de création lue dans le manifeste (en cache tant qu'il ne change pas)"""
+        mtime_ns = path.stat().st_mtime_ns
+        cached = self._created.get(path.stem)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            created = json.load(f).get("created", "")
+        self._created[path.stem] = (mtime_ns, created)
+        return created
+
+    def load_manifest(self, name):
+        if name == "latest":
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise FileNotFoundError("No snapshot in backup store")
+            name = snapshots[-1]
+        with open(self.snapshots_dir / f"{name}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def backup(self, sources, base=".", name=None):
+        """
+        Nouvel instantané : seuls les fichiers modifiés depuis le précédent
+        sont relus, seuls les blocs inconnus sont écrits
+
+        Returns:
+            Statistiques (fichiers, relus, octets lus, octets écrits, durée)
+        """
+        started = time.perf_counter()
+        # Suffixe aléatoire : deux instantanés dans la même seconde ne s'écrasent pas
+        name = name or f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+        if (self.snapshots_dir / f"{name}.json").exists():
+            raise FileExistsError(f"Snapshot already exists: {name}")
+        snapshots = self.list_snapshots()
+        previous = self.load_manifest(snapshots[-1])["files"] if snapshots else {}
+
+        files = {}
+        stats = {"files": 0, "changed": 0, "errors": 0,
+                 "bytes_total": 0, "bytes_read": 0, "bytes_written": 0}
+
+        for path, arcname, st in iter_files(sources, base):
+            arcname = arcname.replace(os.sep, "/")
+            stats["files"] += 1
+            stats["bytes_total"] += st.st_size
+
+            old = previous.get(arcname)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                files[arcname] = old
+                continue
+
+            try:
+                files[arcname] = self._store_file(path, st, stats)
+                stats["changed"] += 1
+            except OSError as e:
+                stats["errors"] += 1
+                logger.warning(f"Cannot back up {path}: {e}")
+                if old:
+                    files[arcname] = old
+
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.snapshots_dir / f"{name}.json"
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"name": name, "created": datetime.now().isoformat(),
+                       "sources": list(sources), "files": files}, f)
+        os.replace(tmp_path, manifest_path)
+
+        stats["snapshot"] = name
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        return stats
+
+    def _store_file(self, path, st, stats):
+        """Découpe un fichier en blocs (lecture unique) et range les nouveaux"""
+        file_hash = hashlib.blake2b(digest_size=20)
+        chunks = []
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                digest, written = self._put_chunk(data)
+                chunks.append(digest)
+                stats["bytes_read"] += len(data)
+                stats["bytes_written"] += written
+        return {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "hash": file_hash.hexdigest(),
+            "chunks": chunks
+        }
+
+    def restore(self, name, target_dir, only=None):
+        """
+        Reconstruit un instantané dans target_dir
+
+        Args:
+            only: Préfixe de chemin à restaurer (None = tout)
+        """
+        manifest = self.load_manifest(name)
+        target_dir = Path(target_dir)
+        restored = 0
+        for arcname, entry in manifest["files"].items():
+            if only and not arcname.startswith(only):
+                continue
+            dest = target_dir / arcname
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            file_hash = hashlib.blake2b(digest_size=20)
+            with open(dest, 'wb') as f:
+                for digest in entry["chunks"]:
+                    data = self._get_chunk(digest)
+                    file_hash.update(data)
+                    f.write(data)
+            if file_hash.hexdigest() != entry["hash"]:
+                raise ValueError(f"Restored content differs from backup: {arcname}")
+            os.utime(dest, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            restored += 1
+        return restored
+
+    def prune(self, keep=5):
+        """Garde les `keep` derniers instantanés et supprime les blocs orphelins"""
+        snapshots = self.list_snapshots()
+        for name in snapshots[:-keep] if keep else snapshots:
+            (self.snapshots_dir / f"{name}.json").unlink()
+
+        referenced = set()
+        for name in self.list_snapshots():
+            for entry in self.load_manifest(name)["files"].values():
+                referenced.update(entry["chunks"])
+
+        removed = 0
+        if self.chunks_dir.exists():
+            for path in self.chunks_dir.glob("*/*"):
+                if path.name not in referenced:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+
+def main(argv):
+    store = BackupStore()
+    if len(argv) >= 1 and argv[0] == "list":
+        for name in store.list_snapshots():
+            manifest = store.load_manifest(name)
+            size = sum(e["size"] for e in manifest["files"].values())
+            print(f"{name}  {len(manifest['files'])} files  {size / 1024 / 1024:.1f} MB")
+        return 0
+    if len(argv) == 3 and argv[0] == "restore":
+        count = store.restore(argv[1], argv[2])
+        print(f"Restored {count} files to {argv[2]}")
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+"""
+Nettoyage en un seul parcours os.scandir
+Fichiers anciens par suffixe et dossiers jetables (__pycache__) repérés dans la
+même passe, avec le stat du DirEntry, élagage des dossiers exclus, sous-arbres
+de premier niveau parcourus en parallèle, mode simulation et plafond de suppression
+"""
+import os
+import time
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUFFIXES = ('.log', '.tmp', '.temp', '.cache', '.swp')
+DEFAULT_EXCLUDE_DIRS = ('.git',)
+DEFAULT_REMOVE_DIRS = ('__pycache__',)
+
+
+def _tree_size(path):
+    """Taille d'un dossier à supprimer (pour le rapport et le plafond)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class CleanupWalker:
+    """Repère puis supprime les fichiers temporaires anciens et les dossiers jetables"""
+
+    def __init__(self,
+                 suffixes=DEFAULT_SUFFIXES,
+                 max_age_days=7,
+                 exclude_dirs=DEFAULT_EXCLUDE_DIRS,
+                 remove_dirs=DEFAULT_REMOVE_DIRS,
+                 workers=4,
+                 dry_run=False,
+                 max_files=None,
+                 max_bytes=None):
+        """
+        Args:
+            suffixes: Fins de nom des fichiers à supprimer
+            max_age_days: Âge minimal (jours entiers écoulés > max_age_days)
+            exclude_dirs: Noms de dossiers jamais parcourus
+            remove_dirs: Noms de dossiers supprimés entièrement, quel que soit l'âge
+            workers: Threads pour les sous-arbres de premier niveau (1 = séquentiel)
+            dry_run: Rapport seulement, rien n'est supprimé
+            max_files: Nombre maximal de suppressions (None = illimité)
+            max_bytes: Volume maximal supprimé (None = illimité)
+        """
+        self.suffixes = tuple(suffixes)
+        self.max_age_days = max_age_days
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.remove_dirs = frozenset(remove_dirs)
+        self.workers = workers
+        self.dry_run = dry_run
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+    def _scan_dir(self, directory, cutoff, files, dirs, subdirs):
+        """Un dossier : candidats dans files/dirs, sous-dossiers à parcourir dans subdirs"""
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name in self.remove_dirs:
+                                dirs.append((entry.path, _tree_size(entry.path)))
+                            elif name not in self.exclude_dirs:
+                                subdirs.append(entry.path)
+                        elif name.endswith(self.suffixes):
+                            # Un seul stat par candidat (en cache dans le DirEntry)
+                            st = entry.stat(follow_symlinks=False)
+                            if st.st_mtime <= cutoff:
+                                files.append((entry.path, st.st_size))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Cannot scan {directory}: {e}")
+
+    def _walk(self, directories, cutoff):
+        """Parcours de sous-arbres : rend (fichiers, dossiers) à supprimer"""
+        files, dirs = [], []
+        stack = list(directories)
+        while stack:
+            self._scan_dir(stack.pop(), cutoff, files, dirs, stack)
+        return files, dirs
+
+    def scan(self, root="."):
+        """Candidats à la suppression (un seul parcours)"""
+        # "age.days > N" : au moins N+1 jours complets, horloge lue une seule fois
+        cutoff = time.time() - (self.max_age_days + 1) * 86400
+
+        # La racine est lue ici, ses sous-dossiers répartis entre les threads
+        files, dirs, subtrees = [], [], []
+        self._scan_dir(root, cutoff, files, dirs, subtrees)
+
+        if self.workers > 1 and len(subtrees) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda d: self._walk([d], cutoff), subtrees))
+        else:
+            results = [self._walk(subtrees, cutoff)]
+
+        for batch_files, batch_dirs in results:
+            files.extend(batch_files)
+            dirs.extend(batch_dirs)
+        return files, dirs
+
+    def run(self, root="."):
+        """
+        Parcours puis suppression dans la limite des plafonds
+
+        Returns:
+            Rapport : fichiers et dossiers supprimés (ou qui le seraient),
+            octets libérés, plafond atteint, erreurs, durée
+        """
+        started = time.perf_counter()
+        files, dirs = self.scan(root)
+
+        report = {
+            "dry_run": self.dry_run,
+            "deleted_files": 0,
+            "deleted_dirs": 0,
+            "deleted_bytes": 0,
+            "capped": False,
+            "errors": 0,
+            "paths": []
+        }
+        # Les plus gros d'abord : le plafond de volume libère le plus de place
+        candidates = sorted([(size, path, False) for path, size in files]
+                            + [(size, path, True) for path, size in dirs], reverse=True)
+
+        for size, path, is_dir in candidates:
+            count = report["deleted_files"] + report["deleted_dirs"]
+            if ((self.max_files is not None and count >= self.max_files)
+                    or (self.max_bytes is not None
+                        and report["deleted_bytes"] + size > self.max_bytes)):
+                report["capped"] = True
+                continue
+
+            if not self.dry_run:
+                try:
+                    if is_dir:
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                except OSError as e:
+                    report["errors"] += 1
+                    logger.debug(f"Cannot delete {path}: {e}")
+                    continue
+
+            report["deleted_dirs" if is_dir else "deleted_files"] += 1
+            report["deleted_bytes"] += size
+            report["paths"].append(path)
+
+        report["seconds"] = round(time.perf_counter() - started, 2)
+        return report
@@ -0,0 +1,227 @@
+"""
+Instantanés d'arborescences et différences (créés / modifiés / supprimés)
+Parcours os.scandir parallèle et format binaire compact en colonnes :
+chemins triés compressés (zlib), tailles et mtimes en tableaux 64 bits
+"""
+import os
+import json
+import zlib
+import time
+import sys
+import struct
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LOSNAP01"
+
+
+class Snapshot:
+    """Chemins triés avec taille et mtime (ns), stockés en colonnes"""
+
+    def __init__(self, paths=None, sizes=None, mtimes=None, meta=None):
+        self.paths = paths if paths is not None else []
+        self.sizes = sizes if sizes is not None else array('Q')
+        self.mtimes = mtimes if mtimes is not None else array('q')
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def from_entries(cls, entries, meta=None):
+        """Depuis un dict chemin -> (taille, mtime_ns)"""
+        paths = sorted(entries)
+        sizes = array('Q', (entries[p][0] for p in paths))
+        mtimes = array('q', (entries[p][1] for p in paths))
+        return cls(paths, sizes, mtimes, meta)
+
+    def to_entries(self):
+        return dict(zip(self.paths, zip(self.sizes, self.mtimes)))
+
+    def sort(self):
+        order = sorted(range(len(self.paths)), key=self.paths.__getitem__)
+        self.paths = [self.paths[i] for i in order]
+        self.sizes = array('Q', (self.sizes[i] for i in order))
+        self.mtimes = array('q', (self.mtimes[i] for i in order))
+
+    def save(self, path):
+        """Écriture atomique du format binaire"""
+        meta = json.dumps(self.meta).encode("utf-8")
+        blob = zlib.compress(
+            b"\0".join(p.encode("utf-8", "surrogateescape") for p in self.paths), 1
+        )
+        sizes, mtimes = array('Q', self.sizes), array('q', self.mtimes)
+        if sys.byteorder == "big":
+            sizes.byteswap()
+            mtimes.byteswap()
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<IQQ", len(meta), len(self.paths), len(blob)))
+            f.write(meta)
+            f.write(blob)
+            f.write(sizes.tobytes())
+            f.write(mtimes.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a snapshot file: {path}")
+            meta_len, count, blob_len = struct.unpack("<IQQ", f.read(20))
+            meta = json.loads(f.read(meta_len))
+            blob = zlib.decompress(f.read(blob_len))
+            sizes, mtimes = array('Q'), array('q')
+            sizes.frombytes(f.read(8 * count))
+            mtimes.frombytes(f.read(8 * count))
+
+        if sys.byteorder == "big":
+            sizes.byteswap()
+            mtimes.byteswap()
+        paths = [p.decode("utf-8", "surrogateescape") for p in blob.split(b"\0")] if count else []
+        if len(paths) != count or len(sizes) != count or len(mtimes) != count:
+            raise ValueError(f"Truncated snapshot file: {path}")
+        return cls(paths, sizes, mtimes, meta)
+
+
+class SnapshotDiff:
+    """Résultat d'une comparaison de deux instantanés"""
+
+    def __init__(self):
+        self.created = []
+        self.modified = []
+        self.deleted = []
+
+    def __bool__(self):
+        return bool(self.created or self.modified or self.deleted)
+
+    def summary(self):
+        return {
+            "created": len(self.created),
+            "modified": len(self.modified),
+            "deleted": len(self.deleted)
+        }
+
+
+def diff(old, new):
+    """Comparaison en une passe (fusion de deux listes triées)"""
+    result = SnapshotDiff()
+    old_paths, new_paths = old.paths, new.paths
+    i, j = 0, 0
+    n_old, n_new = len(old_paths), len(new_paths)
+
+    while i < n_old and j < n_new:
+        a, b = old_paths[i], new_paths[j]
+        if a == b:
+            if old.sizes[i] != new.sizes[j] or old.mtimes[i] != new.mtimes[j]:
+                result.modified.append(b)
+            i += 1
+            j += 1
+        elif a < b:
+            result.deleted.append(a)
+            i += 1
+        else:
+            result.created.append(b)
+            j += 1
+
+    result.deleted.extend(old_paths[i:])
+    result.created.extend(new_paths[j:])
+    return result
+
+
+def _scan_batch(directories, visit, ignore, budget):
+    """
+    Parcourt des dossiers en profondeur jusqu'à `budget` entrées,
+    puis rend les dossiers restants pour répartir le travail
+    """
+    items, visited = [], []
+    stack = list(directories)
+    seen = 0
+    while stack and seen < budget:
+        directory = stack.pop()
+        visited.append(directory)
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    seen += 1
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if ignore and ignore(entry.path, is_dir):
+                            continue
+                        if is_dir:
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            item = visit(entry, directory)
+                            if item is not None:
+                                items.append(item)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Cannot scan {directory}: {e}")
+    return items, visited, stack
+
+
+def walk_tree(roots, visit, ignore=None, workers=8, budget=5000):
+    """
+    Parcours os.scandir parallèle de plusieurs racines, commun aux instantanés
+    et à l'analyse disque
+
+    Args:
+        visit: Fonction (entry, dossier) -> valeur ou None, appelée pour chaque
+            fichier régulier depuis un thread du parcours (os.DirEntry)
+        ignore: Fonction (path, is_dir) -> bool (sous-arbres exclus non parcourus)
+        workers: Nombre de threads (os.scandir/stat libèrent le GIL)
+        budget: Entrées traitées par tâche avant de redistribuer les dossiers
+
+    Yields:
+        (dossiers parcourus, valeurs rendues par visit) par tâche terminée,
+        dans le thread appelant : pas de verrou à prendre pour cumuler
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_batch, [os.path.abspath(r)], visit, ignore, budget)
+                   for r in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                items, visited, leftover = future.result()
+                # Dossiers restants répartis en autant de tâches que de workers
+                share = max(1, len(leftover) // workers)
+                for k in range(0, len(leftover), share):
+                    pending.add(pool.submit(_scan_batch, leftover[k:k + share], visit, ignore, budget))
+                yield visited, items
+
+
+def _snapshot_entry(entry, directory):
+    st = entry.stat(follow_symlinks=False)
+    return entry.path, st.st_size, st.st_mtime_ns
+
+
+def scan_tree(roots, ignore=None, workers=8, budget=5000):
+    """
+    Instantané de plusieurs racines par des os.scandir en parallèle
+
+    Args:
+        ignore: Fonction (path, is_dir) -> bool (sous-arbres exclus non parcourus)
+        workers: Nombre de threads (os.scandir/stat libèrent le GIL)
+        budget: Entrées traitées par tâche avant de redistribuer les dossiers
+    """
+    started = time.perf_counter()
+    snapshot = Snapshot()
+    sizes, mtimes = [], []
+
+    for _, items in walk_tree(roots, _snapshot_entry, ignore, workers, budget):
+        for path, size, mtime in items:
+            snapshot.paths.append(path)
+            sizes.append(size)
+            mtimes.append(mtime)
+
+    snapshot.sizes = array('Q', sizes)
+    snapshot.mtimes = array('q', mtimes)
+    snapshot.sort()
+    logger.info(f"Snapshot: {len(snapshot)} files in {time.perf_counter() - started:.2f}s")
+    return snapshot
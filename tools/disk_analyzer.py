@@ -0,0 +1,286 @@
+"""
+Analyse de l'occupation disque façon du : taille par dossier et plus gros fichiers
+Parcours os.scandir parallèle, liens physiques comptés une fois, résultat en
+cache mis à jour par les événements de fichiers
+"""
+import os
+import time
+import heapq
+import logging
+import threading
+
+try:
+    from tools.dir_snapshot import walk_tree
+except ImportError:
+    from dir_snapshot import walk_tree
+
+logger = logging.getLogger(__name__)
+
+
+def format_size(num_bytes):
+    """Taille lisible (1.5 GB)"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def disk_usage_of(st):
+    """Espace réellement alloué (blocs) si disponible, sinon la taille"""
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def _usage_entry(entry, directory):
+    """(chemin, dossier, octets, clé d'inode si liens multiples)"""
+    st = entry.stat(follow_symlinks=False)
+    inode = (st.st_dev, st.st_ino) if st.st_nlink > 1 else None
+    return entry.path, directory, disk_usage_of(st), inode
+
+
+class DiskAnalyzer:
+    """Arbre des tailles d'une racine, en cache et mis à jour incrémentalement"""
+
+    def __init__(self, root=".", workers=8, max_age=3600, budget=5000):
+        """
+        Args:
+            root: Dossier analysé
+            workers: Threads de parcours
+            max_age: Âge (s) au-delà duquel refresh() refait un parcours complet
+            budget: Entrées traitées par tâche avant de redistribuer les dossiers
+        """
+        self.root = os.path.abspath(root)
+        self.workers = workers
+        self.max_age = max_age
+        self.budget = budget
+
+        self.files = {}      # chemin -> octets comptés
+        self.own_bytes = {}  # dossier -> octets des fichiers directement dedans
+        self.inodes = {}     # (dev, ino) -> liens connus, le premier est compté
+        self.link_keys = {}  # chemin -> (dev, ino) des fichiers à liens multiples
+        self.scanned_at = 0
+        self.scan_seconds = 0.0
+        self._totals = None
+        self._lock = threading.RLock()
+
+    def scan(self):
+        """Parcours complet parallèle"""
+        started = time.perf_counter()
+        files, own_bytes, inodes, link_keys = {}, {}, {}, {}
+
+        for dirs, batch in walk_tree([self.root], _usage_entry,
+                                     workers=self.workers, budget=self.budget):
+            for directory in dirs:
+                own_bytes.setdefault(directory, 0)
+            for path, directory, used, inode in batch:
+                if inode is not None:
+                    links = inodes.setdefault(inode, [])
+                    if links:
+                        used = 0  # autre lien d'un fichier déjà compté
+                    links.append(path)
+                    link_keys[path] = inode
+                files[path] = used
+                own_bytes[directory] += used
+
+        with self._lock:
+            self.files, self.own_bytes = files, own_bytes
+            self.inodes, self.link_keys = inodes, link_keys
+            self._totals = None
+            self.scanned_at = time.time()
+            self.scan_seconds = time.perf_counter() - started
+
+        logger.info(f"Disk analysis of {self.root}: {len(files)} files, "
+                    f"{format_size(sum(files.values()))} in {self.scan_seconds:.2f}s")
+
+    def refresh(self, force=False):
+        """Parcours complet seulement si le cache est absent ou trop ancien"""
+        if force or not self.scanned_at or time.time() - self.scanned_at > self.max_age:
+            self.scan()
+
+    # --- Mise à jour incrémentale ---
+
+    def _contains(self, path):
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def apply_event(self, event_type, path, dest_path=None):
+        """Répercute un événement de fichier sur l'arbre en cache"""
+        if not self.scanned_at:
+            return
+        path = os.path.abspath(path)
+        with self._lock:
+            if event_type in ("deleted", "moved"):
+                self._forget(path)
+            if event_type == "moved":
+                path = os.path.abspath(dest_path)
+            if event_type != "deleted" and self._contains(path):
+                self._update(path)
+
+    def apply_directory_added(self, directory):
+        """Dossier créé ou arrivé par déplacement : parcourt son sous-arbre"""
+        directory = os.path.abspath(directory)
+        if not self.scanned_at or not self._contains(directory):
+            return
+        for dirs, batch in walk_tree([directory], _usage_entry,
+                                     workers=self.workers, budget=self.budget):
+            with self._lock:
+                for d in dirs:
+                    self._ensure_dir(d)
+                for path, _, _, _ in batch:
+                    self._update(path)
+
+    def apply_directory_removed(self, directory):
+        """Dossier supprimé ou déplacé : retire son sous-arbre"""
+        directory = os.path.abspath(directory)
+        prefix = directory + os.sep
+        with self._lock:
+            for path in [p for p in self.files if p.startswith(prefix)]:
+                self._forget(path)
+            for d in [d for d in self.own_bytes if d == directory or d.startswith(prefix)]:
+                del self.own_bytes[d]
+            self._totals = None
+
+    def _forget(self, path):
+        used = self.files.pop(path, None)
+        if used is None:
+            return
+        parent = os.path.dirname(path)
+        if parent in self.own_bytes:
+            self.own_bytes[parent] -= used
+        self._unlink(path, used)
+        self._totals = None
+
+    def _unlink(self, path, used):
+        """Détache un lien physique ; sa taille passe au lien suivant s'il était compté"""
+        inode = self.link_keys.pop(path, None)
+        links = self.inodes.get(inode)
+        if not links or path not in links:
+            return
+        counted = links[0] == path
+        links.remove(path)
+        if not links:
+            del self.inodes[inode]
+        elif counted and links[0] in self.files:
+            self._set_used(links[0], used)
+
+    def _set_used(self, path, used):
+        previous = self.files.get(path, 0)
+        self.files[path] = used
+        parent = os.path.dirname(path)
+        self._ensure_dir(parent)
+        self.own_bytes[parent] += used - previous
+        self._totals = None
+
+    def _ensure_dir(self, directory):
+        """Déclare un dossier et ses parents manquants (pour les cumuls)"""
+        while directory not in self.own_bytes and self._contains(directory):
+            self.own_bytes[directory] = 0
+            directory = os.path.dirname(directory)
+
+    def _update(self, path):
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            self._forget(path)
+            return
+
+        used = disk_usage_of(st)
+        inode = (st.st_dev, st.st_ino) if st.st_nlink > 1 else None
+        if self.link_keys.get(path) != inode:
+            # Fichier remplacé ou dernier autre lien disparu
+            self._unlink(path, self.files.get(path, 0))
+        if inode is not None:
+            links = self.inodes.setdefault(inode, [])
+            if path not in links:
+                links.append(path)
+                self.link_keys[path] = inode
+            if links[0] != path:
+                used = 0
+
+        self._set_used(path, used)
+
+    # --- Requêtes ---
+
+    def _subtree_totals(self):
+        """Tailles cumulées par dossier (recalculées après une modification)"""
+        if self._totals is None:
+            totals = dict(self.own_bytes)
+            # Des plus profonds aux moins profonds : chaque dossier remonte dans son parent
+            for directory in sorted(totals, key=lambda d: d.count(os.sep), reverse=True):
+                if directory == self.root:
+                    continue
+                parent = os.path.dirname(directory)
+                if parent in totals:
+                    totals[parent] += totals[directory]
+            self._totals = totals
+        return self._totals
+
+    def total(self):
+        with self._lock:
+            return self._subtree_totals().get(self.root, 0)
+
+    def top_directories(self, n=5, share=0.9):
+        """
+        Dossiers les plus lourds. Un dossier dont un sous-dossier déjà listé
+        représente plus de `share` de sa taille est omis (simple conteneur).
+        """
+        with self._lock:
+            totals = self._subtree_totals()
+            candidates = heapq.nlargest(n * 4, (
+                (size, d) for d, size in totals.items() if size and d != self.root
+            ))
+
+        result = []
+        for size, directory in sorted(candidates, key=lambda c: c[1].count(os.sep), reverse=True):
+            prefix = directory + os.sep
+            listed = [(s, d) for s, d in result if d.startswith(prefix)]
+            # Seuls les descendants listés les plus hauts : les autres sont inclus dedans
+            covered = sum(s for s, d in listed
+                          if not any(d.startswith(other + os.sep) for _, other in listed))
+            if size and covered / size > share:
+                continue
+            result.append((size, directory))
+
+        result.sort(reverse=True)
+        return [(os.path.relpath(d, self.root), size) for size, d in result[:n]]
+
+    def top_files(self, n=5):
+        with self._lock:
+            largest = heapq.nlargest(n, self.files.items(), key=lambda item: item[1])
+        return [(os.path.relpath(path, self.root), size) for path, size in largest]
+
+    def report(self, n=5):
+        """Résumé : total, plus gros dossiers et fichiers"""
+        self.refresh()
+        return {
+            "root": self.root,
+            "total_bytes": self.total(),
+            "top_directories": self.top_directories(n),
+            "top_files": self.top_files(n),
+            "scanned_at": self.scanned_at,
+            "scan_seconds": round(self.scan_seconds, 2)
+        }
+
+    def describe(self, n=3):
+        """
+        Résumé en une ligne pour les alertes. L'analyse ne couvre que la racine,
+        pas toute la partition : le résumé le précise avec le volume analysé.
+        """
+        report = self.report(n)
+        dirs = ", ".join(f"{d} ({format_size(s)})" for d, s in report["top_directories"])
+        files = ", ".join(f"{f} ({format_size(s)})" for f, s in report["top_files"])
+        return (f"under {report['root']} ({format_size(report['total_bytes'])} analyzed): "
+                f"top directories: {dirs or '-'}; top files: {files or '-'}")
+
+
+_analyzers = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_disk_analyzer(root="."):
+    """Analyseur partagé par racine (cache commun au moniteur et au planificateur)"""
+    key = os.path.abspath(root)
+    with _analyzers_lock:
+        if key not in _analyzers:
+            _analyzers[key] = DiskAnalyzer(key)
+        return _analyzers[key]
@@ -0,0 +1,148 @@
+"""
+Empreintes de fichiers avec cache par stat
+Lecture par blocs (mémoire constante), BLAKE2 ou xxHash si disponible,
+et empreinte rapide par échantillons pour les gros fichiers
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# xxHash optionnel (plus rapide que BLAKE2 sur les gros fichiers)
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+def new_hash():
+    """Nouvel objet de hachage (xxh3-128 si disponible, sinon BLAKE2b-128)"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+class FileHasher:
+    """Calcule et met en cache l'empreinte des fichiers"""
+
+    def __init__(self,
+                 max_entries=10000,
+                 chunk_size=1024 * 1024,
+                 full_hash_max_bytes=100 * 1024 * 1024,
+                 quick_fingerprint=True,
+                 sample_size=64 * 1024,
+                 samples=8):
+        """
+        Args:
+            max_entries: Nombre de fichiers gardés en cache (LRU)
+            chunk_size: Taille des blocs lus
+            full_hash_max_bytes: Au-delà, pas de hachage complet
+            quick_fingerprint: Empreinte par échantillons au-delà de cette taille
+                (sinon pas d'empreinte du tout)
+            sample_size: Taille de chaque échantillon de l'empreinte rapide
+            samples: Nombre d'échantillons répartis dans le fichier
+        """
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.full_hash_max_bytes = full_hash_max_bytes
+        self.quick_fingerprint = quick_fingerprint
+        self.sample_size = sample_size
+        self.samples = samples
+
+        # path -> ((size, mtime_ns, inode), empreinte)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stat_key(st):
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def lookup(self, path, st):
+        """Empreinte en cache si le fichier n'a pas changé depuis"""
+        key = self.stat_key(st)
+        with self._lock:
+            entry = self.cache.get(path)
+            if entry and entry[0] == key:
+                self.cache.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def hash_file(self, path, st=None, on_chunk=None):
+        """
+        Empreinte du fichier ("q:..." pour une empreinte rapide)
+
+        Args:
+            st: Résultat de os.stat déjà disponible (évite un second appel)
+            on_chunk: Appelé avec chaque bloc lu lors d'un hachage complet,
+                pour partager la lecture avec d'autres traitements
+
+        Returns:
+            Empreinte hexadécimale, ou "" si le fichier n'est pas haché
+        """
+        if st is None:
+            st = os.stat(path)
+
+        digest = self.lookup(path, st)
+        if digest is not None:
+            return digest
+
+        with self._lock:
+            self.misses += 1
+
+        if st.st_size <= self.full_hash_max_bytes:
+            digest = self._full_hash(path, on_chunk)
+        elif self.quick_fingerprint:
+            digest = "q:" + self._quick_hash(path, st.st_size)
+        else:
+            return ""
+
+        self.store(path, st, digest)
+        return digest
+
+    def store(self, path, st, digest):
+        with self._lock:
+            self.cache[path] = (self.stat_key(st), digest)
+            self.cache.move_to_end(path)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def forget(self, path):
+        """Retire un fichier du cache (suppression, déplacement)"""
+        with self._lock:
+            self.cache.pop(path, None)
+
+    def _full_hash(self, path, on_chunk=None):
+        h = new_hash()
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                h.update(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+        return h.hexdigest()
+
+    def _quick_hash(self, path, size):
+        """Taille + échantillons répartis (début, milieu, fin)"""
+        h = new_hash()
+        h.update(size.to_bytes(8, "little"))
+        step = max((size - self.sample_size) // max(self.samples - 1, 1), 1)
+        with open(path, 'rb') as f:
+            for i in range(self.samples):
+                f.seek(min(i * step, max(size - self.sample_size, 0)))
+                h.update(f.read(self.sample_size))
+        return h.hexdigest()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "entries": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "algorithm": "xxh3_128" if XXHASH_AVAILABLE else "blake2b-128"
+            }
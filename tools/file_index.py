@@ -0,0 +1,220 @@
+"""
+Index persistant des fichiers surveillés : chemin -> (taille, mtime_ns)
+Construit par un instantané os.scandir parallèle, tenu à jour par les
+événements watchdog, avec une liste triée par taille pour les requêtes
+"fichiers volumineux"
+"""
+import os
+import time
+import bisect
+import logging
+import threading
+
+try:
+    from tools.dir_snapshot import Snapshot, diff, scan_tree
+except ImportError:
+    from dir_snapshot import Snapshot, diff, scan_tree
+
+logger = logging.getLogger(__name__)
+
+
+def _within(path, roots):
+    """Vrai si path est une des racines ou se trouve sous l'une d'elles"""
+    return any(path == root or path.startswith(os.path.join(root, "")) for root in roots)
+
+
+class FileIndex:
+    """Index chemin -> (taille, mtime_ns) avec accès ordonné par taille"""
+
+    def __init__(self, index_path=None, ignore=None):
+        """
+        Args:
+            index_path: Instantané binaire de persistance (None = index volatil)
+            ignore: Fonction (path, is_dir) -> bool pour exclure fichiers et dossiers
+        """
+        self.index_path = index_path
+        self.ignore = ignore or (lambda path, is_dir=False: False)
+        self.roots = []
+        self.entries = {}
+        self.by_size = []  # (taille, chemin) trié
+        self.built_at = 0
+        self.dirty = False
+
+        self._lock = threading.RLock()
+        self._building = False
+        self._replay = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    # --- Mises à jour (événements) ---
+
+    def set(self, path, size, mtime):
+        with self._lock:
+            if self._building:
+                self._replay.append(("set", path, size, mtime))
+            self._set(path, size, mtime)
+
+    def _set(self, path, size, mtime):
+        old = self.entries.get(path)
+        if old is not None:
+            if old[0] == size and old[1] == mtime:
+                return
+            self._remove_size(old[0], path)
+        self.entries[path] = (size, mtime)
+        bisect.insort(self.by_size, (size, path))
+        self.dirty = True
+
+    def update(self, path):
+        """Relit la taille d'un fichier (le retire s'il n'existe plus)"""
+        try:
+            st = os.stat(path)
+            self.set(path, st.st_size, st.st_mtime_ns)
+        except OSError:
+            self.remove(path)
+
+    def remove(self, path):
+        with self._lock:
+            if self._building:
+                self._replay.append(("remove", path))
+            self._remove(path)
+
+    def _remove(self, path):
+        old = self.entries.pop(path, None)
+        if old is not None:
+            self._remove_size(old[0], path)
+            self.dirty = True
+
+    def _remove_size(self, size, path):
+        i = bisect.bisect_left(self.by_size, (size, path))
+        if i < len(self.by_size) and self.by_size[i] == (size, path):
+            del self.by_size[i]
+
+    def move(self, src_path, dest_path):
+        with self._lock:
+            entry = self.entries.get(src_path)
+            self.remove(src_path)
+            if entry is not None:
+                self.set(dest_path, *entry)
+            else:
+                self.update(dest_path)
+
+    def _under(self, directory):
+        prefix = os.path.join(directory, "")
+        return [path for path in self.entries if path.startswith(prefix)]
+
+    def remove_tree(self, directory):
+        """Dossier supprimé : retire tout son contenu"""
+        with self._lock:
+            for path in self._under(directory):
+                self.remove(path)
+
+    def move_tree(self, src_dir, dest_dir):
+        """Dossier déplacé : renomme tout son contenu"""
+        with self._lock:
+            for path in self._under(src_dir):
+                self.move(path, dest_dir + path[len(src_dir):])
+
+    # --- Requêtes ---
+
+    def larger_than(self, min_size):
+        """Fichiers de taille > min_size, du plus gros au plus petit (O(log n + k))"""
+        with self._lock:
+            start = bisect.bisect_left(self.by_size, (int(min_size) + 1, ""))
+            return [(path, size) for size, path in reversed(self.by_size[start:])]
+
+    def get(self, path):
+        with self._lock:
+            return self.entries.get(path)
+
+    # --- Construction complète ---
+
+    def needs_rescan(self, roots, max_age):
+        """Vrai si l'index est vide, d'autres racines, ou plus vieux que max_age (s)"""
+        return (not self.built_at
+                or sorted(roots) != sorted(self.roots)
+                or time.time() - self.built_at > max_age)
+
+    def scan(self, roots, workers=8):
+        """
+        Parcours complet (vérification de cohérence)
+
+        Returns:
+            SnapshotDiff entre l'index précédent et le disque : changements
+            survenus pendant l'arrêt du moniteur ou manqués par watchdog,
+            limité aux racines couvertes par les deux parcours
+        """
+        roots = [os.path.abspath(root) for root in roots]
+        with self._lock:
+            self._building = True
+            self._replay = []
+            previous_roots = [os.path.abspath(root) for root in self.roots]
+            same_roots = sorted(previous_roots) == sorted(roots)
+            entries = self.entries
+            if not same_roots:
+                # Racine retirée : ses fichiers ne sont pas "supprimés"
+                entries = {path: entry for path, entry in entries.items() if _within(path, roots)}
+            previous = Snapshot.from_entries(entries)
+
+        current = None
+        try:
+            current = scan_tree(roots, ignore=self.ignore, workers=workers)
+        finally:
+            with self._lock:
+                self._finish_scan(current, roots)
+
+        if not same_roots:
+            # Racine ajoutée : ses fichiers ne sont pas "créés"
+            current = Snapshot.from_entries(
+                {path: entry for path, entry in current.to_entries().items()
+                 if _within(path, previous_roots)}
+            )
+        changes = diff(previous, current)
+        logger.info(f"File index rebuilt: {len(self.entries)} files, changes {changes.summary()}")
+        return changes
+
+    def _finish_scan(self, snapshot, roots):
+        """Remplace l'index puis rejoue les événements reçus pendant le parcours"""
+        if snapshot is not None:
+            self.entries = snapshot.to_entries()
+            self.by_size = sorted(zip(snapshot.sizes, snapshot.paths))
+            self.roots = list(roots)
+            self.built_at = time.time()
+            self.dirty = True
+        for op in self._replay:
+            if op[0] == "set":
+                self._set(*op[1:])
+            else:
+                self._remove(op[1])
+        self._building = False
+        self._replay = []
+
+    # --- Persistance ---
+
+    def load(self):
+        """Recharge l'index persisté (False s'il est absent ou illisible)"""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
+        try:
+            snapshot = Snapshot.load(self.index_path)
+            with self._lock:
+                self.roots = snapshot.meta.get("roots", [])
+                self.built_at = snapshot.meta.get("built_at", 0)
+                self.entries = snapshot.to_entries()
+                self.by_size = sorted(zip(snapshot.sizes, snapshot.paths))
+                self.dirty = False
+            return True
+        except Exception as e:
+            logger.warning(f"Could not load file index: {e}")
+            return False
+
+    def save(self):
+        """Écrit l'index s'il a changé (format binaire, remplacement atomique)"""
+        if not self.index_path or not self.dirty:
+            return
+        with self._lock:
+            snapshot = Snapshot.from_entries(
+                self.entries, meta={"roots": self.roots, "built_at": self.built_at}
+            )
+            self.dirty = False
+        snapshot.save(self.index_path)
@@ -2,16 +2,29 @@
 File Monitor pour LocalOpsAI - Surveillance de fichiers en temps réel
 """
 import os
+import sys
 import time
-import hashlib
 import logging
 from datetime import datetime
 from pathlib import Path
 import json
 import threading
+import queue
+from collections import deque
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+# Racine du projet pour les imports (exécution directe du module)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from memory.storage import JournalBackend
+from tools.alert_bus import Alert, get_alert_bus, install_default_subscribers
+from tools.alert_sinks import AlertDispatcher
+from tools.disk_analyzer import get_disk_analyzer
+from tools.file_hasher import FileHasher
+from tools.file_index import FileIndex
+from tools.secret_scanner import SecretScanner
+from tools.watch_rules import WatchRules
+
 logger = logging.getLogger(__name__)
 
 class SafeLoggingHandler:
@@ -27,44 +40,262 @@ class SafeLoggingHandler:
 class FileChangeHandler(FileSystemEventHandler):
     """Gère les événements de changement de fichiers"""
     
+    # Fusion d'un nouvel événement avec celui en attente pour le même chemin
+    # (None = les deux s'annulent, ex: fichier temporaire créé puis supprimé)
+    MERGE_RULES = {
+        ("created", "modified"): "created",
+        ("created", "deleted"): None,
+        ("modified", "created"): "modified",
+        ("modified", "deleted"): "deleted",
+        ("deleted", "created"): "modified",   # sauvegarde atomique d'éditeur
+        ("deleted", "modified"): "modified",
+        ("moved", "created"): "moved",
+        ("moved", "modified"): "moved",
+        ("moved", "deleted"): "deleted",
+    }
+    
     def __init__(self, monitor):
         self.monitor = monitor
-        self.last_events = {}
+        self.debounce = monitor.config.get("debounce_seconds", 0.5)
+        # Un fichier écrit en continu est tout de même traité régulièrement
+        self.max_delay = monitor.config.get("debounce_max_seconds", 5)
         
+        # Événements en attente de fusion, par chemin
+        self.last_events = {}
+        self.max_pending = monitor.config.get("max_pending_events", 10000)
+        self.coalesced = 0
+        self.overflow = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        
+        # Traitement (hash, règles, alertes) hors du thread de l'observateur
+        self.num_workers = monitor.config.get("event_workers", 2)
+        self.put_timeout = monitor.config.get("event_queue_timeout", 0.5)
+        self.tasks = queue.Queue(maxsize=monitor.config.get("event_queue_size", 1000))
+        self.dropped = 0
+        self._workers = []
+        
+    def start(self):
+        """Démarre les workers et le thread de vidage des événements fusionnés"""
+        self._stop.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._run_worker, name=f"filemon-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        
+        if self.debounce > 0:
+            self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+            self._flusher.start()
+    
+    def stop(self):
+        """Arrête le vidage, traite les événements en attente puis les workers"""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+            self._flusher = None
+        self.flush_events(force=True)
+        
+        for _ in self._workers:
+            self.tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+    
     def on_created(self, event):
         """Fichier créé"""
         if not event.is_directory:
-            self.process_event("created", event.src_path)
+            self.queue_event("created", event.src_path)
+        else:
+            self.monitor.watch_new_directory(event.src_path)
     
     def on_deleted(self, event):
         """Fichier supprimé"""
         if not event.is_directory:
-            self.process_event("deleted", event.src_path)
+            self.queue_event("deleted", event.src_path)
+        else:
+            self.monitor.unwatch_directory(event.src_path)
+            self._dispatch("dir_deleted", event.src_path, block=False)
     
     def on_modified(self, event):
         """Fichier modifié"""
         if not event.is_directory:
-            self.process_event("modified", event.src_path)
+            self.queue_event("modified", event.src_path)
     
     def on_moved(self, event):
         """Fichier déplacé/renommé"""
         if not event.is_directory:
-            self.process_event("moved", event.src_path, event.dest_path)
+            self.queue_event("moved", event.src_path, event.dest_path)
+        else:
+            self._dispatch("dir_moved", event.src_path, event.dest_path, block=False)
+    
+    def should_ignore(self, path, is_dir=False):
+        """Filtre compilé (include/exclude), en cache par dossier"""
+        return self.monitor.rules.is_ignored(path, is_dir)
+    
+    def queue_event(self, event_type, path, dest_path=None):
+        """Met l'événement en attente, fusionné avec les précédents du même chemin"""
+        if event_type == "moved":
+            self._queue_move(path, dest_path)
+            return
+        
+        if self.should_ignore(path):
+            return
+        
+        if self.debounce <= 0:
+            self._dispatch(event_type, path, block=False)
+            return
+        
+        with self._lock:
+            self._merge(path, event_type, path)
     
-    def process_event(self, event_type, path, dest_path=None):
-        """Traite un événement de fichier"""
-        # Ignorer certains fichiers
-        ignore_extensions = ['.pyc', '.swp', '.tmp', '.cache']
-        if any(path.endswith(ext) for ext in ignore_extensions):
+    def _queue_move(self, src_path, dest_path):
+        """Un déplacement transfère l'événement en attente vers la destination"""
+        src_ignored = self.should_ignore(src_path)
+        dest_ignored = self.should_ignore(dest_path)
+        if src_ignored and dest_ignored:
             return
         
-        # Ignorer les dossiers système
-        if any(part.startswith('.') for part in Path(path).parts):
+        if self.debounce <= 0:
+            if dest_ignored:
+                self._dispatch("deleted", src_path, block=False)
+            elif src_ignored:
+                self._dispatch("created", dest_path, block=False)
+            else:
+                self._dispatch("moved", src_path, dest_path, block=False)
             return
         
+        with self._lock:
+            pending = self.last_events.pop(src_path, None)
+            count = pending["count"] + 1 if pending else 1
+            if pending:
+                self.coalesced += 1
+            
+            # Origine réelle si le fichier avait déjà été déplacé entre-temps
+            origin = pending["path"] if pending and pending["event"] == "moved" else src_path
+            was_created = pending is not None and pending["event"] == "created"
+            
+            if dest_ignored:
+                # Déplacé hors de la surveillance : équivaut à une suppression
+                if was_created:
+                    self.coalesced += 1
+                else:
+                    self._merge(origin, "deleted", origin, count=count)
+            elif src_ignored or was_created:
+                # Fichier temporaire renommé à sa place finale
+                self._merge(dest_path, "created", dest_path, count=count)
+            else:
+                self._merge(dest_path, "moved", origin, dest_path, count=count)
+    
+    def _merge(self, key, event_type, path, dest_path=None, count=1):
+        """Fusionne un événement dans last_events (appelé sous verrou)"""
+        pending = self.last_events.get(key)
+        now = time.monotonic()
+        if pending is None and len(self.last_events) >= self.max_pending:
+            # Trop de chemins distincts en attente : l'événement est perdu
+            self.overflow += 1
+            if self.overflow == 1 or self.overflow % 1000 == 0:
+                logger.warning(f"Pending event table full, {self.overflow} events overflowed")
+            return
+        
+        if pending is None or event_type == "moved":
+            first = now
+            if pending:
+                self.coalesced += 1
+                count += pending["count"]
+                first = pending["first"]
+            self.last_events[key] = {
+                "event": event_type,
+                "path": path,
+                "dest_path": dest_path,
+                "first": first,
+                "last": now,
+                "count": count
+            }
+            return
+        
+        self.coalesced += 1
+        merged = self.MERGE_RULES.get((pending["event"], event_type), event_type)
+        if merged is None:
+            del self.last_events[key]
+            return
+        
+        if pending["event"] == "moved" and merged == "deleted":
+            # Déplacé puis supprimé : c'est l'original qui disparaît
+            pending["dest_path"] = None
+        pending["event"] = merged
+        pending["last"] = now
+        pending["count"] += count
+    
+    def _run_flusher(self):
+        while not self._stop.wait(self.debounce / 2):
+            self.flush_events()
+    
+    def flush_events(self, force=False):
+        """Traite les événements restés calmes pendant la fenêtre de debounce"""
+        now = time.monotonic()
+        with self._lock:
+            ready = [key for key, pending in self.last_events.items()
+                     if force
+                     or now - pending["last"] >= self.debounce
+                     or now - pending["first"] >= self.max_delay]
+            batch = [self.last_events.pop(key) for key in ready]
+        
+        for pending in batch:
+            self._dispatch(pending["event"], pending["path"], pending["dest_path"],
+                           count=pending["count"])
+    
+    def _dispatch(self, event_type, path, dest_path=None, count=1, block=True):
+        """
+        Confie l'événement aux workers. La file est bornée : le vidage attend
+        jusqu'à put_timeout (les événements continuent de fusionner entre-temps),
+        le thread de l'observateur n'attend jamais. Au-delà, l'événement est perdu.
+        """
+        try:
+            self.tasks.put((event_type, path, dest_path, count), block=block,
+                           timeout=self.put_timeout if block else None)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Event queue full, {self.dropped} events dropped")
+    
+    def _run_worker(self):
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                self.process_event(*task)
+            finally:
+                self.tasks.task_done()
+    
+    def process_event(self, event_type, path, dest_path=None, count=1):
+        """Traite un événement de fichier (après fusion)"""
+        index = self.monitor.index
+        analyzer = self.monitor.disk_analyzer
+        if event_type == "dir_deleted":
+            index.remove_tree(path)
+            analyzer.apply_directory_removed(path)
+            return
+        if event_type == "dir_moved":
+            index.move_tree(path, dest_path)
+            analyzer.apply_directory_removed(path)
+            analyzer.apply_directory_added(dest_path)
+            return
+        
+        # Occupation disque (les chemins ignorés sont repris au parcours périodique)
+        analyzer.apply_event(event_type, path, dest_path)
+        
+        if self.should_ignore(path):
+            return
+        
+        if event_type in ("deleted", "moved"):
+            self.monitor.hasher.forget(path)
+            index.remove(path)
+        
         try:
             # Récupérer les informations du fichier
-            file_info = self.get_file_info(path)
+            file_info = self.get_file_info(dest_path or path)
             
             # Journaliser l'événement
             event_data = {
@@ -78,12 +309,21 @@ class FileChangeHandler(FileSystemEventHandler):
             
             if dest_path:
                 event_data["dest_path"] = dest_path
+            if count > 1:
+                event_data["coalesced"] = count
             
             # Ajouter au log du monitor
             self.monitor.add_event(event_data)
             
-            # Vérifier les règles de sécurité
-            self.check_security_rules(path, file_info)
+            # Tenir l'index à jour (sans nouveau stat)
+            if "mtime_ns" in file_info:
+                index.set(dest_path or path, file_info["size"], file_info["mtime_ns"])
+            elif event_type != "deleted":
+                index.remove(dest_path or path)
+            
+            # Vérifier les règles de sécurité (rien à lire pour un fichier supprimé)
+            if event_type != "deleted":
+                self.check_security_rules(dest_path or path, file_info)
             
             # Afficher l'événement
             display_msg = f"{event_type.upper()} {Path(path).name}"
@@ -101,20 +341,38 @@ class FileChangeHandler(FileSystemEventHandler):
             stat = os.stat(path)
             size = stat.st_size
             
-            # Calculer le hash MD5 pour les petits fichiers
+            # Recherche de secrets dans la même lecture que le hachage
+            scanner = self.monitor.scanner
+            scan_max = self.monitor.config.get("secret_scan_max_mb", 10) * 1024 * 1024
+            session = scanner.session() if size <= scan_max else None
+            
+            # Empreinte en cache tant que (taille, mtime, inode) ne bouge pas
             file_hash = ""
-            if size < 10 * 1024 * 1024:  # 10MB max
-                try:
-                    with open(path, 'rb') as f:
-                        file_hash = hashlib.md5(f.read()).hexdigest()[:8]
-                except:
-                    pass
+            secrets = {}
+            try:
+                file_hash = self.monitor.hasher.hash_file(
+                    path, stat, on_chunk=session.feed if session else None
+                )
+                
+                # Verdict en cache par empreinte : un contenu n'est analysé qu'une fois
+                if session and session.fed:
+                    secrets = session.result()
+                    scanner.store(file_hash, secrets)
+                elif session:
+                    secrets = scanner.cached(file_hash)
+                    if secrets is None:
+                        secrets = scanner.scan_file(path)
+                        scanner.store(file_hash, secrets)
+            except OSError:
+                pass
             
             return {
                 "size": size,
                 "size_mb": size / (1024 * 1024),
                 "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "hash": file_hash
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": file_hash,
+                "secrets": secrets
             }
         except Exception as e:
             logger.debug(f"Could not get file info for {path}: {e}")
@@ -139,33 +397,31 @@ class FileChangeHandler(FileSystemEventHandler):
                 f"({file_info['size_mb']:.1f} MB)"
             )
         
-        # Règle 3: Fichiers avec mots sensibles
-        sensitive_keywords = ['password', 'secret', 'key', 'token', 'credential']
-        try:
-            if file_info['size'] < 100000:  # 100KB max pour la lecture
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(5000)  # Lire les 5 premiers KB
-                    content_lower = content.lower()
-                    
-                    for keyword in sensitive_keywords:
-                        if keyword in content_lower:
-                            self.monitor.send_alert(
-                                f"Sensitive keyword '{keyword}' found in: {path_obj.name}"
-                            )
-                            break
-        except:
-            pass
+        # Règle 3: Secrets et mots sensibles (analysés par get_file_info)
+        secrets = dict(file_info.get('secrets') or {})
+        keyword = secrets.pop('keyword', None)
+        if secrets:
+            self.monitor.send_alert(
+                f"Possible secret ({', '.join(sorted(secrets))}) found in: {path_obj.name}",
+                level="CRITICAL"
+            )
+        elif keyword:
+            self.monitor.send_alert(
+                f"Sensitive keyword '{keyword}' found in: {path_obj.name}"
+            )
 
 class FileMonitor:
     """Moniteur de fichiers principal"""
     
-    def __init__(self, config_path=None):
+    EVENTS_COLLECTION = "file_events"
+    
+    def __init__(self, config_path=None, storage=None):
         # D'abord définir les attributs de base
         self.observer = None
         self.event_handler = None
         self.running = False
-        self.events = []
         self.max_events = 1000
+        self.events = deque(maxlen=self.max_events)
         
         # Dossiers à surveiller par défaut
         self.default_paths = [
@@ -177,6 +433,44 @@ class FileMonitor:
         # Ensuite charger la configuration
         self.config = self.load_config(config_path)
         
+        # Empreintes des fichiers, partagées par tous les handlers
+        self.hasher = FileHasher(
+            full_hash_max_bytes=int(self.config["hash_full_max_mb"] * 1024 * 1024),
+            quick_fingerprint=self.config["hash_quick_fingerprint"]
+        )
+        
+        # Détection de secrets, verdicts en cache par empreinte de contenu
+        self.scanner = SecretScanner()
+        
+        # Règles include/exclude, aussi utilisées pour placer les surveillances
+        self.rules = WatchRules.from_config(self.config)
+        self.shallow_watches = set()
+        self.dynamic_watches = {}
+        
+        # Index des fichiers surveillés (remplace le parcours rglob périodique)
+        self.index = FileIndex(
+            str(Path("memory") / "file_index.snap"),
+            ignore=self.rules.is_ignored
+        )
+        self.monitored_roots = []
+        self.catch_up = False
+        # Gros fichiers déjà signalés : chemin -> taille au moment de l'alerte
+        self.reported_files = {}
+        
+        # Alertes écrites en lots par un thread (fichier, SQLite, webhook), débit limité
+        self.alerts = AlertDispatcher.from_config(self.config)
+        self.bus = get_alert_bus()
+        
+        # Répartition de l'espace disque (cache partagé avec le planificateur)
+        self.disk_analyzer = get_disk_analyzer(".")
+        
+        # Journal des événements (défaut: memory/file_events.jsonl, en ajout seul)
+        self.storage = storage or JournalBackend(
+            "memory",
+            max_bytes=int(self.config["events_journal_max_mb"] * 1024 * 1024),
+            backups=self.config["events_journal_backups"]
+        )
+        
         # Enfin configurer le logging
         self.setup_logging()
     
@@ -201,7 +495,31 @@ class FileMonitor:
             "alert_on_executable": True,
             "alert_on_large_files": True,
             "max_file_size_mb": 100,
-            "check_interval": 1
+            "check_interval": 1,
+            "include_patterns": None,   # globs des fichiers gardés (None = tous)
+            "exclude_patterns": None,   # globs ignorés (None = DEFAULT_EXCLUDES)
+            "max_watches": 64,
+            "debounce_seconds": 0.5,
+            "debounce_max_seconds": 5,
+            "max_pending_events": 10000,
+            "event_workers": 2,
+            "event_queue_size": 1000,
+            "event_queue_timeout": 0.5,
+            "index_rescan_hours": 24,
+            "snapshot_workers": 8,
+            "missed_events_max": 1000,
+            "hash_full_max_mb": 100,
+            "hash_quick_fingerprint": True,
+            "secret_scan_max_mb": 10,
+            "events_journal_max_mb": 5,
+            "events_journal_backups": 3,
+            "alert_sinks": ["file"],    # file, sqlite, webhook
+            "alert_log_file": "logs/file_alerts.log",
+            "alert_db_path": "memory/agent_memory.db",
+            "alert_webhook_url": "http://127.0.0.1:8765/alerts",
+            "alert_rate_per_minute": 60,
+            "alert_burst": 20,
+            "alert_flush_seconds": 1.0
         }
         
         if config_path and Path(config_path).exists():
@@ -216,55 +534,60 @@ class FileMonitor:
         return default_config
     
     def add_event(self, event_data):
-        """Ajoute un événement à la liste"""
+        """Ajoute un événement à la fenêtre en mémoire et au journal"""
+        # La deque borne la fenêtre aux max_events derniers événements
         self.events.append(event_data)
         
-        # Garder seulement les N derniers événements
-        if len(self.events) > self.max_events:
-            self.events = self.events[-self.max_events:]
-        
-        # Sauvegarder périodiquement
-        if len(self.events) % 10 == 0:
-            self.save_events()
+        try:
+            self.storage.append(self.EVENTS_COLLECTION, event_data)
+        except Exception as e:
+            logger.error(f"Error saving event: {e}")
     
     def save_events(self):
-        """Sauvegarde les événements dans un fichier"""
+        """Écrit les événements encore en tampon"""
         try:
-            events_file = Path("memory") / "file_events.json"
-            events_file.parent.mkdir(exist_ok=True)
-            
-            with open(events_file, 'w', encoding='utf-8') as f:
-                json.dump(self.events[-100:], f, indent=2)  # Garder 100 derniers
+            self.storage.flush()
         except Exception as e:
             logger.error(f"Error saving events: {e}")
     
     def load_events(self):
-        """Charge les événements depuis un fichier"""
+        """Charge les derniers événements (lecture de la fin du journal uniquement)"""
         try:
-            events_file = Path("memory") / "file_events.json"
-            if events_file.exists():
-                with open(events_file, 'r', encoding='utf-8') as f:
-                    self.events = json.load(f)
-        except:
-            self.events = []
+            self._import_legacy_events()
+            self.events = deque(self.storage.tail(self.EVENTS_COLLECTION, 100),
+                                maxlen=self.max_events)
+        except Exception as e:
+            logger.error(f"Error loading events: {e}")
+            self.events = deque(maxlen=self.max_events)
     
-    def send_alert(self, message):
-        """Envoie une alerte"""
-        alert_msg = f"ALERT: {message}"
-        logger.warning(alert_msg)
+    def _import_legacy_events(self):
+        """Reprend l'ancien fichier memory/file_events.json une seule fois"""
+        events_file = Path("memory") / "file_events.json"
+        if not events_file.exists() or self.storage.count(self.EVENTS_COLLECTION):
+            return
         
-        # Sauvegarder l'alerte
+        with open(events_file, 'r', encoding='utf-8') as f:
+            self.storage.append_many(self.EVENTS_COLLECTION, json.load(f))
+        self.storage.flush()
+        events_file.rename(events_file.with_suffix(".json.imported"))
+        logger.info(f"Imported legacy events from {events_file}")
+    
+    def send_alert(self, message, level="WARNING"):
+        """Envoie une alerte (sans bloquer : écrite par le thread des sinks)"""
         alert_data = {
             "timestamp": datetime.now().isoformat(),
             "type": "file_alert",
+            "level": level,
             "message": message
         }
-        self.add_event(alert_data)
         
-        # Écrire dans un fichier d'alertes
-        alert_file = Path("logs") / "file_alerts.log"
-        with open(alert_file, 'a', encoding='utf-8') as f:
-            f.write(f"{datetime.now().isoformat()} - {message}\n")
+        # Limiteur commun d'abord : au-delà du débit autorisé, l'alerte est
+        # seulement comptée et n'atteint ni les sinks ni le bus (log, persistance)
+        if not self.alerts.publish(alert_data):
+            return
+        
+        self.bus.publish(Alert("file", level, message, kind="file_alert"))
+        self.add_event(alert_data)
     
     def start(self, paths=None):
         """Démarre la surveillance"""
@@ -294,18 +617,35 @@ class FileMonitor:
             logger.error("No valid paths to monitor")
             return False
         
+        # Index persisté à l'arrêt : run_monitor le compare au disque pour
+        # retrouver les changements survenus pendant l'arrêt
+        self.monitored_roots = valid_paths
+        self.catch_up = self.index.load()
+        
         # Créer l'observateur et le handler
         self.observer = Observer()
         self.event_handler = FileChangeHandler(self)
         
-        # Ajouter chaque chemin
+        # Ajouter chaque chemin, sans surveiller les sous-arbres ignorés
+        self.rules.set_roots(valid_paths)
+        self.shallow_watches = set()
+        self.dynamic_watches = {}
         for path in valid_paths:
-            self.observer.schedule(self.event_handler, path, recursive=True)
-            logger.info(f"Monitoring: {path}")
+            plan = self.rules.plan_watches(path, self.config.get("max_watches", 64))
+            for watch_path, recursive in plan:
+                self.observer.schedule(self.event_handler, watch_path, recursive=recursive)
+                if not recursive:
+                    self.shallow_watches.add(watch_path)
+            logger.info(f"Monitoring: {path} ({len(plan)} watches)")
+        
+        # Abonnés du bus (logs, persistance), une seule fois par processus
+        install_default_subscribers(self.bus, self.config.get("alert_db_path",
+                                                               "memory/agent_memory.db"))
         
         # Démarrer l'observateur
         try:
             self.observer.start()
+            self.event_handler.start()
             self.running = True
             
             # Démarrer un thread pour la surveillance continue
@@ -319,6 +659,27 @@ class FileMonitor:
             logger.error(f"Failed to start FileMonitor: {e}")
             return False
     
+    def watch_new_directory(self, path):
+        """Dossier créé sous une surveillance non récursive : il faut le surveiller"""
+        if os.path.dirname(path) not in self.shallow_watches:
+            return
+        if self.rules.is_ignored(path, is_dir=True) or path in self.dynamic_watches:
+            return
+        try:
+            self.dynamic_watches[path] = self.observer.schedule(
+                self.event_handler, path, recursive=True
+            )
+        except Exception as e:
+            logger.debug(f"Could not watch {path}: {e}")
+    
+    def unwatch_directory(self, path):
+        watch = self.dynamic_watches.pop(path, None)
+        if watch is not None:
+            try:
+                self.observer.unschedule(watch)
+            except Exception:
+                pass
+    
     def run_monitor(self):
         """Boucle principale de surveillance"""
         while self.running:
@@ -326,8 +687,19 @@ class FileMonitor:
                 # Vérifier l'espace disque périodiquement
                 self.check_disk_space()
                 
+                # Reconstruction complète : au démarrage, puis rare vérification de cohérence
+                max_age = self.config.get("index_rescan_hours", 24) * 3600
+                if self.catch_up or self.index.needs_rescan(self.monitored_roots, max_age):
+                    had_index = self.catch_up or bool(self.index.built_at)
+                    self.catch_up = False
+                    changes = self.index.scan(self.monitored_roots,
+                                              workers=self.config.get("snapshot_workers", 8))
+                    if had_index and changes:
+                        self.report_missed_changes(changes)
+                
                 # Vérifier les fichiers volumineux
                 self.check_large_files()
+                self.index.save()
                 
                 time.sleep(60)  # Vérifier toutes les minutes
                 
@@ -335,6 +707,25 @@ class FileMonitor:
                 logger.error(f"Error in monitor loop: {e}")
                 time.sleep(30)
     
+    def report_missed_changes(self, changes):
+        """Changements trouvés par l'instantané (moniteur arrêté, événements perdus)"""
+        summary = changes.summary()
+        logger.info(f"Changes while not watching: {summary}")
+        self.add_event({
+            "timestamp": datetime.now().isoformat(),
+            "type": "missed_changes",
+            **summary
+        })
+        
+        # Traités comme des événements normaux (empreinte, règles), dans la limite
+        limit = self.config.get("missed_events_max", 1000)
+        batches = (("created", changes.created), ("modified", changes.modified),
+                   ("deleted", changes.deleted))
+        for event_type, paths in batches:
+            for path in paths[:limit]:
+                self.event_handler._dispatch(event_type, path)
+            limit -= min(limit, len(paths))
+    
     def check_disk_space(self):
         """Vérifie l'espace disque"""
         try:
@@ -343,7 +734,12 @@ class FileMonitor:
             percent_used = (usage.used / usage.total) * 100
             
             if percent_used > 90:
-                self.send_alert(f"Disk space critical: {percent_used:.1f}% used")
+                # Désigner ce qui occupe la place (analyse en cache, tenue à jour par les événements)
+                self.send_alert(
+                    f"Disk space critical: {percent_used:.1f}% used - "
+                    f"{self.disk_analyzer.describe()}",
+                    level="CRITICAL"
+                )
             elif percent_used > 80:
                 logger.warning(f"Disk space high: {percent_used:.1f}% used")
                 
@@ -351,35 +747,26 @@ class FileMonitor:
             logger.error(f"Error checking disk space: {e}")
     
     def check_large_files(self):
-        """Recherche les fichiers volumineux"""
+        """Signale les fichiers volumineux (requête sur l'index trié par taille)"""
         threshold_mb = self.config.get("max_file_size_mb", 100)
+        large_files = self.index.larger_than(threshold_mb * 1024 * 1024)
         
-        for path_str in self.config.get("monitored_paths", []):
-            path = Path(path_str)
-            if not path.exists():
+        # Oublier les fichiers supprimés ou redevenus petits (ensemble borné)
+        current = dict(large_files)
+        for path in list(self.reported_files):
+            if path not in current:
+                del self.reported_files[path]
+        
+        for path, size in large_files:
+            # Ne pas alerter plusieurs fois pour le même fichier
+            if path in self.reported_files:
                 continue
             
-            try:
-                for file_path in path.rglob("*"):
-                    if file_path.is_file():
-                        try:
-                            size_mb = file_path.stat().st_size / (1024 * 1024)
-                            if size_mb > threshold_mb:
-                                # Ne pas alerter plusieurs fois pour le même fichier
-                                file_id = f"large_file_{file_path}"
-                                if not hasattr(self, 'reported_files'):
-                                    self.reported_files = set()
-                                
-                                if file_id not in self.reported_files:
-                                    self.send_alert(
-                                        f"Large file: {file_path.relative_to('.')} "
-                                        f"({size_mb:.1f} MB)"
-                                    )
-                                    self.reported_files.add(file_id)
-                        except:
-                            continue
-            except Exception as e:
-                logger.debug(f"Error checking large files in {path}: {e}")
+            self.send_alert(
+                f"Large file: {os.path.relpath(path)} "
+                f"({size / (1024 * 1024):.1f} MB)"
+            )
+            self.reported_files[path] = size
     
     def stop(self):
         """Arrête la surveillance"""
@@ -393,6 +780,11 @@ class FileMonitor:
             except:
                 pass
             
+            # Traiter les événements encore en attente de fusion
+            self.event_handler.stop()
+            self.index.save()
+            self.alerts.stop()
+            
             # Sauvegarder les événements
             self.save_events()
             
@@ -403,13 +795,21 @@ class FileMonitor:
     
     def get_recent_events(self, limit=20):
         """Retourne les événements récents"""
-        return self.events[-limit:] if self.events else []
+        return list(self.events)[-limit:] if self.events else []
     
     def get_stats(self):
         """Retourne des statistiques"""
         return {
             "status": "running" if self.running else "stopped",
             "events_count": len(self.events),
+            "events_coalesced": self.event_handler.coalesced if self.event_handler else 0,
+            "events_dropped": self.event_handler.dropped if self.event_handler else 0,
+            "events_overflow": self.event_handler.overflow if self.event_handler else 0,
+            "events_queued": self.event_handler.tasks.qsize() if self.event_handler else 0,
+            "hash_cache": self.hasher.get_stats(),
+            "secret_scanner": self.scanner.get_stats(),
+            "indexed_files": len(self.index),
+            "alerts": self.alerts.get_stats(),
             "monitored_paths": self.config.get("monitored_paths", []),
             "last_check": datetime.now().isoformat()
         }
@@ -494,29 +894,29 @@ def create_file_monitor_commands(agent):
         except:
             threshold = 50
         
-        large_files = []
-        for path_str in monitor.config.get("monitored_paths", []):
-            path = Path(path_str)
-            if not path.exists():
-                continue
-            
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        size_mb = file_path.stat().st_size / (1024 * 1024)
-                        if size_mb > threshold:
-                            large_files.append({
-                                "path": str(file_path.relative_to('.')),
-                                "size_mb": round(size_mb, 2)
-                            })
-                    except:
-                        continue
+        # Moniteur actif : index tenu à jour par les événements. Sinon index
+        # persisté, reconstruit par le parcours parallèle s'il est périmé
+        if not monitor.running:
+            roots = [str(Path(p).absolute())
+                     for p in monitor.config.get("monitored_paths", monitor.default_paths)
+                     if Path(p).exists()]
+            if not monitor.index.built_at:
+                monitor.index.load()
+            max_age = monitor.config.get("index_rescan_hours", 24) * 3600
+            if roots and monitor.index.needs_rescan(roots, max_age):
+                monitor.index.scan(roots, workers=monitor.config.get("snapshot_workers", 8))
+        
+        # Requête sur l'index trié par taille (déjà du plus gros au plus petit)
+        large_files = [
+            {"path": os.path.relpath(path), "size_mb": round(size / (1024 * 1024), 2)}
+            for path, size in monitor.index.larger_than(threshold * 1024 * 1024)
+        ]
         
         if not large_files:
             return f"✅ Aucun fichier de plus de {threshold} MB trouvé"
         
         output = [f"📁 Fichiers de plus de {threshold} MB:"]
-        for file_info in sorted(large_files, key=lambda x: x['size_mb'], reverse=True)[:10]:
+        for file_info in large_files[:10]:
             output.append(f"  • {file_info['path']} ({file_info['size_mb']} MB)")
         
         if len(large_files) > 10:
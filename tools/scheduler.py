@@ -50,6 +50,14 @@ class TaskScheduler:
         elif level == 'warning':
             logger.warning(message)
     
+    def publish_alert(self, level, kind, message, **data):
+        """Publie une alerte hôte sur le bus commun (en plus du log)"""
+        try:
+            from tools.alert_bus import Alert, get_alert_bus
+            get_alert_bus().publish(Alert("host", level, message, kind=kind, data=data))
+        except ImportError:
+            pass
+    
     def schedule_daily_cleanup(self, hour=2, minute=0):
         """Planifie le nettoyage quotidien"""
         def cleanup_job():
@@ -91,11 +99,14 @@ class TaskScheduler:
         })
         self.safe_log('info', f'Nettoyage planifie a {hour:02d}:{minute:02d}')
     
-    def schedule_backup(self, hour=3, minute=0):
-        """Planifie la sauvegarde quotidienne"""
+    def schedule_backup(self, hour=3, minute=0, incremental=False):
+        """Planifie la sauvegarde quotidienne (incremental: magasin dédupliqué)"""
         def backup_job():
             self.safe_log('info', 'Execution de la sauvegarde quotidienne')
             try:
+                if incremental:
+                    self.run_incremental_backup()
+                    return
                 if self.is_windows:
                     # Vérifier si le script PowerShell existe
                     ps_script = Path("scripts/backup.ps1")
@@ -124,7 +135,8 @@ class TaskScheduler:
         self.tasks.append({
             "name": "daily_backup",
             "time": f"{hour:02d}:{minute:02d}",
-            "type": "daily"
+            "type": "daily",
+            "mode": "incremental" if incremental else "full"
         })
         self.safe_log('info', f'Sauvegarde planifiee a {hour:02d}:{minute:02d}')
     
@@ -140,10 +152,29 @@ class TaskScheduler:
                 
                 if percent_used > 90:
                     self.safe_log('warning', f'Espace disque critique: {percent_used:.1f}% utilise')
+                    self.publish_alert('CRITICAL', 'disk_space',
+                                       f'Disk space critical: {percent_used:.1f}% used',
+                                       percent_used=round(percent_used, 1))
+                    # Ce qui occupe la place (analyse en cache partagée avec le FileMonitor)
+                    try:
+                        from tools.disk_analyzer import get_disk_analyzer, format_size
+                        report = get_disk_analyzer(".").report(n=5)
+                        # Analyse limitée au dossier de travail, pas à toute la partition
+                        self.safe_log('warning', f'  Analyse limitee a {report["root"]}: '
+                                                 f'{format_size(report["total_bytes"])}')
+                        for name, size in report["top_directories"]:
+                            self.safe_log('warning', f'  Dossier {name}: {format_size(size)}')
+                        for name, size in report["top_files"]:
+                            self.safe_log('warning', f'  Fichier {name}: {format_size(size)}')
+                    except Exception as e:
+                        self.safe_log('error', f'Erreur analyse disque: {e}')
                     # Déclencher un cleanup d'urgence
                     self.run_cleanup_now()
                 elif percent_used > 80:
                     self.safe_log('warning', f'Espace disque eleve: {percent_used:.1f}% utilise')
+                    self.publish_alert('WARNING', 'disk_space',
+                                       f'Disk space high: {percent_used:.1f}% used',
+                                       percent_used=round(percent_used, 1))
                 else:
                     self.safe_log('info', f'Espace disque OK: {percent_used:.1f}% utilise')
                     
@@ -158,6 +189,29 @@ class TaskScheduler:
         })
         self.safe_log('info', f'Verification sante planifiee toutes les {interval_minutes} minutes')
     
+    def schedule_memory_retention(self, hour=4, minute=0, db_path="memory/agent_memory.db"):
+        """Planifie la rétention de la mémoire SQLite (rollup + purge + vacuum)"""
+        def retention_job():
+            self.safe_log('info', 'Application de la retention memoire')
+            try:
+                from memory.sqlite_memory import AgentMemory
+                memory = AgentMemory(db_path, async_writes=False)
+                try:
+                    stats = memory.apply_retention()
+                finally:
+                    memory.close()
+                self.safe_log('info', f'Retention terminee: {stats}')
+            except Exception as e:
+                self.safe_log('error', f'Exception retention: {e}')
+        
+        schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(retention_job)
+        self.tasks.append({
+            "name": "memory_retention",
+            "time": f"{hour:02d}:{minute:02d}",
+            "type": "daily"
+        })
+        self.safe_log('info', f'Retention memoire planifiee a {hour:02d}:{minute:02d}')
+    
     def run_cleanup_now(self):
         """Exécute un nettoyage immédiat"""
         self.safe_log('info', 'Nettoyage immediat declenche')
@@ -167,124 +221,88 @@ class TaskScheduler:
         except Exception as e:
             self.safe_log('error', f'Exception nettoyage immediat: {e}')
     
-    def run_python_cleanup(self):
-        """Nettoyage en Python pur (multi-plateforme)"""
-        import os
-        from datetime import datetime, timedelta
+    def run_python_cleanup(self, dry_run=False, max_delete_mb=None):
+        """Nettoyage en Python pur (multi-plateforme), un seul parcours du dossier"""
+        from tools.cleanup_walker import CleanupWalker
         
         self.safe_log('info', 'Demarrage du nettoyage Python...')
         
-        deleted_count = 0
-        deleted_size = 0
-        days_old = 7
-        
-        # Patterns de fichiers à supprimer
-        patterns = ['.log', '.tmp', '.temp', '.cache', '.swp']
-        
-        for root, dirs, files in os.walk('.'):
-            # Ignorer certains dossiers
-            if '__pycache__' in root or '.git' in root:
-                continue
-                
-            for file in files:
-                # Vérifier l'extension
-                if any(file.endswith(pattern) for pattern in patterns):
-                    filepath = os.path.join(root, file)
-                    try:
-                        # Vérifier l'âge du fichier
-                        mod_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-                        age = datetime.now() - mod_time
-                        
-                        if age.days > days_old:
-                            # Supprimer le fichier
-                            file_size = os.path.getsize(filepath)
-                            os.remove(filepath)
-                            deleted_count += 1
-                            deleted_size += file_size
-                            self.safe_log('debug', f'Supprime: {filepath}')
-                    except Exception as e:
-                        self.safe_log('debug', f'Erreur avec {filepath}: {e}')
+        # Fichiers temporaires de plus de 7 jours et dossiers __pycache__ (.git jamais parcouru)
+        walker = CleanupWalker(
+            suffixes=['.log', '.tmp', '.temp', '.cache', '.swp'],
+            max_age_days=7,
+            dry_run=dry_run,
+            max_bytes=max_delete_mb * 1024 * 1024 if max_delete_mb else None
+        )
+        report = walker.run('.')
         
-        # Nettoyer les dossiers __pycache__
-        for root, dirs, files in os.walk('.'):
-            if '__pycache__' in root:
-                try:
-                    import shutil
-                    shutil.rmtree(root)
-                    self.safe_log('debug', f'Supprime dossier: {root}')
-                except:
-                    pass
+        for path in report["paths"]:
+            self.safe_log('debug', f'Supprime: {path}')
+        if report["capped"]:
+            self.safe_log('warning', 'Plafond de suppression atteint, nettoyage partiel')
         
-        self.safe_log('info', f'Nettoyage termine: {deleted_count} fichiers supprimes, {deleted_size/1024/1024:.2f} MB liberes')
+        action = 'a supprimer (simulation)' if dry_run else 'supprimes'
+        self.safe_log('info', f'Nettoyage termine: {report["deleted_files"]} fichiers et '
+                              f'{report["deleted_dirs"]} dossiers {action}, '
+                              f'{report["deleted_bytes"]/1024/1024:.2f} MB en {report["seconds"]}s')
+        return report
     
-    def run_backup_now(self):
+    def run_backup_now(self, incremental=False):
         """Exécute une sauvegarde immédiate"""
         self.safe_log('info', 'Sauvegarde immediate declenchee')
         try:
             # Sauvegarde en Python pur
-            self.run_python_backup()
+            if incremental:
+                self.run_incremental_backup()
+            else:
+                self.run_python_backup()
         except Exception as e:
             self.safe_log('error', f'Exception sauvegarde immediate: {e}')
     
-    def run_python_backup(self):
-        """Sauvegarde en Python pur"""
-        import shutil
+    def run_python_backup(self, compression_level=6):
+        """Sauvegarde en Python pur (archive écrite en flux, sans copie temporaire)"""
         from datetime import datetime
+        from tools.backup_archiver import create_archive, rotate_backups
         
         self.safe_log('info', 'Demarrage de la sauvegarde Python...')
         
         # Créer le nom de la sauvegarde
         backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        backup_dir = Path("backups") / backup_name
-        backup_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Dossiers à sauvegarder
-        dirs_to_backup = ["agent", "tools", "config", "scripts", "models"]
+        zip_path = Path("backups") / f"{backup_name}.zip"
         
-        for dir_name in dirs_to_backup:
-            dir_path = Path(dir_name)
-            if dir_path.exists():
-                try:
-                    # Copier le dossier
-                    dest_dir = backup_dir / dir_name
-                    shutil.copytree(dir_path, dest_dir)
-                    self.safe_log('debug', f'Copie: {dir_name}')
-                except Exception as e:
-                    self.safe_log('warning', f'Erreur copie {dir_name}: {e}')
+        # Dossiers et fichiers importants à sauvegarder
+        sources = ["agent", "tools", "config", "scripts", "models",
+                   "requirements.txt", "README.md", "run_agent.py", ".gitignore"]
         
-        # Copier les fichiers importants
-        important_files = ["requirements.txt", "README.md", "run_agent.py", ".gitignore"]
-        for file_name in important_files:
-            file_path = Path(file_name)
-            if file_path.exists():
-                try:
-                    shutil.copy2(file_path, backup_dir / file_name)
-                except:
-                    pass
+        stats = create_archive(zip_path, sources, compression_level=compression_level)
+        if stats["errors"]:
+            self.safe_log('warning', f'{stats["errors"]} fichiers non sauvegardes')
         
-        # Créer une archive ZIP
-        import zipfile
-        zip_path = Path("backups") / f"{backup_name}.zip"
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in backup_dir.rglob('*'):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(backup_dir)
-                    zipf.write(file_path, arcname)
+        # Rotation des sauvegardes (garder 5 dernières)
+        rotate_backups("backups", keep=5)
         
-        # Supprimer le dossier temporaire
-        shutil.rmtree(backup_dir)
+        self.safe_log('info', f'Sauvegarde terminee: {zip_path.name} - {stats["files"]} fichiers, '
+                              f'{stats["bytes_in"]/1024/1024:.1f} MB -> {stats["bytes_out"]/1024/1024:.1f} MB '
+                              f'en {stats["seconds"]}s ({stats["mb_per_s"]} MB/s)')
+    
+    def run_incremental_backup(self, keep=5):
+        """Instantané incrémental : seuls les fichiers modifiés sont relus et stockés"""
+        from tools.backup_store import BackupStore
         
-        # Rotation des sauvegardes (garder 5 dernières)
-        backups = list(Path("backups").glob("*.zip"))
-        backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        self.safe_log('info', 'Demarrage de la sauvegarde incrementale...')
+        store = BackupStore("backups/store")
+        stats = store.backup(["agent", "tools", "config", "scripts", "models",
+                              "requirements.txt", "README.md", "run_agent.py", ".gitignore"])
+        if stats["errors"]:
+            self.safe_log('warning', f'{stats["errors"]} fichiers non sauvegardes')
         
-        for old_backup in backups[5:]:
-            try:
-                old_backup.unlink()
-            except:
-                pass
+        # Rotation : instantanés au-delà de `keep` et blocs plus référencés
+        removed = store.prune(keep=keep)
         
-        self.safe_log('info', f'Sauvegarde terminee: {zip_path.name}')
+        self.safe_log('info', f'Sauvegarde incrementale terminee: {stats["snapshot"]} - '
+                              f'{stats["changed"]}/{stats["files"]} fichiers modifies, '
+                              f'{stats["bytes_written"]/1024/1024:.1f} MB ecrits, '
+                              f'{removed} blocs supprimes, en {stats["seconds"]}s')
     
     def run_continuously(self):
         """Exécute le scheduler en continu"""
@@ -301,6 +319,14 @@ class TaskScheduler:
         self.schedule_daily_cleanup(hour=2, minute=0)
         self.schedule_backup(hour=3, minute=0)
         self.schedule_health_check(interval_minutes=30)
+        self.schedule_memory_retention(hour=4, minute=0)
+        
+        # Abonnés du bus d'alertes (logs, persistance)
+        try:
+            from tools.alert_bus import install_default_subscribers
+            install_default_subscribers()
+        except ImportError:
+            pass
         
         # Démarrer le thread
         self.thread = threading.Thread(target=self.run_continuously, daemon=True)
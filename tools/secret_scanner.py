@@ -0,0 +1,167 @@
+"""
+Détection de secrets dans les fichiers surveillés
+Expressions compilées en une seule passe (mots-clés + formats de clés connus),
+contrôle d'entropie, lecture par blocs et verdicts en cache par empreinte
+"""
+import re
+import math
+import threading
+from collections import Counter, OrderedDict
+
+# Formats de secrets connus : nom -> expression (sur octets)
+SECRET_PATTERNS = {
+    "private_key": rb"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY",
+    "aws_access_key": rb"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": rb"\bgh[pousr]_[A-Za-z0-9]{36,}\b",
+    "slack_token": rb"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    "google_api_key": rb"\bAIza[0-9A-Za-z_\-]{35}",
+    "jwt": rb"\beyJ[A-Za-z0-9_\-]{10,}\.eyJ[A-Za-z0-9_\-]{10,}\.[A-Za-z0-9_\-]{10,}",
+}
+
+# Mots sensibles (règle historique du FileMonitor)
+SENSITIVE_KEYWORDS = ["password", "secret", "key", "token", "credential"]
+
+# Affectation d'une valeur à un nom sensible : la valeur passe le contrôle d'entropie
+ASSIGNMENT_PATTERN = (rb"(password|passwd|secret|token|api_?key|access_?key)"
+                      rb"[\"']?\s*[:=]\s*[\"']?([^\s\"',;]{8,})")
+
+# Chaînes candidates pour le contrôle d'entropie (base64 / hexadécimal)
+TOKEN_PATTERN = rb"[A-Za-z0-9+/=_\-]{24,}"
+
+
+def shannon_entropy(data):
+    """Entropie de Shannon en bits par caractère"""
+    if not data:
+        return 0.0
+    length = len(data)
+    return -sum(count / length * math.log2(count / length) for count in Counter(data).values())
+
+
+class SecretScanner:
+    """Scanner multi-motifs avec cache des verdicts par empreinte de contenu"""
+
+    # Recouvrement entre blocs pour ne pas couper un motif en deux
+    OVERLAP = 512
+
+    def __init__(self,
+                 keywords=None,
+                 patterns=None,
+                 entropy_threshold=4.5,
+                 assignment_entropy=3.0,
+                 max_cache=10000):
+        """
+        Args:
+            keywords: Mots sensibles (défaut: SENSITIVE_KEYWORDS)
+            patterns: Formats de secrets nom -> regex (défaut: SECRET_PATTERNS)
+            entropy_threshold: Entropie minimale d'une chaîne isolée suspecte
+            assignment_entropy: Entropie minimale d'une valeur affectée à un nom sensible
+            max_cache: Nombre de verdicts gardés en cache
+        """
+        keywords = keywords or SENSITIVE_KEYWORDS
+        patterns = patterns or SECRET_PATTERNS
+
+        # Une seule expression : un groupe nommé par motif
+        alternatives = [b"(?P<%s>%s)" % (name.encode(), regex) for name, regex in patterns.items()]
+        self.secret_regex = re.compile(b"|".join(alternatives))
+        self.keyword_regex = re.compile(
+            b"|".join(re.escape(k.encode()) for k in keywords), re.IGNORECASE
+        )
+        self.assignment_regex = re.compile(ASSIGNMENT_PATTERN, re.IGNORECASE)
+        self.token_regex = re.compile(TOKEN_PATTERN)
+        self.entropy_threshold = entropy_threshold
+        self.assignment_entropy = assignment_entropy
+
+        self.max_cache = max_cache
+        self.verdicts = OrderedDict()
+        self.scanned = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def session(self):
+        """Nouvelle analyse incrémentale (à alimenter bloc par bloc)"""
+        return ScanSession(self)
+
+    def scan_file(self, path, chunk_size=1024 * 1024):
+        """Analyse complète d'un fichier, par blocs"""
+        session = self.session()
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                session.feed(chunk)
+        return session.result()
+
+    def cached(self, digest):
+        """Verdict déjà calculé pour ce contenu (None si inconnu)"""
+        if not digest:
+            return None
+        with self._lock:
+            verdict = self.verdicts.get(digest)
+            if verdict is not None:
+                self.verdicts.move_to_end(digest)
+                self.cache_hits += 1
+            return verdict
+
+    def store(self, digest, verdict):
+        if not digest:
+            return
+        with self._lock:
+            self.scanned += 1
+            self.verdicts[digest] = verdict
+            while len(self.verdicts) > self.max_cache:
+                self.verdicts.popitem(last=False)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "verdicts": len(self.verdicts),
+                "scanned": self.scanned,
+                "cache_hits": self.cache_hits
+            }
+
+
+class ScanSession:
+    """État d'une analyse en cours (résultats dédupliqués par règle)"""
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.tail = b""
+        self.fed = False
+        self.findings = {}  # règle -> détail (premier trouvé)
+
+    def _add(self, rule, detail):
+        self.findings.setdefault(rule, detail)
+
+    def feed(self, chunk):
+        self.fed = True
+        scanner = self.scanner
+        data = self.tail + chunk
+
+        for match in scanner.secret_regex.finditer(data):
+            self._add(match.lastgroup, match.lastgroup)
+
+        # Les détails ne reprennent jamais la valeur trouvée (pas de secret dans les alertes)
+        if "keyword" not in self.findings:
+            match = scanner.keyword_regex.search(data)
+            if match:
+                self._add("keyword", match.group(0).lower().decode())
+
+        if "credential_assignment" not in self.findings:
+            for match in scanner.assignment_regex.finditer(data):
+                if shannon_entropy(match.group(2)) >= scanner.assignment_entropy:
+                    self._add("credential_assignment", match.group(1).lower().decode())
+                    break
+
+        # Pas de contrôle d'entropie sur le binaire (faux positifs)
+        if b"\0" not in chunk and "high_entropy_string" not in self.findings:
+            for match in scanner.token_regex.finditer(data):
+                if shannon_entropy(match.group(0)) >= scanner.entropy_threshold:
+                    self._add("high_entropy_string", f"{len(match.group(0))} chars")
+                    break
+
+        self.tail = data[-scanner.OVERLAP:]
+
+    def result(self):
+        """Verdict : règle -> détail (vide si rien de suspect)"""
+        return dict(self.findings)
@@ -1,7 +1,573 @@
 import psutil
+import heapq
 import json
+import os
+import time
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import Future, wait
 from datetime import datetime
 
+
+class CpuSampler:
+    """Fenêtre glissante d'échantillons CPU, alimentée par HostMetricsCollector"""
+    
+    def __init__(self, interval: float = 1.0, window: int = 60):
+        """
+        Args:
+            interval: Période d'échantillonnage en secondes
+            window: Nombre d'échantillons conservés dans la fenêtre glissante
+        """
+        self.interval = interval
+        self.window = window
+        self.samples = deque(maxlen=window)
+        self.freq = None
+        self.count = psutil.cpu_count(logical=False)
+        self.count_logical = psutil.cpu_count(logical=True)
+        self._lock = threading.Lock()
+        self._primed = False
+    
+    def prime(self):
+        """Initialise les compteurs psutil (le premier appel renvoie 0.0)"""
+        if not self._primed:
+            psutil.cpu_percent(interval=None, percpu=True)
+            self._primed = True
+    
+    def sample_once(self) -> dict:
+        """Prend un échantillon depuis le précédent, sans attendre"""
+        self.prime()
+        per_cpu = psutil.cpu_percent(interval=None, percpu=True)
+        total = round(sum(per_cpu) / len(per_cpu), 1) if per_cpu else 0.0
+        
+        freq = psutil.cpu_freq()
+        sample = {
+            "timestamp": time.time(),
+            "percent": total,
+            "per_cpu": per_cpu
+        }
+        
+        with self._lock:
+            self.samples.append(sample)
+            if freq:
+                self.freq = {"current": freq.current, "max": freq.max}
+        return sample
+    
+    def latest(self) -> dict:
+        """Retourne la fenêtre courante sans bloquer"""
+        with self._lock:
+            samples = list(self.samples)
+            freq = self.freq
+        
+        if not samples:
+            # Démarrage à froid : un court échantillon bloquant une seule fois
+            self.prime()
+            time.sleep(0.1)
+            samples = [self.sample_once()]
+            freq = self.freq
+        
+        last = samples[-1]
+        window = [s["percent"] for s in samples]
+        
+        return {
+            "percent": last["percent"],
+            "per_cpu": last["per_cpu"],
+            "count": self.count,
+            "count_logical": self.count_logical,
+            "freq": {
+                "current": freq["current"] if freq else None,
+                "max": freq["max"] if freq else None
+            },
+            "window": {
+                "samples": len(window),
+                "seconds": round(last["timestamp"] - samples[0]["timestamp"], 1),
+                "avg": round(sum(window) / len(window), 1),
+                "max": max(window)
+            }
+        }
+
+
+class MetricsRingBuffer:
+    """Historique des métriques dans un tampon circulaire à colonnes array('d')"""
+    
+    FIELDS = (
+        "timestamp",
+        "cpu_percent",
+        "memory_percent", "memory_used", "memory_available", "memory_total",
+        "swap_percent", "swap_used", "swap_total",
+        "disk_percent",
+        "disk_read_bytes", "disk_write_bytes",
+        "net_bytes_sent", "net_bytes_recv",
+        "net_packets_sent", "net_packets_recv"
+    )
+    
+    # Compteurs cumulés : on expose leur débit plutôt que leur valeur
+    COUNTERS = (
+        "disk_read_bytes", "disk_write_bytes",
+        "net_bytes_sent", "net_bytes_recv",
+        "net_packets_sent", "net_packets_recv"
+    )
+    
+    def __init__(self, capacity: int = 1800):
+        self.capacity = capacity
+        self.columns = {field: array('d', bytes(8 * capacity)) for field in self.FIELDS}
+        self.head = 0  # Prochain index d'écriture
+        self.size = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return self.size
+    
+    def append(self, values: dict):
+        """Ajoute un échantillon (écrase le plus ancien si plein)"""
+        with self._lock:
+            for field in self.FIELDS:
+                self.columns[field][self.head] = values.get(field) or 0.0
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+    
+    def _indexes(self, seconds: float = None) -> list:
+        """Index des échantillons de la fenêtre, du plus ancien au plus récent"""
+        timestamps = self.columns["timestamp"]
+        indexes = []
+        cutoff = timestamps[(self.head - 1) % self.capacity] - seconds if seconds else None
+        
+        for offset in range(1, self.size + 1):
+            index = (self.head - offset) % self.capacity
+            if cutoff is not None and timestamps[index] < cutoff:
+                break
+            indexes.append(index)
+        
+        indexes.reverse()
+        return indexes
+    
+    def latest(self) -> dict:
+        """Dernier échantillon"""
+        with self._lock:
+            if not self.size:
+                return {}
+            index = (self.head - 1) % self.capacity
+            return {field: self.columns[field][index] for field in self.FIELDS}
+    
+    def window(self, field: str, seconds: float = None) -> list:
+        """Valeurs d'un champ sur les N dernières secondes"""
+        with self._lock:
+            column = self.columns[field]
+            return [column[i] for i in self._indexes(seconds)]
+    
+    def aggregate(self, field: str, seconds: float = None) -> dict:
+        """Moyenne/min/max d'un champ sur la fenêtre"""
+        values = self.window(field, seconds)
+        if not values:
+            return {"avg": None, "min": None, "max": None, "samples": 0}
+        
+        return {
+            "avg": round(sum(values) / len(values), 2),
+            "min": min(values),
+            "max": max(values),
+            "samples": len(values)
+        }
+    
+    def rate(self, field: str, seconds: float = None) -> float:
+        """Débit par seconde d'un compteur cumulé sur la fenêtre"""
+        with self._lock:
+            indexes = self._indexes(seconds)
+            if len(indexes) < 2:
+                return 0.0
+            
+            first, last = indexes[0], indexes[-1]
+            timestamps = self.columns["timestamp"]
+            column = self.columns[field]
+            elapsed = timestamps[last] - timestamps[first]
+            delta = column[last] - column[first]
+        
+        # Compteur remis à zéro (interface recréée, reboot...) : pas de débit fiable
+        if elapsed <= 0 or delta < 0:
+            return 0.0
+        return round(delta / elapsed, 2)
+
+
+class HostMetricsCollector:
+    """Collecte CPU, mémoire, swap, disque et réseau dans un tampon circulaire"""
+    
+    def __init__(self, interval: float = 1.0, capacity: int = 1800, disk_path: str = None,
+                 process_interval: float = 5.0):
+        """
+        Args:
+            interval: Période d'échantillonnage en secondes
+            capacity: Nombre d'échantillons conservés
+            disk_path: Point de montage suivi pour le pourcentage disque
+            process_interval: Période de balayage de la table des processus
+        """
+        self.interval = interval
+        self.process_interval = process_interval
+        self.process_table = ProcessTable()
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self.buffer = MetricsRingBuffer(capacity)
+        self.cpu_sampler = CpuSampler(interval=interval, window=60)
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+    
+    def sample_once(self) -> dict:
+        """Interroge le noyau une fois et enregistre l'échantillon"""
+        cpu = self.cpu_sampler.sample_once()
+        mem = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        
+        values = {
+            "timestamp": cpu["timestamp"],
+            "cpu_percent": cpu["percent"],
+            "memory_percent": mem.percent,
+            "memory_used": mem.used,
+            "memory_available": mem.available,
+            "memory_total": mem.total,
+            "swap_percent": swap.percent,
+            "swap_used": swap.used,
+            "swap_total": swap.total
+        }
+        
+        try:
+            values["disk_percent"] = psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            pass
+        
+        disk_io = psutil.disk_io_counters()
+        if disk_io:
+            values["disk_read_bytes"] = disk_io.read_bytes
+            values["disk_write_bytes"] = disk_io.write_bytes
+        
+        net_io = psutil.net_io_counters()
+        if net_io:
+            values["net_bytes_sent"] = net_io.bytes_sent
+            values["net_bytes_recv"] = net_io.bytes_recv
+            values["net_packets_sent"] = net_io.packets_sent
+            values["net_packets_recv"] = net_io.packets_recv
+        
+        self.buffer.append(values)
+        return values
+    
+    def start(self):
+        """Démarre le thread de collecte"""
+        if self.running:
+            return False
+        
+        self.cpu_sampler.prime()
+        self._stop_event.clear()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return True
+    
+    def stop(self):
+        """Arrête le thread de collecte"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+    
+    def _sample_processes(self):
+        try:
+            self.process_table.snapshot()
+        except Exception:
+            pass
+    
+    def _run(self):
+        """Boucle de collecte à cadence fixe (table des processus à sa propre cadence)"""
+        # Premier balayage : référence pour les cpu_percent du suivant
+        self._sample_processes()
+        next_scan = time.monotonic() + self.process_interval
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample_once()
+            except Exception:
+                pass
+            if time.monotonic() >= next_scan:
+                self._sample_processes()
+                next_scan = time.monotonic() + self.process_interval
+    
+    def latest(self) -> dict:
+        """Dernier échantillon (en prend un si le tampon est vide)"""
+        if not len(self.buffer):
+            self.cpu_sampler.prime()
+            time.sleep(0.1)
+            return self.sample_once()
+        return self.buffer.latest()
+    
+    def get_rates(self, seconds: float = 60) -> dict:
+        """Débits (octets/s, paquets/s) calculés sur la fenêtre"""
+        return {field + "_per_sec": self.buffer.rate(field, seconds)
+                for field in MetricsRingBuffer.COUNTERS}
+    
+    def get_summary(self, seconds: float = 300) -> dict:
+        """Agrégats fenêtrés pour les principaux indicateurs"""
+        return {
+            "window_seconds": seconds,
+            "cpu_percent": self.buffer.aggregate("cpu_percent", seconds),
+            "memory_percent": self.buffer.aggregate("memory_percent", seconds),
+            "swap_percent": self.buffer.aggregate("swap_percent", seconds),
+            "disk_percent": self.buffer.aggregate("disk_percent", seconds),
+            "rates": self.get_rates(seconds)
+        }
+
+
+class ProcessTable:
+    """Vue top-N des processus (CPU, RSS, IO) par balayage psutil.process_iter"""
+    
+    # Attributs restreints : process_iter ne lit que ce qui est demandé (oneshot)
+    ATTRS = ["pid", "name", "cpu_percent", "memory_info", "io_counters"]
+    
+    def __init__(self):
+        self.processes = {}  # pid -> psutil.Process réutilisé entre les balayages
+        self.last_io = {}    # pid -> (timestamp, octets lus + écrits)
+        self.last_scan_ms = 0.0
+        self.rows = []       # dernier balayage, lu par top()
+        self.scans = 0
+        self.sampled_at = 0.0
+        self._lock = threading.Lock()       # protège l'état publié (rows, compteurs)
+        self._scan_lock = threading.Lock()  # un seul balayage à la fois
+    
+    def snapshot(self) -> list:
+        """Balaye la table des processus et retourne une ligne par processus
+
+        Le balayage se fait hors verrou : top() lit le balayage précédent
+        pendant ce temps, le nouveau est substitué d'un coup à la fin.
+        """
+        with self._scan_lock:
+            with self._lock:
+                processes = self.processes
+                last_io = self.last_io
+            
+            start = time.perf_counter()
+            now = time.time()
+            rows = []
+            seen = {}
+            io_seen = {}
+            
+            for proc in psutil.process_iter(self.ATTRS, ad_value=None):
+                info = proc.info
+                pid = info["pid"]
+                
+                # Premier échantillon d'un processus : cpu_percent n'a pas de référence
+                known = processes.get(pid)
+                warming = known is None or known is not proc
+                seen[pid] = proc
+                
+                mem = info.get("memory_info")
+                io = info.get("io_counters")
+                io_rate = 0.0
+                if io is not None:
+                    io_total = io.read_bytes + io.write_bytes
+                    io_seen[pid] = (now, io_total)
+                    previous = last_io.get(pid)
+                    if previous and not warming and now > previous[0]:
+                        io_rate = max(io_total - previous[1], 0) / (now - previous[0])
+                
+                rows.append({
+                    "pid": pid,
+                    "name": info.get("name") or "?",
+                    "cpu_percent": 0.0 if warming else (info.get("cpu_percent") or 0.0),
+                    "rss_mb": round(mem.rss / (1024**2), 1) if mem else 0.0,
+                    "io_bytes_per_sec": round(io_rate, 1)
+                })
+            
+            scan_ms = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                # Oublie les processus terminés
+                self.processes = seen
+                self.last_io = io_seen
+                self.last_scan_ms = scan_ms
+                self.rows = rows
+                self.scans += 1
+                self.sampled_at = now
+            return rows
+    
+    def top(self, n: int = 5) -> dict:
+        """Top-N des processus par CPU, mémoire résidente et IO (dernier balayage, sans relire)"""
+        with self._lock:
+            rows = self.rows
+            # Premier balayage seul : pas encore de référence pour cpu_percent
+            warming = self.scans < 2
+            scan_ms = self.last_scan_ms
+            sampled_at = self.sampled_at
+        return {
+            "process_count": len(rows),
+            "scan_ms": scan_ms,
+            "sampled_at": sampled_at,
+            "warming": warming,
+            "cpu": heapq.nlargest(n, rows, key=lambda r: r["cpu_percent"]),
+            "rss": heapq.nlargest(n, rows, key=lambda r: r["rss_mb"]),
+            "io": heapq.nlargest(n, rows, key=lambda r: r["io_bytes_per_sec"])
+        }
+
+
+class DiskCollector:
+    """Usage des partitions avec timeout par point de montage et débits IO"""
+    
+    # Systèmes de fichiers réseau : disk_usage peut y bloquer plusieurs secondes
+    NETWORK_FSTYPES = {
+        "nfs", "nfs4", "cifs", "smbfs", "smb3", "sshfs", "fuse.sshfs",
+        "afs", "9p", "davfs", "glusterfs", "ceph", "fuse.glusterfs"
+    }
+    REMOVABLE_OPTS = {"cdrom", "removable"}
+    
+    def __init__(self, timeout: float = 1.0, partitions_ttl: float = 300,
+                 include_network: bool = False, include_removable: bool = False):
+        """
+        Args:
+            timeout: Délai maximal d'attente de disk_usage par point de montage
+            partitions_ttl: Durée de cache de la liste des partitions (secondes)
+            include_network: Interroge aussi les montages réseau
+            include_removable: Interroge aussi les lecteurs amovibles
+        """
+        self.timeout = timeout
+        self.partitions_ttl = partitions_ttl
+        self.include_network = include_network
+        self.include_removable = include_removable
+        self.partitions = []
+        self.skipped = []
+        self.partitions_time = 0.0
+        self.pending = {}     # mountpoint -> future encore bloquée
+        self.last_usage = {}  # mountpoint -> dernier résultat connu
+        self.last_io = None   # (timestamp, compteurs par disque)
+        self._lock = threading.Lock()
+    
+    def _is_excluded(self, partition) -> bool:
+        """Filtre les montages réseau et amovibles"""
+        if not self.include_network and partition.fstype.lower() in self.NETWORK_FSTYPES:
+            return True
+        if not self.include_removable:
+            opts = set(partition.opts.lower().split(","))
+            if opts & self.REMOVABLE_OPTS:
+                return True
+        return False
+    
+    def get_partitions(self) -> list:
+        """Liste des partitions surveillées (mise en cache)"""
+        now = time.time()
+        if not self.partitions_time or now - self.partitions_time > self.partitions_ttl:
+            partitions, skipped = [], []
+            for partition in psutil.disk_partitions():
+                if self._is_excluded(partition):
+                    skipped.append(partition.mountpoint)
+                else:
+                    partitions.append(partition)
+            self.partitions, self.skipped = partitions, skipped
+            self.partitions_time = now
+        return self.partitions
+    
+    @staticmethod
+    def _probe(mountpoint) -> Future:
+        """disk_usage dans un thread dédié : un montage bloqué n'occupe que le sien"""
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(psutil.disk_usage(mountpoint))
+            except Exception as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name=f"disk-usage:{mountpoint}", daemon=True).start()
+        return future
+    
+    def get_usage(self) -> list:
+        """disk_usage de chaque partition, en parallèle et avec timeout"""
+        partitions = self.get_partitions()
+        futures = {}
+        
+        for partition in partitions:
+            mountpoint = partition.mountpoint
+            pending = self.pending.get(mountpoint)
+            if pending is not None and not pending.done():
+                # Un appel précédent est toujours bloqué : on ne le relance pas
+                continue
+            futures[mountpoint] = self._probe(mountpoint)
+        
+        wait(futures.values(), timeout=self.timeout)
+        
+        results = []
+        for partition in partitions:
+            mountpoint = partition.mountpoint
+            future = futures.get(mountpoint, self.pending.get(mountpoint))
+            entry = {"device": partition.device, "mountpoint": mountpoint}
+            
+            if future is not None and future.done():
+                self.pending.pop(mountpoint, None)
+                try:
+                    usage = future.result()
+                except Exception:
+                    continue
+                entry.update({
+                    "total_gb": round(usage.total / (1024**3), 2),
+                    "used_gb": round(usage.used / (1024**3), 2),
+                    "free_gb": round(usage.free / (1024**3), 2),
+                    "percent": usage.percent
+                })
+                self.last_usage[mountpoint] = entry
+            else:
+                # Montage lent : dernière valeur connue, marquée comme périmée
+                self.pending[mountpoint] = future
+                entry = dict(self.last_usage.get(mountpoint, entry), stale=True)
+            
+            results.append(entry)
+        
+        return results
+    
+    def get_io_rates(self) -> dict:
+        """Débits IO par périphérique depuis le rapport précédent"""
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception:
+            return {}
+        
+        now = time.time()
+        previous = self.last_io
+        self.last_io = (now, counters)
+        if not previous or now <= previous[0]:
+            return {}
+        
+        elapsed = now - previous[0]
+        rates = {}
+        for device, io in counters.items():
+            before = previous[1].get(device)
+            if before is None:
+                continue
+            rates[device] = {
+                "read_bytes_per_sec": round(max(io.read_bytes - before.read_bytes, 0) / elapsed, 1),
+                "write_bytes_per_sec": round(max(io.write_bytes - before.write_bytes, 0) / elapsed, 1),
+                "read_count_per_sec": round(max(io.read_count - before.read_count, 0) / elapsed, 1),
+                "write_count_per_sec": round(max(io.write_count - before.write_count, 0) / elapsed, 1)
+            }
+        return rates
+    
+    def report(self) -> dict:
+        """Rapport disque complet"""
+        with self._lock:
+            return {
+                "partitions": self.get_usage(),
+                "io": self.get_io_rates(),
+                "skipped": list(self.skipped)
+            }
+
+
+_disk_collector = DiskCollector()
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_metrics_collector() -> HostMetricsCollector:
+    """Retourne le collecteur partagé (démarré à la première demande)"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = HostMetricsCollector()
+            _collector.start()
+        return _collector
+
+
 class SystemMetrics:
     @staticmethod
     def get_all_metrics() -> dict:
@@ -12,73 +578,71 @@ class SystemMetrics:
                 "memory": SystemMetrics.get_memory_metrics(),
                 "disk": SystemMetrics.get_disk_metrics(),
                 "network": SystemMetrics.get_network_metrics(),
+                "processes": SystemMetrics.get_top_processes(),
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
             return {"error": str(e)}
     
+    @staticmethod
+    def start_sampling() -> HostMetricsCollector:
+        """Démarre la collecte des métriques en arrière-plan"""
+        return get_metrics_collector()
+    
+    @staticmethod
+    def get_top_processes(n: int = 5) -> dict:
+        """Processus les plus consommateurs (CPU, RSS, IO), lus depuis le dernier
+        balayage du thread de collecte"""
+        return get_metrics_collector().process_table.top(n)
+    
+    @staticmethod
+    def get_history(seconds: float = 300) -> dict:
+        """Agrégats et débits sur les N dernières secondes"""
+        return get_metrics_collector().get_summary(seconds)
+    
     @staticmethod
     def get_cpu_metrics() -> dict:
-        """Métriques CPU"""
-        return {
-            "percent": psutil.cpu_percent(interval=1),
-            "count": psutil.cpu_count(logical=False),
-            "count_logical": psutil.cpu_count(logical=True),
-            "freq": {
-                "current": psutil.cpu_freq().current if psutil.cpu_freq() else None,
-                "max": psutil.cpu_freq().max if psutil.cpu_freq() else None
-            }
-        }
+        """Métriques CPU (lues depuis la fenêtre de l'échantillonneur)"""
+        collector = get_metrics_collector()
+        collector.latest()  # Garantit au moins un échantillon au démarrage
+        return collector.cpu_sampler.latest()
     
     @staticmethod
     def get_memory_metrics() -> dict:
-        """Métriques Mémoire"""
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        """Métriques Mémoire (dernier échantillon du collecteur)"""
+        sample = get_metrics_collector().latest()
         
         return {
             "virtual": {
-                "total_gb": round(mem.total / (1024**3), 2),
-                "available_gb": round(mem.available / (1024**3), 2),
-                "percent": mem.percent,
-                "used_gb": round(mem.used / (1024**3), 2)
+                "total_gb": round(sample["memory_total"] / (1024**3), 2),
+                "available_gb": round(sample["memory_available"] / (1024**3), 2),
+                "percent": sample["memory_percent"],
+                "used_gb": round(sample["memory_used"] / (1024**3), 2)
             },
             "swap": {
-                "total_gb": round(swap.total / (1024**3), 2),
-                "used_gb": round(swap.used / (1024**3), 2),
-                "percent": swap.percent
+                "total_gb": round(sample["swap_total"] / (1024**3), 2),
+                "used_gb": round(sample["swap_used"] / (1024**3), 2),
+                "percent": sample["swap_percent"]
             }
         }
     
     @staticmethod
     def get_disk_metrics() -> dict:
-        """Métriques Disque"""
-        partitions = []
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                partitions.append({
-                    "device": partition.device,
-                    "mountpoint": partition.mountpoint,
-                    "total_gb": round(usage.total / (1024**3), 2),
-                    "used_gb": round(usage.used / (1024**3), 2),
-                    "free_gb": round(usage.free / (1024**3), 2),
-                    "percent": usage.percent
-                })
-            except:
-                continue
-        
-        return {"partitions": partitions}
+        """Métriques Disque (montages réseau/amovibles exclus, timeout par montage)"""
+        return _disk_collector.report()
     
     @staticmethod
     def get_network_metrics() -> dict:
-        """Métriques Réseau"""
-        net_io = psutil.net_io_counters()
+        """Métriques Réseau (compteurs et débits sur la dernière minute)"""
+        collector = get_metrics_collector()
+        sample = collector.latest()
         return {
-            "bytes_sent": net_io.bytes_sent,
-            "bytes_recv": net_io.bytes_recv,
-            "packets_sent": net_io.packets_sent,
-            "packets_recv": net_io.packets_recv
+            "bytes_sent": int(sample["net_bytes_sent"]),
+            "bytes_recv": int(sample["net_bytes_recv"]),
+            "packets_sent": int(sample["net_packets_sent"]),
+            "packets_recv": int(sample["net_packets_recv"]),
+            "bytes_sent_per_sec": collector.buffer.rate("net_bytes_sent", 60),
+            "bytes_recv_per_sec": collector.buffer.rate("net_bytes_recv", 60)
         }
     
     @staticmethod
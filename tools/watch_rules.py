@@ -0,0 +1,221 @@
+"""
+Règles d'inclusion/exclusion du FileMonitor (globs façon .gitignore)
+Compilées une fois, évaluées une fois par dossier (cache), et utilisées pour
+ne pas poser de surveillance watchdog sur les sous-arbres ignorés
+"""
+import os
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Équivalent des anciens filtres codés en dur + dossiers volumineux usuels
+DEFAULT_EXCLUDES = [
+    ".*",            # fichiers et dossiers cachés (.git, .venv, ...)
+    "*.pyc",
+    "*.swp",
+    "*.tmp",
+    "*.cache",
+    "__pycache__/",
+    "node_modules/",
+]
+
+
+def glob_to_regex(pattern):
+    """
+    Traduit un glob en expression régulière sur un chemin relatif ("/")
+    *  : tout sauf "/"      ** : n'importe quelle profondeur      ? : un caractère
+    """
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 3] == "**/":
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern[i:i + 2] == "**":
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append("\\[")
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class Rule:
+    """Une ligne de règle : glob, négation (!), dossier seulement (/ final)"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        # Avec un "/" interne, la règle est ancrée à la racine surveillée,
+        # sinon elle s'applique au nom à n'importe quelle profondeur
+        anchored = "/" in pattern
+        body = glob_to_regex(pattern.lstrip("/"))
+        prefix = "^" if anchored else "^(?:.*/)?"
+        self.regex = re.compile(prefix + body + "$")
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+
+class WatchRules:
+    """Filtre compilé des chemins surveillés"""
+
+    def __init__(self, include=None, exclude=None, cache_size=50000):
+        """
+        Args:
+            include: Globs des fichiers à garder (None = tous)
+            exclude: Globs ignorés, la dernière règle qui correspond l'emporte
+                ("!motif" ré-inclut) (défaut: DEFAULT_EXCLUDES)
+            cache_size: Nombre de dossiers dont le verdict est gardé
+        """
+        self.include = [Rule(p) for p in (include or [])]
+        self.exclude = [Rule(p) for p in (DEFAULT_EXCLUDES if exclude is None else exclude)]
+        self.roots = []
+        self.cache_size = cache_size
+        self._dir_cache = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(include=config.get("include_patterns"),
+                   exclude=config.get("exclude_patterns"))
+
+    def set_roots(self, roots):
+        """Racines surveillées (base des chemins relatifs)"""
+        self.roots = sorted((os.path.abspath(r) for r in roots), key=len, reverse=True)
+        with self._lock:
+            self._dir_cache.clear()
+
+    def _relative(self, path):
+        path = os.path.abspath(path)
+        for root in self.roots:
+            if path == root:
+                return ""
+            if path.startswith(root + os.sep):
+                return path[len(root) + 1:].replace(os.sep, "/")
+        return path.lstrip(os.sep).replace(os.sep, "/")
+
+    def _excluded(self, rel_path, is_dir):
+        excluded = False
+        for rule in self.exclude:
+            if rule.matches(rel_path, is_dir):
+                excluded = not rule.negate
+        return excluded
+
+    def _dir_ignored(self, rel_dir):
+        """Verdict d'un dossier (et de ses parents), en cache"""
+        if not rel_dir:
+            return False
+        cached = self._dir_cache.get(rel_dir)
+        if cached is not None:
+            return cached
+
+        parent = rel_dir.rpartition("/")[0]
+        ignored = self._dir_ignored(parent) or self._excluded(rel_dir, True)
+
+        with self._lock:
+            if len(self._dir_cache) >= self.cache_size:
+                self._dir_cache.clear()
+            self._dir_cache[rel_dir] = ignored
+        return ignored
+
+    def is_ignored(self, path, is_dir=False):
+        """Vrai si le chemin est exclu (directement ou par un dossier parent)"""
+        rel_path = self._relative(path)
+        if not rel_path:
+            return False
+        if is_dir:
+            return self._dir_ignored(rel_path)
+
+        parent, _, _ = rel_path.rpartition("/")
+        if self._dir_ignored(parent) or self._excluded(rel_path, False):
+            return True
+        if self.include:
+            return not any(rule.matches(rel_path, False) for rule in self.include)
+        return False
+
+    def plan_watches(self, root, max_watches=64):
+        """
+        Surveillances à poser pour une racine : récursives sur les sous-arbres
+        sans dossier ignoré, non récursives sur les dossiers qui en contiennent.
+
+        Returns:
+            Liste de (chemin, récursif). Au-delà de max_watches (un thread et
+            une instance inotify par surveillance), une seule surveillance
+            récursive de la racine, les événements étant alors filtrés.
+        """
+        root = os.path.abspath(root)
+        clean = {}
+        children = {}
+        self._walk(root, clean, children)
+
+        plan = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if clean[directory]:
+                plan.append((directory, True))
+            else:
+                plan.append((directory, False))
+                stack.extend(children[directory])
+            if len(plan) > max_watches:
+                logger.info(f"Too many watches for {root}, using one recursive watch with filtering")
+                return [(root, True)]
+        return plan
+
+    def _walk(self, root, clean, children):
+        """Parcours en post-ordre : un dossier est propre si aucun descendant n'est ignoré"""
+        stack = [(root, False)]
+        while stack:
+            directory, visited = stack.pop()
+            if visited:
+                clean[directory] = clean[directory] and all(clean[c] for c in children[directory])
+                continue
+
+            subdirs = []
+            has_ignored = False
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_dir(follow_symlinks=False):
+                                continue
+                        except OSError:
+                            continue
+                        if self.is_ignored(entry.path, is_dir=True):
+                            has_ignored = True
+                        else:
+                            subdirs.append(entry.path)
+            except OSError as e:
+                logger.debug(f"Cannot scan {directory}: {e}")
+
+            clean[directory] = not has_ignored
+            children[directory] = subdirs
+            stack.append((directory, True))
+            stack.extend((d, False) for d in subdirs)